@@ -5,6 +5,7 @@ import logging
 from .atable import ATable
 from .adataframe import ADataFrame
 from .ametatable import AMetaTable
+from .io.predicates import col
 
 def read(filename,format=None,columns=None,rows=None,
             ucds=None,metatable=None,metaonly=False,
@@ -21,7 +21,8 @@ class AColumn(Column):
 
         if meta:
             for k in ['unit','dtype','description']:
-                kwargs[k] = meta.pop(k,None)
+                if k in meta:
+                    kwargs[k] = meta.pop(k)
 
         self = super(AColumn,cls).__new__(cls,*args,**kwargs)
         return self
@@ -37,14 +38,12 @@ class AColumn(Column):
         '''
         If a valid UCD, set it to column
         '''
-        from .ucd import UCD
+        from .ucd import UCD, validate_ucd
         _ucd = UCD(ucd)
-        #REVIEW: what is a valid UCD?
+        if _ucd:
+            for level,msg in validate_ucd(_ucd):
+                logging.warning("UCD {!r}: {}".format(str(_ucd),msg))
         self.meta['ucd'] = _ucd
-        # if _ucd.is_valid():
-        #     self._ucd = _ucd
-        # else:
-        #     logging.warning("Not a valid UCD: {!r}".format(_ucd))
 
     ucd = property(_get_ucd, _set_ucd, doc="Get/Set column's UCD")
 
@@ -34,6 +34,39 @@ _CONVERTER = {  'ucd':          UCD,
                 'null':         lambda x:x,
                 'description':  lambda x:x}
 
+# Metadata whose values are converted once per distinct value
+_CONVERT_UNIQUE = ('ucd','unit')
+
+def _convert(metaname, values):
+    '''
+    Return list of 'values' converted by _CONVERTER[metaname]
+
+    UCD and unit strings repeat a lot among columns, each distinct
+    value is converted once.
+    '''
+    converter = _CONVERTER[metaname]
+    if metaname not in _CONVERT_UNIQUE:
+        return [ converter(v) for v in values ]
+    converted = {}
+    out = []
+    for v in values:
+        try:
+            cv = converted[v]
+        except KeyError:
+            cv = converted[v] = converter(v)
+        except TypeError:
+            # not hashable
+            cv = converter(v)
+        out.append(cv)
+    return out
+
+def _get_attribute(column, attrname):
+    try:
+        return getattr(column, attrname)
+    except:
+        return None
+
+
 
 from .adataframe import ADataFrame
 class AMetaTable(ADataFrame):
@@ -58,7 +91,6 @@ class AMetaTable(ADataFrame):
     _metadata = ['_index',
                  '_columns',
                  '_global',
-                 '_init_skel',
                  '_copy_global_meta',
                  'read_from_table',
                  'extract',
@@ -69,7 +101,8 @@ class AMetaTable(ADataFrame):
                  '_meta',
                  '_set_meta',
                  '_get_meta',
-                 'meta']
+                 'meta',
+                 '_ucd_matrix']
     # =================================================================
 
     # _columns for the third-table columns' metadata attributes
@@ -89,6 +122,37 @@ class AMetaTable(ADataFrame):
 
     meta = property(_get_meta, _set_meta, doc="Get/Set table's metadata")
 
+    _ucd_matrix = None
+
+    @property
+    def ucd_matrix(self):
+        '''
+        (columns x UCD-prefixes) ~booq.ucd.UCDMatrix of the table columns
+
+        Built once, rebuilt only when columns or their UCDs change.
+        '''
+        names = tuple(self.index)
+        ucds = tuple(self['ucd'])
+        _mtx = self._ucd_matrix
+        if _mtx is None or _mtx[0] != (names, ucds):
+            from .ucd import UCDMatrix
+            _mtx = ((names, ucds), UCDMatrix(ucds, names))
+            self._ucd_matrix = _mtx
+        return _mtx[1]
+
+    def colnames_by_ucd(self, ucds, match='any'):
+        '''
+        Return names of columns matching 'any' or 'all' of 'ucds'
+        '''
+        return self.ucd_matrix.colnames(ucds, match)
+
+    def validate_ucds(self, empty=True):
+        '''
+        Return per-column diagnostics of UCDs (see ~booq.ucd.validate_metatable)
+        '''
+        from .ucd import validate_metatable
+        return validate_metatable(self, empty=empty)
+
     @property
     def table_description(self):
         return self.meta['description']
@@ -159,18 +223,16 @@ class AMetaTable(ADataFrame):
             logging.error("No '{!s}' found in metadata table.".format(cls._index))
             return None
 
-        rownames, columns = cls._init_skel()
-
-        rownames = table[cls._index]
+        rownames = list(table[cls._index])
+        columns = OrderedDict()
         for metaname in cls._columns:
             if metaname not in table.colnames:
                 metavalue = [None] * len(rownames)
             else:
-                metavalue = table[metaname]
-            columns[metaname] = [_CONVERTER[metaname](mv) for mv in metavalue]
+                metavalue = list(table[metaname])
+            columns[metaname] = _convert(metaname, metavalue)
 
-        tab = cls(columns, index=rownames)
-        tab.index.names = [cls._index]
+        tab = cls._from_columns(columns, rownames)
 
         # copy table's meta data
         tab.meta = cls._copy_global_meta(table)
@@ -197,25 +259,18 @@ class AMetaTable(ADataFrame):
         assert isinstance(table, Table)
 
         # table's column names turn to be this table's index
-        rownames, columns = cls._init_skel()
+        rownames = list(table.colnames)
+        tabcols = list(table.columns.values())
+        _amap = _ATTRMAPS.get(table.__class__, {})
 
-        for colname in table.colnames:
-            rownames.append(colname)
-            for metaname in cls._columns:
-                try:
-                    _amap = _ATTRMAPS[table.__class__]
-                    attrname = _amap[metaname]
-                except:
-                    attrname = metaname
-                try:
-                    column = table[colname]
-                    metavalue = getattr(column, attrname)
-                except:
-                    metavalue = None
-                columns[metaname].append(_CONVERTER[metaname](metavalue))
+        # metadata is gathered one metadatum (column) at a time
+        columns = OrderedDict()
+        for metaname in cls._columns:
+            attrname = _amap.get(metaname, metaname)
+            metavalues = [ _get_attribute(column, attrname) for column in tabcols ]
+            columns[metaname] = _convert(metaname, metavalues)
 
-        tab = cls(columns, index=rownames)
-        tab.index.names = [cls._index]
+        tab = cls._from_columns(columns, rownames)
 
         # copy table's meta data
         tab.meta = cls._copy_global_meta(table)
@@ -280,13 +335,13 @@ class AMetaTable(ADataFrame):
 
 
     @classmethod
-    def _init_skel(cls):
-        from collections import OrderedDict
-        columns = OrderedDict()
-        for colname in cls._columns:
-            columns[colname] = []
-        rownames = []
-        return rownames, columns
+    def _from_columns(cls, columns, rownames):
+        '''
+        Build metatable from (converted) metadata 'columns' in one shot
+        '''
+        tab = cls(columns, index=rownames)
+        tab.index.names = [cls._index]
+        return tab
 
 
     def _sync_metadata(self, table):
@@ -10,7 +10,7 @@ import numpy as np
 from numpy import isnan, array
 
 # base class fot ATable
-from astropy.table import Table
+from astropy.table import Table, Column
 
 # definition of ATable's columns
 from .acolumn import AColumn
@@ -22,6 +22,7 @@ from .adataframe import ADataFrame
 #from .ametatable import AMetaTable
 
 from .utils import arrays, is_file
+from .utils import nulls
 
 
 class ATable(Table):
@@ -36,17 +37,43 @@ class ATable(Table):
     Column = AColumn
 
     _metatable = None
+    # column names the metatable was built for
+    _metatable_colnames = None
+
+    # columns sketches (see ~io.sketches), the file they can be read from,
+    # and columns set/replaced since (whose sketches are not valid)
+    _sketches = None
+    _sketches_file = None
+    _sketches_stale = frozenset()
+    # meta the table was read with, sketches included (see 'read')
+    _sketches_meta = None
 
     @property
     def metatable(self):
+        '''
+        ~booq.AMetaTable of the table columns
+
+        Built from the columns at first access; built again if columns
+        were added, removed or renamed since.
+        '''
+        if self._metatable is None or self._metatable_colnames != tuple(self.colnames):
+            if self._metatable is not None:
+                logging.debug("Columns changed, metatable being rebuilt.")
+            self._set_metatable(_read_meta_from_table(self))
         return self._metatable
 
+    def _set_metatable(self, metatable):
+        self._metatable = metatable
+        self._metatable_colnames = None if metatable is None else tuple(self.colnames)
+
     def _read_metatable(self, filename=None):
+        '''
+        Read metatable from 'filename'; if None, it is built when needed
+        '''
         if filename is None:
-            _metatable = _read_meta_from_table(self)
+            self._set_metatable(None)
         else:
-            _metatable = _read_meta_from_file(filename)
-        self._metatable = _metatable
+            self._set_metatable(_read_meta_from_file(filename))
 
     def _sync_metadata(self):
         '''
@@ -88,15 +115,82 @@ class ATable(Table):
     def nulls(self):
         return self.nils
 
-    def describe(self):
+    def describe(self, workers=None):
         '''
         Print table content's summary
+
+        Statistics are computed in one pass over each column, columns
+        in parallel ('workers' threads); see ~utils.stats. Columns with
+        sketches (see 'sketches') are described from them.
+        '''
+        return ADataFrame(describe(self, workers=workers, sketches=self.sketches))
+
+    @property
+    def sketches(self):
+        '''
+        {column : ~utils.stats.ColumnSketch} of the table, None if none
+
+        Sketches are the ones computed by 'compute_sketches' or stored
+        in the file/metatable the table was read from (see ~io.sketches).
+        Stored sketches are used only if computed from the same data
+        (checksums are verified when they are first read); sketches of
+        columns set, replaced or renamed since are dropped. Values
+        modified in place afterwards (e.g, 'table['a'][:10] = 0') are
+        not noticed: 'compute_sketches' again.
+        '''
+        if self._sketches is None:
+            from .io import sketches
+            found = sketches.from_meta(self._sketches_meta) or sketches.from_meta(self.meta)
+            if found is None and self._metatable is not None:
+                found = sketches.from_meta(self._metatable.meta)
+            if found is None and self._sketches_file is not None:
+                try:
+                    found = sketches.read(*self._sketches_file)
+                except OSError as e:
+                    # file moved/removed since read, describe from the data
+                    logging.warning("Sketches not read: {}".format(e))
+            self._sketches = sketches.verify(found, self)
+        valid = OrderedDict( (name,sketch) for name,sketch in self._sketches.items()
+                             if name in self.colnames and name not in self._sketches_stale
+                             and sketch.length == len(self) )
+        return valid or None
+
+    def compute_sketches(self, workers=None):
+        '''
+        Compute (and keep) the sketches of the table columns
+
+        Columns are processed in parallel ('workers' threads).
         '''
-        return ADataFrame(describe(self))
+        from .io import sketches
+        self._sketches = sketches.compute(self, workers=workers)
+        self._sketches_stale = frozenset()
+        return self._sketches
+
+    def _drop_sketches(self, *names):
+        # sketches of columns 'names' no longer describe them
+        self._sketches_stale = self._sketches_stale.union(names)
+
+    def __setitem__(self, item, value):
+        super(ATable, self).__setitem__(item, value)
+        # a column, or rows of all columns
+        self._drop_sketches(*([item] if isinstance(item, str) else self.colnames))
+
+    def replace_column(self, name, col, copy=True):
+        super(ATable, self).replace_column(name, col, copy=copy)
+        self._drop_sketches(name)
+
+    def rename_column(self, name, new_name):
+        super(ATable, self).rename_column(name, new_name)
+        self._drop_sketches(name, new_name)
+
+    def remove_columns(self, names):
+        names = [names] if isinstance(names, str) else list(names)
+        super(ATable, self).remove_columns(names)
+        self._drop_sketches(*names)
 
 
     @classmethod
-    def from_dataframe(cls, df, raise_index=True, rename_index=None):
+    def from_dataframe(cls, df, raise_index=True, rename_index=None, copy=True):
         '''
         Return ATable from pandas.DataFrame 'df'
 
@@ -106,15 +200,45 @@ class ATable(Table):
                 transform df' index into a column
          - rename_index : string
                 If 'raise_index', rename index to this value
+         - copy         : bool
+                If False, numeric columns share 'df' data buffers
+                (pandas gives them read-only)
         '''
         if rename_index:
             df.index.names = [rename_index]
         if raise_index and len(df):
             df = df.reset_index()
-        coldefs = cls._define_columns(df, df.columns)
+        coldefs = cls._columns_from_dataframe(df, copy=copy)
         if not coldefs:
             return cls()
-        return cls(coldefs)
+        return cls(coldefs, copy=False)
+
+
+    @classmethod
+    def _columns_from_dataframe(cls, df, copy=True):
+        '''
+        Define ATable' columns from pandas.DataFrame 'df'
+
+        Numeric columns (numpy and nullable dtypes) are taken as they
+        are: if not 'copy', columns are views of 'df' data. Null values
+        of nullable and float columns give the mask. String columns
+        (object, 'str') become numpy unicode arrays, nulls as '' (and
+        masked). Categoricals take their categories' values. Other
+        dtypes go through ~ATable._define_columns.
+        '''
+        coldefs = OrderedDict()
+        for cname in df.columns:
+            # If a column name is a tuple/list items are joined into a string
+            name = cname if isinstance(cname,str) else '_'.join(cname)
+            vector,mask = _series_arrays(df[cname])
+            if vector is None:
+                coldefs.update(cls._define_columns(df, [cname], copy=copy))
+                continue
+            if mask is not None and mask.any():
+                coldefs[name] = cls.MaskedColumn(data=vector, name=name, mask=mask, copy=copy)
+            else:
+                coldefs[name] = cls.Column(data=vector, name=name, copy=copy)
+        return coldefs
 
 
     @classmethod
@@ -127,7 +251,7 @@ class ATable(Table):
         return cls.from_dataframe(series, raise_index=True)
 
 
-    def to_dataframe(self, multidimensional_columns='ignore'):
+    def to_dataframe(self, multidimensional_columns='ignore', copy=True):
         '''
         Return a pandas.DataFrame
 
@@ -139,34 +263,57 @@ class ATable(Table):
         Input:
          - multidimensional_columns : options are 'ignore','split'
                 How to deal with multidimensional columns
+         - copy : bool
+                If False, (not masked) numeric columns share the table
+                data buffers
         '''
         nd_cols_action = multidimensional_columns
+        assert nd_cols_action in ('ignore','split')
         nD_cols = detect_multiD_columns(self)
         if nD_cols:
             msg = "Multidimensional columns ({}), '{}'ing it."
             logging.warning(msg.format(nD_cols, nd_cols_action))
 
+        if self.indices or not all(isinstance(c, Column) for c in self.itercols()):
+            # indexed tables and mixin columns (Time, Quantity,...) go through astropy
+            return self._to_dataframe_astropy(nD_cols, nd_cols_action)
+
+        # columns are gathered and the frame built at once
+        data = OrderedDict()
+        for cname in self.colnames:
+            column = self[cname]
+            if cname in nD_cols:
+                if nd_cols_action == 'split':
+                    for i in range(column.shape[1]):
+                        data[cname+'_'+str(i+1)] = _column_array(column[:,i])
+                continue
+            data[cname] = _column_array(column)
+        return ADataFrame(data, copy=copy)
+    # ---
+    to_pandas = to_dataframe
+    # ---
+
+    def _to_dataframe_astropy(self, nD_cols, nd_cols_action):
+        '''
+        Return a pandas.DataFrame through ~astropy.table.Table.to_pandas
+        '''
+        if nD_cols:
             cols = self.colnames
             for c in nD_cols:
                 _c = cols.pop(cols.index(c))
                 assert c == _c
             adf = super(ATable, self[cols]).to_pandas()
 
-            if multidimensional_columns == 'split':
+            if nd_cols_action == 'split':
                 for cname in nD_cols:
                     cdata = self[cname].data
                     names = [cname+'_'+str(i+1) for i in range(cdata.shape[1])]
                     df_col = ATable(cdata, names=names).to_pandas()
                     adf = pd.concat([adf, df_col], axis=1)
-            else:
-                assert multidimensional_columns == 'ignore'
         else:
             adf = super(ATable, self).to_pandas()
 
         return ADataFrame(adf)
-    # ---
-    to_pandas = to_dataframe
-    # ---
 
 
     @classmethod
@@ -181,21 +328,42 @@ class ATable(Table):
          - data : string
                 filename to read data from
          - format : string
-                filename format. If 'fits', arguments 'columns','rows','ucds' apply
+                filename format. If 'fits', arguments 'columns','rows','ucds' apply;
+                if 'parquet' or 'arrow', 'columns','ucds','filter_rows' apply
+                ('filter_rows' predicates are pushed down to the reader)
          - columns : list of strings
                 column names to be read
          - rows : float, integer or list of integers
                 number of rows, or list of rows (0-indented) to read from
                 if a float less then 1, consider a fraction of total rows to read
+                For IPAC and CSV files, rows are reached through a rows index
+                ('<filename>.idx', see ~booq.io.index) built in the first read.
          - ucds : list of strings
                 UCDs identifying the columns to be read
          - metatable : string
                 metadata filename
          - metaonly : bool
                 If True, do not load data, only metadata is read.
-         - filter_rows : {column : select-function}
-                'select-function' is applied to each row from 'column'
-                Many columns can be provided. Slection works as AND
+         - filter_rows : {column : select-function} or ~io.predicates.Predicate
+                'select-function' is applied to the values from 'column'
+                Many columns can be provided. Slection works as AND.
+                Predicates are built with ~io.predicates.col, e.g.
+                '(col('mag') < 20) & col('ra').between(10,20)'
+         - sampling : string
+                (FITS only) If 'rows' is a number, how rows are sampled:
+                'uniform' (default), 'bernoulli' or 'block' (contiguous ranges)
+         - seed : integer
+                (FITS only) Seed for the sampling random generator
+         - memmap : bool
+                (FITS only) If True, memory-map the file: columns are views
+                onto the file instead of copies (read-only analysis).
+         - cache_dir : string
+                Directory of an on-disk cache (~booq.io.cache) of the
+                parsed columns; later reads of the same (unmodified) file
+                with the same options are memory-mapped from the cache.
+         - cache_size : integer
+                Cache size limit in bytes (default 10GB); least recently
+                used entries are evicted.
         '''
         #TODO: apply arguments 'columns', 'rows' and 'ucds' to all formats read
 
@@ -216,27 +384,69 @@ class ATable(Table):
                 else:
                     format = None
 
-            if format == 'fits':
-                logging.debug("FITS file being read.")
-                columns = kwargs.pop('columns', None)
-                rows = kwargs.pop('rows', None)
-                ucds = kwargs.pop('ucds', None)
-                filter_rows = kwargs.pop('filter_rows', None)
-                tab = cls._read_fits(filename, columns, rows, ucds, filter_rows)
-            # elif format == 'ipac':
-            #     logging.debug("IPAC file being read.")
-            #     columns = kwargs.pop('columns',None)
-            #     rows = kwargs.pop('rows', None)
-            #     ucds = kwargs.pop('ucds',None) # this is not working so far
-            #     tab = cls._read_ipac(filename,columns,rows,ucds)
-            elif format == 'cds':
-                logging.debug("CDS file being read.")
-                readme = kwargs.pop('readme', None)
-                tab = super(ATable,cls).read(filename, readme=readme,
-                                             format='ascii.cds')
+            cache_dir = kwargs.pop('cache_dir', None)
+            cache_size = kwargs.pop('cache_size', None)
+            cache, key, cached = None, None, None
+            if cache_dir:
+                from .io.cache import Cache
+                cache = Cache(cache_dir, cache_size)
+                options = { k:v for k,v in kwargs.items()
+                            if k not in ('data','filename','metatable','metadata') }
+                key = cache.key(filename, args=args[1:], **options)
+                cached = cache.get(key)
+
+            if cached is not None:
+                logging.debug("Table read from cache.")
+                tab = cls._from_cache(cached)
             else:
-                logging.debug("Not a FITS file, read it using astropy.table")
-                tab = super(ATable, cls).read(*args, **kwargs)
+                if format == 'fits':
+                    logging.debug("FITS file being read.")
+                    columns = kwargs.pop('columns', None)
+                    rows = kwargs.pop('rows', None)
+                    ucds = kwargs.pop('ucds', None)
+                    filter_rows = kwargs.pop('filter_rows', None)
+                    memmap = kwargs.pop('memmap', False)
+                    sampling = kwargs.pop('sampling', 'uniform')
+                    seed = kwargs.pop('seed', None)
+                    tab = cls._read_fits(filename, columns, rows, ucds, filter_rows,
+                                         memmap=memmap, sampling=sampling, seed=seed)
+                elif format == 'ipac':
+                    logging.debug("IPAC file being read.")
+                    columns = kwargs.pop('columns',None)
+                    rows = kwargs.pop('rows', None)
+                    ucds = kwargs.pop('ucds',None) # this is not working so far
+                    tab = cls._read_ipac(filename,columns,rows,ucds)
+                elif format in ('parquet','arrow'):
+                    logging.debug("{} file being read.".format(format))
+                    columns = kwargs.pop('columns', None)
+                    ucds = kwargs.pop('ucds', None)
+                    filter_rows = kwargs.pop('filter_rows', None)
+                    tab = cls._read_parquet(filename, columns, ucds, filter_rows, format)
+                elif format in ('csv','ascii.csv') and kwargs.get('rows') is not None:
+                    logging.debug("CSV rows being read.")
+                    rows = kwargs.pop('rows')
+                    kwargs.pop('format')
+                    tab = cls._read_csv_rows(filename, rows, **kwargs)
+                elif format == 'cds':
+                    logging.debug("CDS file being read.")
+                    readme = kwargs.pop('readme', None)
+                    tab = super(ATable,cls).read(filename, readme=readme,
+                                                 format='ascii.cds')
+                else:
+                    logging.debug("Not a FITS file, read it using astropy.table")
+                    tab = super(ATable, cls).read(*args, **kwargs)
+                if format in ('csv','ascii.csv'):
+                    tab._mask_nulls()
+                if key is not None:
+                    cache.put(key, tab)
+
+            # stored sketches and data checksums describe the data as read,
+            # they are not written again with the table's meta (see 'sketches')
+            from .io import sketches
+            tab._sketches_meta = tab.meta
+            tab.meta = sketches.strip_meta(tab.meta)
+            if format == 'fits':
+                tab._sketches_file = (filename, 'fits')
         else:
             tab = ATable()
 
@@ -253,6 +463,23 @@ class ATable(Table):
         return tab
 
 
+    @classmethod
+    def _from_cache(cls, cached):
+        '''
+        Build table from ~booq.io.cache entry 'cached' (memory-mapped columns)
+        '''
+        cols = []
+        for col in cached['columns']:
+            kwargs = dict(data=col['data'], name=col['name'], unit=col['unit'],
+                          description=col['description'], meta=col['meta'],
+                          copy=False)
+            if col['mask'] is not None:
+                cols.append(cls.MaskedColumn(mask=col['mask'], **kwargs))
+            else:
+                cols.append(cls.Column(**kwargs))
+        return cls(cols, meta=cached['meta'], copy=False)
+
+
     def write(self, *args, **kwargs):
         '''
         Interface astropy.table write to create a backed-up 'overwrite'
@@ -276,6 +503,18 @@ class ATable(Table):
                 If True, writes table's metadata to `metatable.ecsv`.
                 For better control, a filename can be given to use as
                 metatable's file name.
+         - format : string ['fits']
+                Besides astropy's formats, 'ipac' is written by ~booq.io.ipac
+                (options 'keywords', 'comments', 'chunk_rows'); 'parquet'
+                and 'arrow' by ~booq.io.parquet (options 'chunk_rows',
+                'compression'), with columns' UCD, unit, description and
+                null in the file.
+         - sketches : bool [False]
+                If True, columns sketches (~io.sketches) are computed and
+                stored in the metatable and in the file (FITS 'SKETCHES'
+                extension, table's meta for other formats but IPAC).
+                Sketches (and checksums) the table or its metatable were
+                read with are never written.
         ----
         '''
         clobber = kwargs.pop('overwrite', False)
@@ -286,25 +525,87 @@ class ATable(Table):
 
         pretty_print = kwargs.pop('pretty_print', False)
 
+        format = kwargs.get('format', 'fits')
+        kwargs.update({'format': format})
+
+        from .io import sketches as _sketches
+        sketches = None
+        if kwargs.pop('sketches', False):
+            sketches = self.compute_sketches()
+
         writemeta = kwargs.pop('metatable', False)
         if 'metadata' in kwargs.keys():
             warn('Use `metatable` instead of `metadata`.', DeprecationWarning)
             writemeta = kwargs.pop('metadata', False)
         if writemeta:
             meta = self.metatable
+            metameta = meta.meta
+            # sketches the metatable was read with describe the data as read
+            meta.meta = _sketches.strip_meta(metameta)
+            if sketches is not None:
+                meta.meta[_sketches.META_KEY] = _sketches.to_meta(sketches)
             metafile = 'metatable.ecsv' if writemeta is True else writemeta
-            meta.write(metafile, format='ascii.ecsv', pretty_print=pretty_print)
+            try:
+                meta.write(metafile, format='ascii.ecsv', pretty_print=pretty_print)
+            finally:
+                meta.meta = metameta
+
+        if format == 'ipac':
+            self._write_ipac(*args, **kwargs)
+            return
+
+        tablemeta = self.meta
+        if sketches is not None and format != 'fits':
+            # sketches go with the table's meta, only while writing
+            self.meta = OrderedDict(tablemeta, **{_sketches.META_KEY:_sketches.to_meta(sketches)})
+        try:
+            if format in ('parquet','arrow'):
+                self._write_parquet(*args, **kwargs)
+            elif format == 'fits' and sketches is not None:
+                self._write_fits(*args, sketches=sketches, **kwargs)
+            else:
+                super(ATable, self).write(*args, **kwargs)
+        finally:
+            self.meta = tablemeta
 
-        format = kwargs.get('format', 'fits')
-        kwargs.update({'format': format})
 
-        super(ATable, self).write(*args, **kwargs)
+    def _write_fits(self, filename, sketches, **kwargs):
+        '''
+        Write FITS table 'filename' with columns 'sketches' (~io.sketches.to_hdu)
+
+        'kwargs' go to ~astropy.io.fits.HDUList.writeto.
+        '''
+        from astropy.io import fits
+        from .io import sketches as _sketches
+        kwargs.pop('format', None)
+        hdu = fits.table_to_hdu(self, character_as_bytes=True)
+        hdul = fits.HDUList([fits.PrimaryHDU(), hdu, _sketches.to_hdu(sketches, hdu)])
+        hdul.writeto(filename, **kwargs)
+
+
+    def _write_ipac(self, filename, **kwargs):
+        '''
+        Interface with ~booq.io.ipac to write IPAC table
+        '''
+        from .io import ipac
+        kwargs.pop('format', None)
+        ipac.write(filename, self, **kwargs)
+
+
+    def _write_parquet(self, filename, **kwargs):
+        '''
+        Interface with ~booq.io.parquet to write Parquet/Arrow table
+        '''
+        from .io import parquet
+        parquet.write(filename, self, **kwargs)
 
 
     @classmethod
-    def from_fits(cls,fts):
+    def from_fits(cls,fts,copy=True):
         '''
         Transforms ~booq.io.fits.Fits to ~booq.table.ATable.
+
+        If 'copy' is False, table columns share 'fts' data buffers.
         '''
         try:
             meta = fts.meta
@@ -314,29 +615,195 @@ class ATable(Table):
         columns = fts.colnames
         logging.info("Columns to read: {}".format(columns))
 
-        coldefs = cls._define_columns(data,columns,meta)
-        return cls(coldefs)
+        coldefs = cls._define_columns(data,columns,meta,copy=copy)
+        return cls(coldefs,copy=copy)
 
 
     @classmethod
-    def _read_fits(cls, filename, columns, rows, ucds, filter_rows):
+    def _read_fits(cls, filename, columns, rows, ucds, filter_rows, memmap=False,
+                   sampling='uniform', seed=None):
         '''
         Interface with ~booq.io.fits to read fits table
         '''
         from .io import fits
-        _hand = fits.open(filename, bool(filter_rows))
-        _fits = _hand.read(columns=columns, rows=rows, ucds=ucds, filter_rows=filter_rows)
+        _hand = fits.open(filename, memmap=memmap)
+        _fits = _hand.read(columns=columns, rows=rows, ucds=ucds, filter_rows=filter_rows,
+                           sampling=sampling, seed=seed)
+        tab = cls.from_fits(_fits, copy=not memmap)
+        return tab
+
+
+    @classmethod
+    def read_many(cls, filenames, columns=None, ucds=None, filter_rows=None,
+                  workers=None, metatable=None):
+        '''
+        Read and concatenate the same columns from many FITS files
+
+        Files (e.g, tiles of the same survey) are read in parallel by
+        a local pool of 'workers' processes; their columns metadata must
+        agree. See ~io.fits.read_many.
+
+        Input:
+         - filenames : list of strings
+         - columns : list of strings
+         - ucds : list of strings
+         - filter_rows : {column : select-function} or ~io.predicates.Predicate
+         - workers : integer
+                number of processes; default is the number of CPUs
+         - metatable : string
+                metadata filename
+        '''
+        from .io import fits
+        _fits = fits.read_many(filenames, columns=columns, ucds=ucds,
+                               filter_rows=filter_rows, workers=workers)
         tab = cls.from_fits(_fits)
+        tab._read_metatable(metatable)
+        if metatable:
+            tab._sync_metadata()
         return tab
 
 
     @classmethod
-    def _define_columns(cls, data, columns, metadata_columns=None):
+    def iter_chunks(cls, filename, chunk_rows=100000, columns=None, ucds=None,
+                    metatable=None):
+        '''
+        Iterate over (FITS) 'filename' in blocks of 'chunk_rows' rows
+
+        Each block is an ~ATable; the metatable is built once, for the
+        first block, and the same object is shared by all blocks.
+        Memory in use is then bounded by the size of one block.
+
+        Input:
+         - filename : string
+         - chunk_rows : integer
+                number of rows in each block
+         - columns : list of strings
+                column names to be read
+         - ucds : list of strings
+                UCDs identifying the columns to be read
+         - metatable : string
+                metadata filename
+        Output:
+         - generator of ~ATable
+        '''
+        from .io import fits
+        _hand = fits.open(filename)
+        _meta = None
+        for _fits in _hand.iter_read(columns=columns, ucds=ucds,
+                                     chunk_rows=chunk_rows):
+            tab = cls.from_fits(_fits)
+            if _meta is None:
+                tab._read_metatable(metatable)
+                _meta = tab.metatable
+            else:
+                tab._set_metatable(_meta)
+            if metatable:
+                tab._sync_metadata()
+            yield tab
+
+
+    @classmethod
+    def _read_ipac(cls, filename, columns, rows, ucds=None):
+        '''
+        Interface with ~booq.io.ipac to read IPAC table
+        '''
+        from .io import ipac
+        res = ipac.read(filename, columns=columns, rows=rows, ucds=ucds)
+        cols = []
+        for i,_name in enumerate(res['names']):
+            _data = res['data'][_name]
+            _mask = res['masks'][_name]
+            _unit = res['units'][i] or None
+            _meta = {'null':res['nulls'][i]}
+            if _mask.any():
+                col = cls.MaskedColumn(data=_data, name=_name, mask=_mask,
+                                       unit=_unit, meta=_meta, copy=False)
+            else:
+                col = cls.Column(data=_data, name=_name, unit=_unit,
+                                 meta=_meta, copy=False)
+            cols.append(col)
+        return cls(cols, copy=False)
+
+
+    @classmethod
+    def _read_parquet(cls, filename, columns=None, ucds=None, filter_rows=None,
+                      format='parquet'):
+        '''
+        Interface with ~booq.io.parquet to read Parquet/Arrow table
+        '''
+        from .io import parquet
+        res = parquet.read(filename, columns=columns, ucds=ucds,
+                           filter_rows=filter_rows, format=format)
+        cols = []
+        for _name in res['names']:
+            _data = res['data'][_name]
+            _mask = res['masks'][_name]
+            _meta = res['meta'][_name]
+            if _mask.any():
+                col = cls.MaskedColumn(data=_data, name=_name, mask=_mask, copy=False)
+            else:
+                col = cls.Column(data=_data, name=_name, copy=False)
+            col.unit = _meta['unit'] or None
+            col.description = _meta['description']
+            col.meta['null'] = _meta['null']
+            if _meta['ucd']:
+                col.meta['ucd'] = _meta['ucd']
+            cols.append(col)
+        return cls(cols, meta=res['keywords'], copy=False)
+
+
+    @classmethod
+    def _read_csv_rows(cls, filename, rows, **kwargs):
+        '''
+        Read 'rows' of CSV 'filename' through its rows index (~booq.io.index)
+
+        Only the header and the lines of the selected rows are parsed;
+        'kwargs' go to ~astropy.table.Table.read ('ascii.csv').
+        '''
+        from .io.index import get_index
+        from .utils import is_number
+        index = get_index(filename, format='csv')
+        if is_number(rows):
+            from .utils.data import sample_rows
+            rows = sample_rows(index.nrows, rows)
+        if isinstance(rows, slice):
+            rows = np.arange(index.nrows)[rows]
+        rows = np.unique(np.asarray(rows, dtype=int))
+        with open(filename, 'rb') as fp:
+            header = fp.read(index.data_offset).decode().splitlines()
+            lines = index.read_rows(rows, fp)
+        lines = header + [ line.decode() for line in lines ]
+        return super(ATable, cls).read(lines, format='ascii.csv', **kwargs)
+
+
+    def _mask_nulls(self):
+        '''
+        Mask null values (see ~utils.nulls) of the columns, in place
+
+        Columns with nulls become ~MaskedColumn; entries already masked
+        stay masked.
+        '''
+        for name in self.colnames:
+            column = self[name]
+            null = column.meta.get('null') if column.meta else None
+            mask = nulls.null_mask(np.asarray(column), null=null)
+            if not mask.any():
+                continue
+            logging.debug("'{}' has {:d} null values".format(name, int(mask.sum())))
+            if hasattr(column, 'mask'):
+                column.mask |= mask
+            else:
+                self.replace_column(name, self.MaskedColumn(column, mask=mask, copy=False))
+
+
+    @classmethod
+    def _define_columns(cls, data, columns, metadata_columns=None, copy=True):
         '''
         Define ATable' columns from 'data' and 'columns' names
 
         If 'metadata_columns' is given, it will be used as metadata to
-        the corresponding column defined.
+        the corresponding column defined. If 'copy' is False, array
+        columns are not copied (memory-mapped data remains mapped).
 
         Input:
          - data : numpy recarray-like structure
@@ -345,6 +812,8 @@ class ATable(Table):
                 Column names to use for array data retrieval
          - metadata_columns : list of ~booq.table.io.MetaColumn
                 List of columns metadata
+         - copy : bool
+                Copy (default) or not the data arrays
         '''
         coldefs = OrderedDict()
 
@@ -368,6 +837,9 @@ class ATable(Table):
             # Let's work over the data now..
             column = data[cname]
 
+            # Sentinel null value, from the column's metadata (if any)
+            null = meta.get('null') if isinstance(meta, dict) else None
+
             # We have to treat different data structures differently..
             if hasattr(column,'values'):
                 # we are (probably) dealing with a pandas series/dataframe..
@@ -375,33 +847,24 @@ class ATable(Table):
 
                 vector = column.values
                 mask = column.isnull().values
-
-                logging.debug('{} has {}/{} null values'.format(cname,sum(mask),len(mask)))
             else:
                 # if here, it is (hopefully) a list or any array like object,
                 # by all means, we transform into a numpy array..
                 logging.debug('Column is a {} instance'.format(type(column)))
 
-                vector = np.array(column)
-
-                #FIXME: this (if) block should evaluate mask using 'vector', not 'column'!
-                if arrays.is_numeric(column):
-                    logging.debug("'{}' is numeric array'".format(cname))
-
-                    mask = np.isnan(column)
-
-                else:
-                    logging.debug("'{}' is non-numeric'".format(cname))
-                    assert arrays.is_object(column) or \
-                           arrays.is_string(column)
-
-                    mask = ~np.array([ v==v for v in column ])
+                vector = np.array(column) if copy else np.asarray(column)
+                mask = None
 
             # For clear,plain data sets we should be working --ultimately--
             # with either numbers or strings
             # (considering this table to be human-readable structure)
             if arrays.is_object(vector):
-                vector = arrays.to_str(vector,null='')
+                vector,_mask = nulls.masked_strings(vector, null=null)
+            else:
+                _mask = nulls.null_mask(vector, null=null)
+            mask = _mask if mask is None else mask | _mask
+
+            logging.debug('{} has {}/{} null values'.format(cname,mask.sum(),len(mask)))
 
             # If a column name is a tuple/list items are joined into a string
             if isinstance(cname,str):
@@ -413,7 +876,7 @@ class ATable(Table):
 
             # I'll add this line to a dictionary to detach the rest of this function
             # to the lines above (that may become a utility function)
-            d = dict(data=vector,name=name,mask=mask,meta=meta)
+            d = dict(data=vector,name=name,mask=mask,meta=meta,copy=copy)
 
             if d['mask'].any():
                 # coldefs[name] = cls.MaskedColumn(data=vector,name=name,mask=mask,meta=meta)
@@ -429,7 +892,8 @@ class ATable(Table):
         '''
         Find out which columns correspond to given UCDs
 
-        Returns list of column names matching 'ucds'
+        Returns list of column names matching 'ucds'.
+        Matching is done over the metatable's ~AMetaTable.ucd_matrix.
         Input:
          - ucds  : str, list of ucd-words or list of UCDs
                 Example, ['pos','meta.id']
@@ -438,22 +902,11 @@ class ATable(Table):
         Output:
          - colnames : list of column names
         '''
-        ucd = ucds
-        logging.info("Match '{}' of UCDs '{}'".format(match,ucd))
-        if isinstance(ucd,str):
-            ucd = [ucd]
-        assert isinstance(ucd,(list,tuple))
-        if match == 'any':
-            indx = len(self.ucds) * [False]
-            for u in ucd:
-                logging.debug("UCD being matched: '{!s}'".format(u))
-                u = [u]
-                indx |= self.ucds.apply(lambda x:x.isin(u))
-                # indx |= self.ucds.isin(u)
-        else:
-            assert match == 'all', "Options for 'match' are ['all','any']"
-            indx = self.ucds.apply(lambda x:x.isin(ucd))
-        colnames = indx[indx].index.values.tolist()
+        logging.info("Match '{}' of UCDs '{}'".format(match,ucds))
+        if isinstance(ucds,str):
+            ucds = [ucds]
+        assert isinstance(ucds,(list,tuple))
+        colnames = self.metatable.colnames_by_ucd(ucds, match=match)
         logging.debug("Columns got from UCDs: {}".format(colnames))
         return colnames
 
@@ -485,30 +938,6 @@ class ATable(Table):
         self.write(filename,format=format)
 
 
-'''
-    @classmethod
-    def _read_ipac(cls, filename, columns, rows, ucds=None):
-        from booq.io import ipac
-        res = ipac.read(filename, columns=columns, rows=rows, ucds=ucds)
-
-        names = res['names']
-        types = res['types']
-        units = res['units']
-        nulls = res['nulls']
-        data = res['data']
-        from astropy.table import Table,MaskedColumn
-        cols = []
-        for i,_name in enumerate(names):
-            _type = types[i]
-            _unit = units[i]
-            _null = nulls[i]
-            _data = [ _dat[i] for _dat in data ]
-            _mask = [ _dat == _null for _dat in _data ]
-            col = cls.MaskedColumn(data=_data, name=_name, mask=_mask, dtype=_type)
-            cols.append(col)
-        return cls(cols)
-'''
-
 # =====================================================================
 # Auxiliary functions
 # ===================
@@ -527,14 +956,91 @@ def _read_meta_from_file(filename):
     return meta
 
 
-def describe(table):
-    from collections import OrderedDict
-    sts = OrderedDict()
-
+def describe(table, workers=None, sketches=None):
     from .utils import stats
-    for col in table.colnames:
-        sts[col] = stats.basic(table[col])
-    return sts
+    sketches = sketches or {}
+    columns = [ col for col in table.colnames if col not in sketches ]
+    sts = stats.table_stats(table, columns=columns, workers=workers)
+    sts.update(sketches)
+    return OrderedDict( (col,sts[col].result()) for col in table.colnames )
+
+def _series_arrays(series):
+    '''
+    Return (data, mask) arrays of pandas.Series 'series'
+
+    Numeric data is not copied (but for nullable dtypes with nulls, filled
+    with 0); mask is None if 'series' has no nulls. Categoricals give
+    the values of their categories (nulls masked).
+    Returns (None, None) for dtypes not handled here.
+    '''
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        # categories are converted once, then taken by the codes
+        categories,_ = _series_arrays(pd.Series(dtype.categories))
+        if categories is None or not len(categories):
+            return None, None
+        codes = series.cat.codes.to_numpy()
+        mask = codes < 0
+        return categories[np.where(mask, 0, codes)], mask
+    if isinstance(dtype, np.dtype):
+        if dtype.kind in 'biu':
+            return series.to_numpy(copy=False), None
+        if dtype.kind in 'fc':
+            vector = series.to_numpy(copy=False)
+            return vector, np.isnan(vector)
+        if dtype.kind != 'O':
+            return None, None
+    values = series.array
+    if isinstance(values, (pd.arrays.IntegerArray, pd.arrays.FloatingArray,
+                           pd.arrays.BooleanArray)):
+        # nullable dtypes: data is not copied unless nulls are filled
+        mask = values.isna()
+        return values.to_numpy(dtype=dtype.numpy_dtype, na_value=0), mask
+    if dtype.kind == 'O' or isinstance(dtype, pd.StringDtype):
+        return nulls.masked_strings(values)
+    return None, None
+
+
+def _column_array(column):
+    '''
+    Return array of 'column' to be a pandas.DataFrame column
+
+    Not masked numeric columns are not copied (except if not in native
+    byte order). Masked integer and boolean columns become pandas
+    nullable arrays (sharing data and mask), masked floats get NaN.
+    '''
+    data = column.data
+    mask = getattr(data, 'mask', None)
+    data = np.asarray(data)
+    if not data.dtype.isnative:
+        data = data.astype(data.dtype.newbyteorder('='))
+    if mask is not None:
+        mask = np.asarray(mask, dtype=bool)
+        if not mask.any():
+            mask = None
+    if data.dtype.kind in 'SU':
+        if data.dtype.kind == 'S':
+            # bytes, as objects
+            data = data.astype(object)
+        if mask is None:
+            return data
+        data = data.astype(object)
+        data[mask] = None
+        return data
+    if mask is None:
+        return data
+    if data.dtype.kind in 'iu':
+        return pd.arrays.IntegerArray(data, mask)
+    if data.dtype.kind == 'b':
+        return pd.arrays.BooleanArray(data, mask)
+    if data.dtype.kind in 'fc':
+        data = data.copy()
+        data[mask] = np.nan
+        return data
+    data = data.astype(object)
+    data[mask] = None
+    return data
+
 
 def detect_multiD_columns(tab):
     cols = tab.colnames
@@ -1,56 +1,86 @@
 #-*- coding:utf-8 -*-
+import logging
 
 from astropy.io import fits
 
+from ..utils import is_number
+from ..utils.data import sample, is_slices
+
+from . import _fits_base
 from ._fits_base import FitsBase
 class Fits(FitsBase):
-    def __init__(self, *args, **kwargs):
-        super(Fits,self).__init__(args,kwargs)
-
-
-from ._fits_base import FitsHandlerBase
-class FitsHandler(FitsHandlerBase):
     '''
     '''
-    def read(self, columns=None, rows=None):
-        '''
-        '''
-        data,meta = __read_astropy(self._filename, ext=self._ext, metaonly=False,
-                                    columns=columns, rows=rows)
-        return Fits(data,meta)
+    def __init__(self, data, header, handler=None, meta=None, columns=None):
+        super(Fits,self).__init__(data, header, handler, meta)
+        self._colnames = columns
 
+    def _extract_meta(self,header,data):
+        from .metadata import Meta
+        return Meta(header,data)
 
-# ---
+    @property
+    def columns(self):
+        return self.meta.columns
 
-def __read_astropy(filename, columns=None, rows=None, metaonly=False, ext=1):
-    '''
-    '''
-    header = __read_astropy_meta(filename, ext=ext)
-    if metaonly:
-        return header
-    data = __read_astropy_data(filename, columns=columns, rows=rows)
-    return 	(data,header)
+    @property
+    def colnames(self):
+        if self._colnames is None:
+            return self.columns.index
+        return self._colnames
 
 
-def __read_astropy_meta(filename, ext=1):
-    '''
+from ._fits_base import FitsHandlerBase
+class FitsHandler(FitsHandlerBase):
     '''
-    table = __read_astropy_table(filename, ext=ext)
-    header = table.header
-    return header
+    Access FITS tables through a memory-mapped ~astropy.io.fits HDU
 
-def __read_astropy_data(filename, columns=None, rows=None, ext=1):
-    '''
+    Data is not copied when read: columns are views onto the mapped
+    file (except those astropy has to convert, like strings or scaled
+    columns). Processes reading the same file share the page cache.
     '''
-    table = __read_astropy_table(filename, ext=ext)
-    data = table.data
-    if rows:
-        data = data[rows]
-    return data
+    def _get_handler(self, ext, iterrows=False):
+        self._hdul = fits.open(self._filename, memmap=True, mode='readonly',
+                               ignore_missing_end=True)
+        return self._hdul[ext]
 
-def __read_astropy_table(filename, ext=1):
-    '''
-    '''
-    hdul = fits.open(filename, memmap=True, ignore_missing_end=True)
-    table = hdul[ext]
-    return table
+    def _get_header(self):
+        return self._handler.header
+
+    def __info(self):
+        self._hdul.info()
+    info = property(__info, doc="Meta/general information")
+
+    def __nrows(self):
+        return self._handler.header['NAXIS2']
+    nrows = property(__nrows, doc="Number of rows in table")
+
+    def read(self, columns=None, rows=None, ucds=None, match_ucds='any',
+             filter_rows=None, sampling='uniform', seed=None):
+        '''
+        Outputs a ~Fits object whose 'data' is the memory-mapped table
+
+        Selecting 'rows' (or filtering them) implies a copy of the
+        selected rows; columns selection does not copy data.
+        '''
+        if ucds:
+            ucdcols = self.colnames_by_ucd(ucds, match=match_ucds)
+            columns = list(columns) if columns else []
+            columns.extend(c for c in ucdcols if c not in columns)
+        data = self._handler.data
+        if is_number(rows):
+            logging.debug("Argument 'rows' is a number.")
+            rows = sample(self.nrows,fraction=rows,method=sampling,seed=seed)
+        if is_slices(rows):
+            import numpy as np
+            data = np.concatenate([ data[s] for s in rows ]) if rows else data[:0]
+        elif rows is not None:
+            rows.sort()
+            data = data[rows]
+        header = self._get_header()
+        if filter_rows:
+            from .predicates import from_filter, with_nulls
+            predicate = from_filter(filter_rows)
+            nulls = _fits_base.null_values(header, predicate.columns)
+            data = data[predicate.mask(with_nulls(data, nulls))]
+        return Fits(data, header, self, columns=columns)
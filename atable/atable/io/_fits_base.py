@@ -4,6 +4,8 @@ import logging
 class FitsHandlerBase(object):
     '''
     '''
+    _ucd_matrix = None
+
     def __init__(self, filename, ext=1, iterrows=False):
         from .metadata import Meta
         self._filename = filename
@@ -54,21 +56,14 @@ class FitsHandlerBase(object):
                 Columns UCD should match 'all', or just 'any' one given?
         Output:
          - colnames : list of column names
+
+        Matching is done over a ~booq.ucd.UCDMatrix, built at first call.
         '''
-        ucd = ucds
-        logging.info("Match '{}' of UCDs '{}'".format(match,ucd))
-        if isinstance(ucd,str):
-            ucd = [ucd]
-        if match == 'any':
-            indx = len(self.ucds) * [False]
-            for u in ucd:
-                logging.debug("UCD being matched: '{!s}'".format(u))
-                u = [u]
-                indx |= self.ucds.apply(lambda x:x.isin(u))
-        else:
-            assert match == 'all', "Options for 'match' are ['all','any']"
-            indx = self.ucds.apply(lambda x:x.isin(ucd))
-        colnames = indx[indx].index.values.tolist()
+        logging.info("Match '{}' of UCDs '{}'".format(match,ucds))
+        if self._ucd_matrix is None:
+            from ..ucd import UCDMatrix
+            self._ucd_matrix = UCDMatrix(self.ucds.values, self.ucds.index)
+        colnames = self._ucd_matrix.colnames(ucds, match)
         logging.debug("Columns got from UCDs: {}".format(colnames))
         return colnames
 
@@ -82,10 +77,12 @@ class FitsHandlerBase(object):
 class FitsBase(object):
     '''
     '''
-    def __init__(self, data, header, handler=None):
+    def __init__(self, data, header, handler=None, meta=None):
         self._data = data
         self._header = header
-        self._meta = self._extract_meta(self._header,self._data)
+        if meta is None:
+            meta = self._extract_meta(self._header,self._data)
+        self._meta = meta
 
     def __len__(self):
         return len(self._data)
@@ -107,3 +104,23 @@ class FitsBase(object):
         return self._meta
     meta = property(__get_meta, doc="Returns FITS metadata")
 
+
+
+def null_values(header, columns=None):
+    '''
+    Return {column : TNULL value} of (integer) 'columns' in FITS table 'header'
+
+    Input:
+     - header : FITS header (~astropy.io.fits.Header or ~fitsio.FITSHDR)
+     - columns : list of strings
+            Columns of interest; all if None
+    '''
+    nulls = {}
+    for i in range(1, int(header.get('TFIELDS', 0))+1):
+        name = str(header.get('TTYPE{:d}'.format(i), '')).strip()
+        if columns is not None and name not in columns:
+            continue
+        null = header.get('TNULL{:d}'.format(i), None)
+        if null is not None:
+            nulls[name] = null
+    return nulls
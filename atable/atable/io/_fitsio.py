@@ -6,9 +6,12 @@ import fitsio
 from . import _fits_base
 
 from ..utils import is_number
-from ..utils.data import sample
+from ..utils.data import sample, is_slices
 #from booq.io import recarray
 
+# Number of rows read at once when scanning a table
+_CHUNK_ROWS = 100000
+
 FitsBase = _fits_base.FitsBase
 class Fits(FitsBase):
     '''
@@ -33,6 +36,8 @@ FitsHandlerBase = _fits_base.FitsHandlerBase
 class FitsHandler(FitsHandlerBase):
     '''
     '''
+    _projection = None
+
     def _get_handler(self,ext,iterrows=False):
         if iterrows:
             iterrows = max(100000,int(iterrows))
@@ -54,25 +59,61 @@ class FitsHandler(FitsHandlerBase):
     nrows = property(__nrows, doc="Number of rows in table")
 
     def read(self, columns=None, rows=None, ucds=None, match_ucds='any',
-             filter_rows=None):
+             filter_rows=None, sampling='uniform', seed=None):
         '''
+        If 'rows' is a number, rows are sampled following 'sampling'
+        method ('uniform', 'bernoulli' or 'block'; see ~utils.data.sample);
+        'block' sampling reads contiguous ranges of rows.
         '''
         if is_number(rows):
             logging.debug("Argument 'rows' is a number.")
-            rows = sample(self.nrows,fraction=rows)
+            rows = sample(self.nrows,fraction=rows,method=sampling,seed=seed)
+        columns = self._select_columns(columns, ucds, match_ucds)
+        logging.debug("'columns' to be read: {!s}".format(columns))
+        self._projection = Projection(self._handler, columns, filter_rows)
+        data,meta = read_from_handler(self._handler, rows=rows, filter_rows=filter_rows,
+                                      projection=self._projection)
+        return Fits(data,meta,self)
+
+    def __projection(self):
+        return self._projection
+    projection = property(__projection, doc="Columns/bytes read by last 'read'")
+
+    def iter_read(self, columns=None, ucds=None, match_ucds='any',
+                  chunk_rows=_CHUNK_ROWS):
+        '''
+        Yield ~Fits objects with (at most) 'chunk_rows' rows each
+
+        Columns metadata is extracted from the first chunk and shared
+        by all the following ones.
+        '''
+        columns = self._select_columns(columns, ucds, match_ucds)
+        logging.debug("'columns' to be read: {!s}".format(columns))
+        if columns is None:
+            columns = self._handler.get_colnames()
+        header = self._handler.read_header()
+        nrows = self.nrows
+        meta = None
+        for start in range(0, nrows, chunk_rows):
+            stop = min(start+chunk_rows, nrows)
+            logging.debug("Reading rows [{:d}:{:d}]".format(start,stop))
+            data = self._handler[columns][start:stop]
+            fts = Fits(data, header, self, meta=meta)
+            meta = fts.meta
+            yield fts
+
+    def _select_columns(self, columns=None, ucds=None, match_ucds='any'):
+        '''
+        Return the list of columns to read from 'columns' and 'ucds'
+        '''
         if ucds:
             logging.info("using 'ucds' to define 'columns' to read.")
             logging.debug("'ucds' requested: {!s}".format(ucds))
             ucdcols = self.colnames_by_ucd(ucds, match=match_ucds)
             if ucdcols:
-                if not columns:
-                    columns = []
-                columns.extend(ucdcols)
-                #REVIEW: order of columns after 'set' is not guarantee
-                columns = list(set(columns))
-        logging.debug("'columns' to be read: {!s}".format(columns))
-        data,meta = read_from_handler(self._handler, columns=columns, rows=rows, filter_rows=filter_rows)
-        return Fits(data,meta,self)
+                columns = list(columns) if columns else []
+                columns.extend(c for c in ucdcols if c not in columns)
+        return columns
 
 # ---
 
@@ -95,7 +136,7 @@ def get_handler(filename, ext=1):
     return handler
 
 def read_from_handler(handler, columns=None, rows=None, metaonly=False,
-                      filter_rows=None):
+                      filter_rows=None, projection=None):
     '''
     '''
     import numpy as np
@@ -104,47 +145,159 @@ def read_from_handler(handler, columns=None, rows=None, metaonly=False,
         header = handler.read_header()
         return header
 
-    def read_data_from_handler(handler, columns=None, rows=None, filter_rows=None):
-        if rows is not None:
-            rows.sort()
-        if filter_rows is None:
-            data = handler.read(columns=columns, rows=rows, header=False)
+    def read_data_from_handler(handler, projection, rows=None, filter_rows=None):
+        if filter_rows is None and not is_slices(rows):
+            if rows is not None:
+                rows.sort()
+            data = handler.read(columns=projection.read, rows=rows, header=False)
+            projection.account(len(data))
         else:
-            # take the first as array template
-            data = handler.read(rows=[0], header=False)
-            datacols = data.dtype.names
-
-            # rows have no column names, so we have to transform names into index
-            def define_function(filter_rows,datacols):
-                assert all(k in datacols for k in filter_rows.keys()), \
-                        'Not all given columns exist in FITS being read'
-                filter_inds = { datacols.index(col):foo for col,foo in filter_rows.items() }
-                def select_function(row,filter_inds=filter_inds):
-                    mask = [ filter_inds[i](row[i]) for i in filter_inds.keys() ]
-                    return all(mask)
-                return select_function
-            select_function = define_function(filter_rows,datacols)
-
-            for i,row in enumerate(handler):
-                sel = select_function(row)
-                if sel:
-                    data = np.append(data, row)
-            # remove the first line, used only as template
-            data = np.delete(data,0,0)
-            # keep only 'columns'
-            if columns is not None:
-                colindxs = [ datacols.index(c) for c in columns ]
-                data = np.delete(data,colindxs,1)
+            data = read_filtered_from_handler(handler, filter_rows, projection,
+                                              rows=rows)
         return data
     # -----------------------------------------------------------------
 
     header = read_meta_from_handler(handler)
     if metaonly:
         return header
-    data = read_data_from_handler(handler, columns=columns, rows=rows,
+    if projection is None:
+        projection = Projection(handler, columns, filter_rows)
+    data = read_data_from_handler(handler, projection, rows=rows,
                                         filter_rows=filter_rows)
+    logging.info("Projection: {!s}".format(projection))
     return 	(data,header)
 
+def read_data(filename, columns=None, filter_rows=None):
+    '''
+    Return the data array of 'columns' (and rows selected by 'filter_rows') from 'filename'
+    '''
+    handler = get_handler(filename)
+    data,_ = read_from_handler(handler, columns=columns, filter_rows=filter_rows)
+    return data
+
+def read_filtered_from_handler(handler, filter_rows, projection, rows=None,
+                               chunk_rows=_CHUNK_ROWS):
+    '''
+    Read the rows of 'handler' selected by 'filter_rows'
+
+    The table is scanned in chunks of 'chunk_rows' rows, reading only
+    the columns planned by 'projection' (output and filter columns);
+    the selection is evaluated as a boolean mask over each chunk (TNULL
+    values as nulls, see ~predicates) and only the selected rows are
+    kept. Filter-only columns are dropped at the end. If 'filter_rows'
+    is None, all rows scanned are kept.
+
+    Input:
+     - handler : ~fitsio.TableHDU
+     - filter_rows : ~predicates.Predicate or {column : select-function}
+     - projection : ~Projection
+            Columns to read and to output
+     - rows : list of integers or list of 'slice's
+            Restrict the selection to these rows
+     - chunk_rows : integer
+            Number of rows evaluated at once
+    Output:
+     - ~numpy.recarray with selected rows
+    '''
+    import numpy as np
+    from .predicates import from_filter, with_nulls
+
+    predicate = from_filter(filter_rows)
+    logging.debug("Columns used for filtering: {!s}".format(projection.filter))
+    nulls = _fits_base.null_values(handler.read_header(), projection.filter)
+
+    selected = []
+    for chunk in iter_chunks_from_handler(handler, projection.read, rows=rows,
+                                          chunk_rows=chunk_rows):
+        projection.account(len(chunk))
+        if predicate is not None:
+            chunk = chunk[predicate.mask(with_nulls(chunk, nulls))]
+        selected.append(chunk)
+    if not selected:
+        selected = [handler.read(columns=projection.read, rows=[0], header=False)[:0]]
+    data = np.concatenate(selected)
+    logging.debug("Rows selected by filter: {:d}".format(len(data)))
+
+    if projection.drop:
+        from numpy.lib.recfunctions import repack_fields
+        data = repack_fields(data[projection.output])
+    return data
+
+def iter_chunks_from_handler(handler, columns, rows=None, chunk_rows=_CHUNK_ROWS):
+    '''
+    Yield blocks of (at most) 'chunk_rows' rows of 'columns'
+
+    Input:
+     - handler : ~fitsio.TableHDU
+     - columns : list of strings
+     - rows : None, list of integers or list of 'slice's
+            If None, all rows; if 'slice's, each one is a contiguous
+            range of rows read as such
+     - chunk_rows : integer
+    '''
+    import numpy as np
+    if rows is None:
+        rows = [slice(0, handler.get_nrows())]
+    if is_slices(rows):
+        for _slice in rows:
+            start, stop, _ = _slice.indices(handler.get_nrows())
+            for _start in range(start, stop, chunk_rows):
+                _stop = min(_start+chunk_rows, stop)
+                yield handler[columns][_start:_stop]
+    else:
+        rows = np.sort(np.asarray(rows, dtype=int))
+        for start in range(0, len(rows), chunk_rows):
+            _rows = rows[start:start+chunk_rows]
+            yield handler.read(columns=columns, rows=_rows, header=False)
+
+
+class Projection(object):
+    '''
+    Plan of the columns to read from a table
+
+    Columns read are the union of the output 'columns' and the columns
+    'filter_rows' depends on; the latter, when not in the output, are
+    dropped after the rows are masked. Columns keep the table order.
+
+    Bytes read are accounted (see 'account') against the size of the
+    full table, to verify the I/O savings.
+    '''
+    def __init__(self, handler, columns=None, filter_rows=None):
+        from .predicates import from_filter
+        colnames = handler.get_colnames()
+        output = colnames if columns is None else columns
+        missing = [ c for c in output if c not in colnames ]
+        assert not missing, "Columns {} not in FITS being read".format(missing)
+
+        predicate = from_filter(filter_rows)
+        filtercols = predicate.columns if predicate is not None else set()
+        missing = [ c for c in filtercols if c not in colnames ]
+        assert not missing, \
+                "Filter columns {} not in FITS being read".format(missing)
+
+        self.output = [ c for c in colnames if c in output ]
+        self.filter = [ c for c in colnames if c in filtercols ]
+        self.read = [ c for c in colnames if c in output or c in filtercols ]
+        self.drop = [ c for c in self.read if c not in output ]
+
+        dtype = handler.get_rec_dtype()[0]
+        self.row_bytes = sum(dtype[c].itemsize for c in self.read)
+        self.table_bytes = dtype.itemsize * handler.get_nrows()
+        self.bytes_read = 0
+
+    def __str__(self):
+        fmt = ("read {read!s} (dropping {drop!s}): "
+               "{bytes_read:d} of {table_bytes:d} bytes")
+        return fmt.format(read=self.read, drop=self.drop,
+                          bytes_read=self.bytes_read,
+                          table_bytes=self.table_bytes)
+
+    def account(self, nrows):
+        '''
+        Add the bytes of 'nrows' rows (of the columns read) to the count
+        '''
+        self.bytes_read += nrows * self.row_bytes
+
 # ---
 
 
@@ -39,6 +39,8 @@ class HandlerBase(object):
 class IpacHandlerBase(HandlerBase):
     '''
     '''
+    _ucd_matrix = None
+
     def __init__(self, filename):
         from ._meta_ipac import Meta
 
@@ -91,42 +93,26 @@ class IpacHandlerBase(HandlerBase):
                 Columns UCD should match 'all', or just 'any' one given?
         Output:
          - colnames : list of column names
+
+        Matching is done over a ~booq.ucd.UCDMatrix, built at first call.
         '''
-        ucd = ucds
-        logging.info("Match '{}' of UCDs '{}'".format(match,ucd))
-        if isinstance(ucd,str):
-            ucd = [ucd]
-        if match == 'any':
-            indx = len(self.ucds) * [False]
-            for u in ucd:
-                logging.debug("UCD being matched: '{!s}'".format(u))
-                u = [u]
-                indx |= self.ucds.apply(lambda x:x.isin(u))
-        else:
-            assert match == 'all', "Options for 'match' are ['all','any']"
-            indx = self.ucds.apply(lambda x:x.isin(ucd))
-        colnames = indx[indx].index.values.tolist()
+        logging.info("Match '{}' of UCDs '{}'".format(match,ucds))
+        if self._ucd_matrix is None:
+            from ..ucd import UCDMatrix
+            self._ucd_matrix = UCDMatrix(self.ucds.values, self.ucds.index)
+        colnames = self._ucd_matrix.colnames(ucds, match)
         logging.debug("Columns got from UCDs: {}".format(colnames))
         return colnames
 
 def count_data_rows(filename):
     '''
-    '''
-    fp = open(filename,'r')
+    Return the number of data rows in (IPAC) 'filename'
 
-    i = 0
-    for line in fp.readlines():
-        if not (line[0] == '\\' or line[0] == '|'):
-            break
-        i+=1
-    counter_lines_header = i
-
-    fp.seek(0)
-    for i, line in enumerate(fp,1):
-        pass
-    counter_lines_data = i - counter_lines_header
-
-    fp.close()
+    The count comes from the file's rows index (~index.get_index), which
+    is built -- one scan of the file -- only the first time.
+    '''
+    from .index import get_index
+    index = get_index(filename, format='ipac')
     logging.debug("Total number of lines on (IPAC) file '{}':{:d}".
-                format(filename,counter_lines_header+counter_lines_data))
-    return counter_lines_data
+                format(filename,index.header_lines+index.nrows))
+    return index.nrows
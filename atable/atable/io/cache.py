@@ -0,0 +1,233 @@
+# -*- coding:utf-8 -*-
+'''
+On-disk cache of parsed tables
+
+Each entry is a directory under 'cache_dir' with one '.npy' file per
+column (plus one for the mask of masked columns) and the table and
+columns metadata ('manifest.json'): units, descriptions and columns'
+meta are stored as they are, the ~AMetaTable of a warm read is built
+from the cached columns exactly as from the source file. Entries are
+keyed by the source file path, size and modification time, and by
+the reading options (columns, rows, ...); a change in the source file
+gives a new key, old entries are evicted eventually.
+
+Column files are opened memory-mapped (copy-on-write), so a warm read
+costs little more than opening the files.
+
+The cache is bounded by 'max_bytes': least recently used entries are
+removed when a new entry makes the cache go over the limit.
+'''
+import logging
+
+import os
+import json
+import shutil
+import hashlib
+
+import numpy as np
+
+# Default cache size limit: 10GB
+_CACHE_SIZE = 10 * 2**30
+
+_MANIFEST = 'manifest.json'
+
+
+class Cache(object):
+    '''
+    Binary, columnar cache of tables in 'cache_dir'
+
+    Input:
+     - cache_dir : string
+            Directory where entries are stored (created if necessary)
+     - max_bytes : integer
+            Size limit of the cache
+    '''
+    def __init__(self, cache_dir, max_bytes=None):
+        self._cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+        self._max_bytes = _CACHE_SIZE if max_bytes is None else int(max_bytes)
+        if not os.path.isdir(self._cache_dir):
+            os.makedirs(self._cache_dir)
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes
+
+    def key(self, filename, **options):
+        '''
+        Return the key for 'filename' read with 'options', None if not cacheable
+
+        Reads are not cacheable if they are not reproducible -- a random
+        sample of rows without a 'seed' -- or if some option can not be
+        identified by its value, like a row-filtering function.
+        '''
+        if not is_cacheable(options):
+            return None
+        filename = os.path.abspath(filename)
+        stat = os.stat(filename)
+        ident = [ filename, stat.st_size, stat.st_mtime_ns ]
+        ident.extend( '{}={}'.format(k, _identify(options[k])) for k in sorted(options) )
+        return hashlib.sha1(json.dumps(ident).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self._cache_dir, key)
+
+    def __contains__(self, key):
+        return os.path.isfile(os.path.join(self._path(key), _MANIFEST))
+
+    def get(self, key):
+        '''
+        Return cached entry 'key' (None if not in cache)
+
+        Output is a dictionary with 'columns' (list of dictionaries with
+        'name','data','mask','unit','description','meta') and the table 'meta'.
+        '''
+        if key is None or key not in self:
+            return None
+        path = self._path(key)
+        with open(os.path.join(path, _MANIFEST), 'r') as fp:
+            manifest = json.load(fp)
+        columns = []
+        for col in manifest['columns']:
+            col = dict(col)
+            col['data'] = np.load(os.path.join(path, col.pop('file')), mmap_mode='c')
+            mask = col.pop('mask_file', None)
+            col['mask'] = np.load(os.path.join(path, mask)) if mask else None
+            columns.append(col)
+        # entries' modification time is used as last-access time
+        os.utime(path, None)
+        logging.debug("Cache hit: {}".format(path))
+        return { 'columns':columns,
+                 'meta':manifest['meta'] }
+
+    def put(self, key, table):
+        '''
+        Store ~astropy.table.Table 'table' as entry 'key'
+
+        Tables with object columns are not stored (they can not be
+        memory-mapped). Returns True if the entry was stored.
+        '''
+        if key is None:
+            return False
+        for name in table.colnames:
+            if table[name].dtype.kind == 'O':
+                logging.debug("Column '{}' is of type object, not caching.".format(name))
+                return False
+
+        path = self._path(key)
+        tmp = '{}.tmp-{:d}'.format(path, os.getpid())
+        os.makedirs(tmp)
+        try:
+            columns = []
+            for i,name in enumerate(table.colnames):
+                column = table[name]
+                col = { 'name':name,
+                        'file':'{:d}.npy'.format(i),
+                        'unit':None if column.unit is None else column.unit.to_string(),
+                        'description':column.description,
+                        'meta':_as_json(column.meta) }
+                np.save(os.path.join(tmp, col['file']), np.asarray(column))
+                mask = getattr(column, 'mask', None)
+                if mask is not None and np.any(mask):
+                    col['mask_file'] = '{:d}.mask.npy'.format(i)
+                    np.save(os.path.join(tmp, col['mask_file']), np.asarray(mask))
+                columns.append(col)
+            manifest = { 'columns':columns, 'meta':_as_json(table.meta) }
+            with open(os.path.join(tmp, _MANIFEST), 'w') as fp:
+                json.dump(manifest, fp)
+            os.rename(tmp, path)
+        except OSError:
+            # somebody else stored the same entry meanwhile
+            shutil.rmtree(tmp, ignore_errors=True)
+            return key in self
+        except:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        logging.debug("Cache entry stored: {}".format(path))
+        self.evict()
+        return True
+
+    def entries(self):
+        '''
+        Return list of (key, size, last-access time) of entries, oldest first
+        '''
+        entries = []
+        for entry in os.scandir(self._cache_dir):
+            if not entry.is_dir() or '.tmp-' in entry.name:
+                continue
+            size = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+            entries.append((entry.name, size, entry.stat().st_mtime))
+        entries.sort(key=lambda e: e[2])
+        return entries
+
+    def size(self):
+        '''
+        Return the total size (bytes) of the cache
+        '''
+        return sum(e[1] for e in self.entries())
+
+    def evict(self, max_bytes=None):
+        '''
+        Remove least recently used entries until cache size <= 'max_bytes'
+        '''
+        max_bytes = self._max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(e[1] for e in entries)
+        for key,size,_ in entries:
+            if total <= max_bytes:
+                break
+            logging.debug("Evicting cache entry {} ({:d} bytes)".format(key, size))
+            shutil.rmtree(self._path(key), ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        '''
+        Remove all entries
+        '''
+        self.evict(max_bytes=0)
+
+
+def is_cacheable(options):
+    '''
+    Return True if reading 'options' identify the read data
+    '''
+    if options.get('filter_rows'):
+        return False
+    rows = options.get('rows')
+    if rows is not None and np.isscalar(rows) and options.get('seed') is None:
+        return False
+    for value in options.values():
+        if callable(value):
+            return False
+    return True
+
+
+def _identify(value):
+    '''
+    Return a string identifying (option) 'value'
+
+    Sequences are identified by their content's hash, 'repr' of
+    large arrays is abbreviated.
+    '''
+    if isinstance(value, (list, tuple, np.ndarray)) and not \
+            all(isinstance(v, str) for v in value):
+        arr = np.asarray(value)
+        return '{}:{}'.format(arr.dtype.str, hashlib.sha1(arr.tobytes()).hexdigest())
+    return repr(value)
+
+
+def _as_json(meta):
+    '''
+    Return (a copy of) dictionary 'meta' with values JSON can handle
+
+    Numpy scalars become their Python equivalent, other values
+    unknown to JSON their string.
+    '''
+    def _default(value):
+        if isinstance(value, np.generic):
+            return value.item()
+        return str(value)
+    return json.loads(json.dumps(dict(meta or {}), default=_default))
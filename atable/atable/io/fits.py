@@ -11,7 +11,7 @@ __FITSLIB = 'fitsio'
 #     __FITSLIB = 'astropy'
 
 
-def open(filename, iterrows=False, lib='fitsio'):
+def open(filename, iterrows=False, lib='fitsio', memmap=False):
     '''
     Input:
      - filename : str
@@ -20,14 +20,153 @@ def open(filename, iterrows=False, lib='fitsio'):
             FITS extension
      - lib : string, options are ['fitsio','astropy']
             Force the use of specified 'lib'
+     - memmap : bool
+            If True, memory-map the file (through 'astropy');
+            data read are views onto the file, not copies
 
     Output:
      - ~FitsHandler to access metadata and eventually load data
     '''
+    if memmap:
+        lib = 'astropy'
     if __FITSLIB == 'fitsio' and lib == 'fitsio':
         logging.debug("FitsIO being used.")
         handler = _fitsio.FitsHandler(filename,iterrows=iterrows)
     else:
         logging.debug("Astropy being used.")
+        from . import _astropy
         handler = _astropy.FitsHandler(filename)
     return handler
+
+
+def read_many(filenames, columns=None, ucds=None, filter_rows=None, workers=None):
+    '''
+    Read (and concatenate) the same columns from many FITS files
+
+    Files are read in a local process pool (see ~utils.parallel.pool_map).
+    Columns metadata (unit, UCD and data type) must agree among files.
+    Output is allocated once, with the total number of rows and the
+    columns in 'columns' order, and filled with each file's data (column
+    by column name) as it is ready.
+
+    Input:
+     - filenames : list of strings
+     - columns : list of strings
+     - ucds : list of strings
+     - filter_rows : {column : select-function} or ~predicates.Predicate
+            When run in parallel, it has to be picklable (e.g, built from
+            ~predicates.col or module-level functions), otherwise files
+            are read serially
+     - workers : integer
+            Number of processes; default is the number of CPUs
+    Output:
+     - ~Fits object with the concatenated data
+    '''
+    import pickle
+    import numpy as np
+    from ..utils import parallel
+
+    assert len(filenames), "No file given"
+    if filter_rows:
+        filenames = _plan_files(filenames, filter_rows)
+    handler = open(filenames[0])
+    columns = handler._select_columns(columns, ucds)
+    if columns is None:
+        columns = list(handler.colnames)
+    header = handler._get_header()
+    reference, widths = _columns_signature(handler, columns)
+
+    nrows = [handler.nrows]
+    for filename in filenames[1:]:
+        _hand = open(filename)
+        signature, _widths = _columns_signature(_hand, columns)
+        assert signature == reference, \
+            "Columns metadata of '{}' do not match '{}': {!s} != {!s}".format(
+                filename, filenames[0], signature, reference)
+        widths = { c:max(w, _widths[c]) for c,w in widths.items() }
+        nrows.append(_hand.nrows)
+        del _hand
+    del handler
+
+    if workers != 1 and filter_rows:
+        try:
+            pickle.dumps(filter_rows)
+        except Exception:
+            logging.warning("'filter_rows' can not be sent to other processes, "
+                            "reading files serially.")
+            workers = 1
+
+    args = [ (f, columns, filter_rows) for f in filenames ]
+    results = parallel.pool_map(_fitsio.read_data, args, workers=workers)
+
+    if filter_rows:
+        # number of rows is only known after filtering
+        parts = [None] * len(filenames)
+        for i,data in results:
+            parts[i] = data
+        nrows = [ len(p) for p in parts ]
+        results = enumerate(parts)
+
+    offsets = np.concatenate([[0], np.cumsum(nrows)]).astype(int)
+    out = None
+    for i,data in results:
+        if out is None:
+            # fields in 'columns' order, whatever the order in each file
+            dtype = np.dtype([ (c, data.dtype[c]) for c in columns ])
+            out = np.empty(offsets[-1], dtype=_widen_strings(dtype, widths))
+        part = out[offsets[i]:offsets[i+1]]
+        for c in columns:
+            part[c] = data[c]
+        logging.debug("File '{}' ({:d} rows) in place".format(filenames[i], len(data)))
+    return _fitsio.Fits(out, header)
+
+
+def _plan_files(filenames, filter_rows):
+    '''
+    Return 'filenames' that may have rows satisfying 'filter_rows'
+
+    Files whose columns sketches (see ~sketches) rule the selection out
+    are not read; at least one file is kept, for the output columns.
+    Sketches are used only if they match the file's table (number of
+    rows and DATASUM, see ~sketches.read).
+    '''
+    from . import sketches
+    keep = [ f for f in filenames if sketches.may_match(filter_rows, sketches.read(f)) ]
+    if len(keep) < len(filenames):
+        logging.info("{:d} of {:d} files skipped by their sketches".format(
+                        len(filenames)-len(keep), len(filenames)))
+    return keep or list(filenames[:1])
+
+def _columns_signature(handler, columns):
+    '''
+    Return (column, unit, ucd, type-code) for each of 'columns' and string widths
+
+    Type-code is the FITS TFORM without the repeat count, since string
+    widths (e.g, '10A') may change among files.
+    '''
+    import re
+    meta = handler.columns
+    missing = [ c for c in columns if c not in meta.index ]
+    assert not missing, "Columns {} not in FITS '{}'".format(missing, handler._filename)
+    sign = []
+    widths = {}
+    for c in columns:
+        tform = str(meta.loc[c,'dtype']).strip()
+        repeat = re.match('^[0-9]*', tform).group()
+        form = tform[len(repeat):]
+        widths[c] = int(repeat) if repeat and form.startswith('A') else 0
+        sign.append((c, str(meta.loc[c,'unit']), str(meta.loc[c,'ucd']), form))
+    return sign, widths
+
+def _widen_strings(dtype, widths):
+    '''
+    Return 'dtype' with string fields as wide as given in 'widths'
+    '''
+    import numpy as np
+    fields = []
+    for name in dtype.names:
+        _dt = dtype[name]
+        if _dt.kind in 'SU' and widths.get(name, 0) > _dt.itemsize // (4 if _dt.kind == 'U' else 1):
+            _dt = np.dtype((_dt.kind, widths[name]))
+        fields.append((name, _dt))
+    return np.dtype(fields)
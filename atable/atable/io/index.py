@@ -0,0 +1,301 @@
+# -*- coding:utf-8 -*-
+'''
+Row index of (line-oriented) text tables, like IPAC and CSV
+
+The index holds the header length -- lines and bytes --, the number of
+data rows and the byte offset of every 'step'-th data row. It is built
+with one pass over the file and saved side by side with it ('<filename>.idx'),
+later uses just load it; the index is rebuilt if the file changes
+(size or modification time).
+
+With the index, the number of rows is known without reading the file
+and any range of rows is read by seeking to the closest indexed row.
+Empty lines are not counted as rows.
+'''
+import logging
+
+import os
+
+import numpy as np
+
+# Distance (in rows) between indexed offsets
+_INDEX_STEP = 10000
+
+# Size of the blocks read while building the index
+_BLOCK_BYTES = 2**26
+
+_INDEX_EXT = '.idx'
+
+
+class RowIndex(object):
+    '''
+    Sparse byte-offset index of the data rows of a text table
+
+    Input:
+     - filename : string
+     - header_lines : integer
+            Number of lines before data
+     - data_offset : integer
+            Byte offset of the first data line
+     - nrows : integer
+            Number of data rows
+     - offsets : array of integers
+            Byte offset of rows 0, step, 2*step, ...
+     - step : integer
+    '''
+    def __init__(self, filename, header_lines, data_offset, nrows, offsets,
+                 step=_INDEX_STEP, size=None, mtime=None):
+        self._filename = filename
+        self.header_lines = int(header_lines)
+        self.data_offset = int(data_offset)
+        self.nrows = int(nrows)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.step = int(step)
+        if size is None or mtime is None:
+            size,mtime = _file_stamp(filename)
+        self._stamp = (int(size), int(mtime))
+
+    def __repr__(self):
+        return ("RowIndex('{}', header_lines={:d}, data_offset={:d}, nrows={:d}, "
+                "step={:d})".format(self._filename, self.header_lines,
+                                    self.data_offset, self.nrows, self.step))
+
+    def __len__(self):
+        return self.nrows
+
+    @property
+    def filename(self):
+        return self._filename
+
+    def is_valid(self):
+        '''
+        Return True if file did not change since the index was built
+        '''
+        try:
+            return _file_stamp(self._filename) == self._stamp
+        except OSError:
+            return False
+
+    def seek(self, fp, row):
+        '''
+        Position (binary) file object 'fp' at the beginning of data 'row'
+        '''
+        assert 0 <= row <= self.nrows, "Row {} out of range".format(row)
+        if row == self.nrows:
+            fp.seek(0, os.SEEK_END)
+            return
+        block = row // self.step
+        fp.seek(self.offsets[block])
+        skip = row - block * self.step
+        while skip:
+            line = fp.readline()
+            if not line:
+                break
+            if line.rstrip(b'\r\n'):
+                skip -= 1
+
+    def read_lines(self, start=0, stop=None, fp=None):
+        '''
+        Return data lines [start:stop] (bytes, without end-of-line)
+        '''
+        stop = self.nrows if stop is None else min(stop, self.nrows)
+        if start >= stop:
+            return []
+        if fp is None:
+            with open(self._filename, 'rb') as fp:
+                return self.read_lines(start, stop, fp)
+        self.seek(fp, start)
+        lines = []
+        nlines = stop - start
+        for line in fp:
+            line = line.rstrip(b'\r\n')
+            if not line:
+                continue
+            lines.append(line)
+            if len(lines) == nlines:
+                break
+        return lines
+
+    def read_rows(self, rows, fp=None):
+        '''
+        Return data lines of (sorted) 'rows' (bytes, without end-of-line)
+
+        Rows in the same indexed block are read with one seek.
+        '''
+        rows = np.asarray(rows, dtype=np.int64)
+        if fp is None:
+            with open(self._filename, 'rb') as fp:
+                return self.read_rows(rows, fp)
+        blocks = rows // self.step
+        groups = np.split(rows, np.flatnonzero(np.diff(blocks)) + 1)
+        lines = []
+        for group in groups:
+            if not len(group):
+                continue
+            start = group[0]
+            block_lines = self.read_lines(start, group[-1]+1, fp)
+            lines.extend( block_lines[i] for i in group - start )
+        return lines
+
+    def save(self, filename=None):
+        '''
+        Write index to 'filename' (default, '<table-filename>.idx')
+        '''
+        filename = filename or index_filename(self._filename)
+        with open(filename, 'wb') as fp:
+            np.savez(fp, header_lines=self.header_lines,
+                     data_offset=self.data_offset, nrows=self.nrows,
+                     offsets=self.offsets, step=self.step,
+                     size=self._stamp[0], mtime=self._stamp[1])
+        logging.debug("Index written to '{}'".format(filename))
+
+    @classmethod
+    def load(cls, filename, index=None):
+        '''
+        Read index of 'filename' from 'index' (default, '<filename>.idx')
+        '''
+        index = index or index_filename(filename)
+        with np.load(index) as npz:
+            return cls(filename, header_lines=npz['header_lines'],
+                       data_offset=npz['data_offset'], nrows=npz['nrows'],
+                       offsets=npz['offsets'], step=npz['step'],
+                       size=npz['size'], mtime=npz['mtime'])
+
+    @classmethod
+    def build(cls, filename, format='ipac', step=_INDEX_STEP, **kwargs):
+        '''
+        Scan 'filename' to build its index
+
+        Input:
+         - format : string
+                'ipac' or 'csv'; defines how the header is recognized
+         - step : integer
+                Distance (in rows) between indexed offsets
+         - kwargs
+                'comment' (default '#') and 'header_lines' (default 1, the
+                column names line) for 'csv'
+        '''
+        size,mtime = _file_stamp(filename)
+        with open(filename, 'rb') as fp:
+            header_lines = _HEADERS[format](fp, **kwargs)
+            data_offset = fp.tell()
+            nrows,offsets = _scan_rows(fp, data_offset, step)
+        logging.debug("Index of '{}': {:d} header lines, {:d} rows".
+                      format(filename, header_lines, nrows))
+        return cls(filename, header_lines, data_offset, nrows, offsets,
+                   step=step, size=size, mtime=mtime)
+
+
+def get_index(filename, format='ipac', step=_INDEX_STEP, save=True, **kwargs):
+    '''
+    Return the (sidecar) index of 'filename'; build (and save) it if necessary
+
+    If the sidecar file can not be written the index is used anyway.
+    '''
+    index = None
+    sidecar = index_filename(filename)
+    if os.path.isfile(sidecar):
+        try:
+            index = RowIndex.load(filename, sidecar)
+        except Exception as e:
+            logging.warning("Not able to read index '{}': {}".format(sidecar, e))
+        else:
+            if not index.is_valid():
+                logging.debug("Index '{}' is outdated.".format(sidecar))
+                index = None
+    if index is None:
+        index = RowIndex.build(filename, format=format, step=step, **kwargs)
+        if save:
+            try:
+                index.save(sidecar)
+            except OSError as e:
+                logging.warning("Not able to write index '{}': {}".format(sidecar, e))
+    return index
+
+
+def nrows(filename, format='ipac', **kwargs):
+    '''
+    Return the number of data rows in 'filename' (from its index)
+    '''
+    return get_index(filename, format=format, **kwargs).nrows
+
+
+def index_filename(filename):
+    return filename + _INDEX_EXT
+
+
+def _file_stamp(filename):
+    stat = os.stat(filename)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _ipac_header(fp):
+    from .ipac import read_header
+    keywords, comments, metacols = read_header(fp)
+    return len(keywords) + len(comments) + len(metacols)
+
+
+def _csv_header(fp, comment='#', header_lines=1):
+    comment = comment.encode()
+    nlines = 0
+    while True:
+        pos = fp.tell()
+        line = fp.readline()
+        if not line:
+            break
+        if line.startswith(comment) or not line.strip():
+            nlines += 1
+            continue
+        fp.seek(pos)
+        break
+    for _ in range(header_lines):
+        if fp.readline():
+            nlines += 1
+    return nlines
+
+_HEADERS = {'ipac': _ipac_header,
+            'csv' : _csv_header}
+
+
+def _scan_rows(fp, start, step):
+    '''
+    Count (non-empty) lines from 'start' on, keep offsets every 'step' rows
+
+    File is read in blocks, newlines are located with numpy.
+    '''
+    nrows = 0
+    offsets = []
+    line_start = start
+    last_byte = 0
+    fp.seek(start)
+    while True:
+        position = fp.tell()
+        block = np.frombuffer(fp.read(_BLOCK_BYTES), dtype='u1')
+        if not len(block):
+            break
+        newlines = np.flatnonzero(block == ord('\n')) + position
+        starts = np.empty(len(newlines), dtype=np.int64)
+        if len(newlines):
+            starts[0] = line_start
+            starts[1:] = newlines[:-1] + 1
+            line_start = newlines[-1] + 1
+        # empty lines (or '\r' only) are not rows
+        lengths = newlines - starts
+        empty = (lengths == 0)
+        _ones = np.flatnonzero(lengths == 1)
+        if len(_ones):
+            _rel = starts[_ones] - position
+            _chars = np.where(_rel >= 0, block[np.maximum(_rel, 0)], last_byte)
+            empty[_ones[_chars == ord('\r')]] = True
+        last_byte = block[-1]
+        rows = starts[~empty]
+        offsets.append(rows[(-nrows) % step::step])
+        nrows += len(rows)
+    fp.seek(line_start)
+    if fp.read().rstrip(b'\r'):
+        # last line, with no end-of-line
+        if nrows % step == 0:
+            offsets.append(np.array([line_start], dtype=np.int64))
+        nrows += 1
+    offsets = np.concatenate(offsets) if offsets else np.array([], dtype=np.int64)
+    return nrows, offsets
@@ -1,161 +1,450 @@
 #-*- coding=utf-8 -*-
 import logging
 
+from collections import OrderedDict
+
 import numpy as np
 
+from ..utils import is_number
+from ..utils.nulls import null_mask
+
+# IPAC data types may be abbreviated (e.g, 'i', 'd', 'c'); the first
+# letter is enough to define the type.
 _dtype_conversion_table = {
-    'char'      : str,
-    'double'    : float,
-    'int'       : int
+    'c'     : str,      # char
+    'd'     : float,    # double ('date' is handled as 'char')
+    'r'     : float,    # real
+    'f'     : float,    # float
+    'i'     : int,      # int
+    'l'     : int       # long
 }
 _null_conversion_table = {
-    'char'      : 'null',
-    'double'    : float('nan'),
-    'int'       : -999
+    str     : '',
+    float   : float('nan'),
+    int     : -999
 }
-# _null_conversion_table = {
-#     'char'      : None,
-#     'double'    : None,
-#     'int'       : None
-# }
 
-def read(filename, columns=None, rows=None, ucds=None):
+# Number of data lines parsed at once
+_CHUNK_ROWS = 100000
+
+
+def read(filename, columns=None, rows=None, ucds=None, chunk_rows=_CHUNK_ROWS):
     '''
-    Read IPAC file lines to list
+    Read IPAC table columns to typed arrays
+
+    The file is read in one pass: header lines first, then the data
+    block in chunks of 'chunk_rows' lines. Columns boundaries are
+    given by the '|' characters of the header; each column is sliced
+    out of the chunk as a fixed-width byte array and converted in bulk.
 
     NOTE: UCDs are still not supported
+
+    Input:
+     - filename : string
+     - columns : list of strings
+            Columns to read; all if None
+     - rows : integer, float or list of integers
+            Rows to read (0-indexed); if a number, sample of rows.
+            Rows are located through the file's rows index (~index.get_index)
+     - chunk_rows : integer
+            Number of lines parsed at once
+
+    Output:
+     - dictionary with 'names','types','units','nulls' (lists), 'data'
+       and 'masks' ({name:array}) and the header 'keywords','comments'
+    '''
+    with open(filename, 'rb') as fp:
+        keywords, comments, metacols = read_header(fp)
+        header = parse_columns_header(metacols)
+
+        columns_name = header['names']
+        if columns is None:
+            columns = columns_name[:]
+        for col in columns:
+            assert col in columns_name, "Column '{}' is not in the file".format(col)
+        columns_position = [ columns_name.index(col) for col in columns ]
+        logging.debug("Columns position to read: {}".
+                    format(list(zip(columns,columns_position))))
+
+        if rows is not None:
+            # rows are reached through the (sidecar) rows index
+            from .index import get_index
+            index = get_index(filename, format='ipac')
+            if is_number(rows):
+                from ..utils.data import sample_rows
+                rows = sample_rows(index.nrows, rows)
+            selected = np.unique(np.asarray(rows, dtype=int))
+            assert not len(selected) or (selected[0] >= 0 and selected[-1] < index.nrows), \
+                "Rows out of range (file has {:d} rows)".format(index.nrows)
+            lines_chunks = _iter_selected_lines(fp, index, selected, chunk_rows)
+        else:
+            lines_chunks = _iter_lines(fp, chunk_rows)
+
+        chunks = OrderedDict((col,[]) for col in columns)
+        masks = OrderedDict((col,[]) for col in columns)
+        for lines in lines_chunks:
+            block = as_block(lines)
+            for col,i in zip(columns,columns_position):
+                first,last = header['bounds'][i]
+                values = column_from_block(block, first, last)
+                # empty fields are nulls as well
+                mask = null_mask(values, null=header['nulls'][i], strings=('',))
+                values = convert(values, header['types'][i], mask)
+                chunks[col].append(values)
+                masks[col].append(mask)
+
+    data = OrderedDict()
+    for col,i in zip(columns,columns_position):
+        _type = header['types'][i]
+        if chunks[col]:
+            data[col] = np.concatenate(chunks[col])
+            masks[col] = np.concatenate(masks[col])
+        else:
+            data[col] = np.array([], dtype=_type)
+            masks[col] = np.array([], dtype=bool)
+
+    out = { 'names':columns[:],
+            'types':[ header['types'][i] for i in columns_position ],
+            'units':[ header['units'][i] for i in columns_position ],
+            'nulls':[ header['nulls'][i] for i in columns_position ],
+            'data':data,
+            'masks':masks,
+            'keywords':keywords,
+            'comments':comments }
+    return out
+
+
+def read_header(fp):
+    '''
+    Read header lines from (binary) file object 'fp'
+
+    On return, 'fp' is positioned at the first data line.
+    Output: keywords, comments, columns-definition lines (as strings)
     '''
-    # If 'rows' is not None, means I'll have to read *some* of them,
-    # to read *some* of them I need to know how many they are.
-    counter_lines_total = 0
-    with open(filename) as fp:
-        for i, l in enumerate(fp):
-            pass
-        counter_lines_total = i + 1
-    logging.debug("Total number of lines of (IPAC) file '{}':{:d}".
-                format(filename,counter_lines_total))
-    del i,l,fp
-
-    # Now let's read the metadata and then the data
-    counter_lines_header = 0
-    header = []
+    keywords = []
+    comments = []
     metacols = []
-    with open(filename,'r') as fp:
-        for i,line in enumerate(fp):
-            if line[0] == '\\':
-                # Read header lines
-                header.append(line)
-            elif line[0] == '|':
-                # Read columns metadata (name,data type,unit,null value)
-                metacols.append(line)
+    while True:
+        pos = fp.tell()
+        line = fp.readline()
+        if not line:
+            break
+        if line[:1] == b'\\':
+            line = line.decode()
+            if line[1:2].strip():
+                keywords.append(line)
             else:
-                break
-        counter_lines_header = i
-    assert counter_lines_header == len(header)+len(metacols)
-    logging.debug("Number of header lines ({:d})+({:d}): {:d}".
-                format(len(header),len(metacols),counter_lines_header))
-    del i,line,fp
-
-    # Let's work over the columns metadata, assigned to 'metacols' here
-    # This section of the IPAC format is composed by 4 lines of the file:
-    # - column names
-    # - column datatype
-    # - column unit
-    # - column null value
-    def parse_columns_header(line,clean_empty=True):
-        line = line.strip('\n')
-        line = line.strip()
-        sep = '|'
-        if line[0] == sep:
-            line = line[1:]
-        if line[-1] == sep:
-            line = line[:-1]
-        cols = [ col.strip() for col in line.split('|') ]
-        if clean_empty:
-            cols = [x for x in cols if x!='']
-        return cols
-    # --
-    columns_name = parse_columns_header(metacols[0])
-
-    if columns is None:
-        columns = columns_name[:]
-    _columns_position = { col:i for i,col in enumerate(columns_name) }
-    columns_position = []
-    for col in columns:
-        assert col in columns_name, "Column '{}' is not in the file".format(col)
-        columns_position.append(_columns_position[col])
-    assert len(columns)==len(columns_position)
-    logging.debug("Columns position to read: {}".
-                format(list(zip(columns,columns_position))))
-    del _columns_position, col
-
-    columns_type = parse_columns_header(metacols[1])
-    columns_unit = parse_columns_header(metacols[2], clean_empty=False)
-    columns_null = parse_columns_header(metacols[3], clean_empty=False)
-    assert len(columns_name) == len(columns_type)
-    assert len(columns_name) == len(columns_unit)
-    assert len(columns_name) == len(columns_null)
-    assert len(columns_name) >= len(columns)
-
-    # If 'rows' was given guarantee we are working with an array of
-    # indexes
-    counter_lines_data = counter_lines_total - counter_lines_header
-    if rows is None:
-        from numpy import arange
-        rows = arange(counter_lines_total - counter_lines_header)
-
-    from booq.utils import is_array,is_number
-    if is_number(rows):
-        from booq.data.utils import sample_rows
-        rows = sample_rows(counter_lines_data,rows)
+                comments.append(line)
+        elif line[:1] == b'|':
+            metacols.append(line.decode())
+        elif not line.strip():
+            continue
+        else:
+            fp.seek(pos)
+            break
+    logging.debug("Number of header lines ({:d})+({:d})+({:d})".
+                format(len(keywords),len(comments),len(metacols)))
+    return keywords, comments, metacols
+
+
+def parse_columns_header(metacols):
+    '''
+    Parse the (two to four) '|'-delimited lines defining the columns
+
+    This section of the IPAC format is composed by the lines:
+    - column names
+    - column datatype
+    - column unit (optional)
+    - column null value (optional)
+
+    Output is a dictionary with 'names','types','units','nulls' and
+    the 'bounds' (first,last character) of each column.
+    '''
+    assert 2 <= len(metacols) <= 4, \
+        "Expected 2 to 4 columns-definition lines, got {:d}".format(len(metacols))
+    line = metacols[0].rstrip('\r\n').rstrip()
+    delims = [ i for i,c in enumerate(line) if c == '|' ]
+    # values can be placed under the left delimiter ('right' definition)
+    bounds = list(zip(delims[:-1], delims[1:]))
+
+    def split(line):
+        line = line.rstrip('\r\n')
+        return [ line[a+1:b].strip() for a,b in bounds ]
+
+    names = split(metacols[0])
+    types = [ column_type(t) for t in split(metacols[1]) ]
+    if len(metacols) > 2:
+        units = split(metacols[2])
+    else:
+        units = [''] * len(names)
+    if len(metacols) > 3:
+        nulls = split(metacols[3])
     else:
-        rows = np.asarray(rows)
-    assert is_array(rows)
-    logging.debug("Number of rows to be read: {:d}".format(len(rows)))
-
-    rows = rows + counter_lines_header
-    rows = list(rows)
-    rows.sort()
-
-    from booq.utils import progressBar
-    # pb = progressBar.ProgressTimer(description="Reading file",n_iter=len(rows))
-    pb = progressBar.ProgressBar(total=len(rows))
-
-    data = []
-    _dtypes = [ _dtype_conversion_table[ctype] for ctype in columns_type ]
-    _nulls = [ _null_conversion_table[ctype] for ctype in columns_type ]
-    with open(filename,'r') as fp:
-        i_old = None
-        for i,line in enumerate(fp):
-            if len(rows) == 0:
-                break
-            if line[0] == '\\' or line[0] == '|':
-                continue
-            if i == rows[0]:
-                data_line = []
-                for j,dat in enumerate(line.split()):
-                    if not j in columns_position:
-                        continue
-                    dat = dat.strip()
-                    if dat == columns_null[j]:
-                        dat = _nulls[j]
-                    data_line.append(_dtypes[j](dat))
-                data.append(data_line)
-                _ = rows.pop(0)
-                pb.update()
+        nulls = ['null'] * len(names)
+    # the last column may extend beyond its right delimiter
+    bounds[-1] = (bounds[-1][0], None)
+    return { 'names':names, 'types':types, 'units':units,
+             'nulls':nulls, 'bounds':bounds }
+
+
+def column_type(typename):
+    '''
+    Return the python type corresponding to IPAC 'typename'
+    '''
+    typename = typename.lower()
+    if typename.startswith('date'):
+        return str
+    return _dtype_conversion_table.get(typename[:1], str)
+
+
+def as_block(lines):
+    '''
+    Return a 2D (lines x characters) byte array from list of (bytes) 'lines'
+    '''
+    arr = np.array(lines)
+    width = arr.dtype.itemsize
+    return arr.view('u1').reshape(len(lines), width)
+
+
+def column_from_block(block, first, last=None):
+    '''
+    Return the (stripped) values of the fixed-width column [first:last] of 'block'
+    '''
+    sub = np.ascontiguousarray(block[:, first:last])
+    width = sub.shape[1]
+    if not width:
+        return np.zeros(len(block), dtype='S1')
+    values = sub.view('S{:d}'.format(width)).ravel()
+    return np.char.strip(values)
+
+
+def convert(values, dtype, mask=None):
+    '''
+    Convert (bytes) 'values' to 'dtype'; 'mask'ed values are set to the type's null
+    '''
+    if mask is not None and mask.any():
+        values = values.copy()
+        values[mask] = b'' if dtype is str else b'0'
+    out = values.astype(dtype)
+    if mask is not None and mask.any():
+        out[mask] = _null_conversion_table[dtype]
+    return out
+
+
+def _readlines(fp, nlines):
+    lines = []
+    for line in fp:
+        line = line.rstrip(b'\r\n')
+        if not line:
+            continue
+        lines.append(line)
+        if len(lines) == nlines:
+            break
+    return lines
+
+
+def _iter_lines(fp, chunk_rows):
+    while True:
+        lines = _readlines(fp, chunk_rows)
+        if not lines:
+            break
+        yield lines
+
+
+def _iter_selected_lines(fp, index, selected, chunk_rows):
+    '''
+    Yield lists of (sorted) 'selected' data lines, using ~index.RowIndex 'index'
+    '''
+    for start in range(0, len(selected), chunk_rows):
+        yield index.read_rows(selected[start:start+chunk_rows], fp)
+
+
+# IPAC data types written for each numpy kind (and itemsize)
+_type_names = {
+    'b'     : 'int',
+    'i'     : {1:'int', 2:'int', 4:'int', 8:'long'},
+    'u'     : {1:'int', 2:'int', 4:'long', 8:'long'},
+    'f'     : {2:'real', 4:'real', 8:'double'},
+    'S'     : 'char',
+    'U'     : 'char'
+}
+# Largest (shortest round-trip) representation of floats, by itemsize
+_float_width = {2:10, 4:15, 8:24}
+
+
+def write(filename, table, keywords=None, comments=None, chunk_rows=_CHUNK_ROWS):
+    '''
+    Write ~astropy.table.Table 'table' to IPAC file 'filename'
+
+    Header (keywords, comments and the four '|' lines) is written first;
+    data follows in chunks of 'chunk_rows' rows. Width of each column is
+    defined from its dtype and header values, which allows the data block
+    to be built directly as a (rows x characters) byte array and written
+    out in one call per chunk -- no per-row strings are created.
+
+    Column descriptions are written as comments (see ~_meta_ipac.MetaColumn);
+    masked values are written as the column's null ('null' by default).
+
+    Input:
+     - filename : string
+     - table : ~astropy.table.Table
+     - keywords : dictionary
+            Keywords to write; default is 'table.meta' (scalars only)
+     - comments : list of strings
+            Comments to write; default is "table.meta['comments']"
+     - chunk_rows : integer
+            Number of rows formatted at once
+    '''
+    if keywords is None:
+        keywords = OrderedDict((k,v) for k,v in table.meta.items()
+                                if k != 'comments' and np.isscalar(v))
+    if comments is None:
+        comments = table.meta.get('comments', [])
+
+    specs = [ column_spec(table[name]) for name in table.colnames ]
+    nrows = len(table)
+    with open(filename, 'wb') as fp:
+        write_header(fp, specs, keywords, comments)
+        for start in range(0, nrows, chunk_rows):
+            stop = min(start+chunk_rows, nrows)
+            block = format_block(table, specs, start, stop)
+            fp.write(block.tobytes())
+    logging.debug("IPAC table written to '{}': {:d} rows".format(filename, nrows))
+
+
+def column_spec(column):
+    '''
+    Return dictionary with IPAC 'name','type','unit','null','description'
+    and 'width' of 'column'
+    '''
+    dtype = column.dtype
+    typename = _type_names.get(dtype.kind, 'char')
+    if isinstance(typename, dict):
+        typename = typename.get(dtype.itemsize, 'long' if dtype.kind in 'iu' else 'double')
+
+    if dtype.kind in 'iu':
+        values = np.asarray(column)
+        if len(values):
+            width = max(len(str(values.min())), len(str(values.max())))
+        else:
+            width = 1
+    elif dtype.kind == 'f':
+        width = _float_width.get(dtype.itemsize, 24)
+    elif dtype.kind == 'b':
+        width = 1
+    elif dtype.kind in 'SU':
+        width = dtype.itemsize // (4 if dtype.kind == 'U' else 1)
+    else:
+        width = max([ len(str(v)) for v in column ] or [1])
+
+    unit = '' if column.unit is None else column.unit.to_string()
+    null = (getattr(column, 'meta', None) or {}).get('null', None)
+    null = 'null' if null is None or str(null) == '' else str(null)
+    name = column.name
+    width = max(width, len(name), len(typename), len(unit), len(null))
+    return { 'name':name, 'type':typename, 'unit':unit, 'null':null,
+             'description':column.description, 'width':width }
+
+
+def write_header(fp, specs, keywords=None, comments=None):
+    '''
+    Write IPAC header lines to (binary) file object 'fp'
+    '''
+    lines = []
+    for key,value in (keywords or {}).items():
+        lines.append('\\{} = {}'.format(key, value))
+    for comment in (comments or []):
+        lines.append('\\ {}'.format(comment))
+    for spec in specs:
+        if spec['description']:
+            lines.append('\\ {}'.format(spec['name']))
+            lines.append('\\ __ {}'.format(spec['description']))
+    for field in ('name','type','unit','null'):
+        line = '|'.join(spec[field].rjust(spec['width']) for spec in specs)
+        lines.append('|' + line + '|')
+    fp.write(('\n'.join(lines) + '\n').encode())
+
+
+def format_block(table, specs, start, stop):
+    '''
+    Return the (rows x characters) byte array of 'table' rows [start:stop]
+
+    Each value is right-justified under its column header; line is
+    ' ' + value + ' ' for each column, plus the newline.
+    '''
+    nrows = stop - start
+    linewidth = sum(spec['width']+1 for spec in specs) + 1
+    block = np.full((nrows, linewidth), ord(' '), dtype='u1')
+    block[:, -1] = ord('\n')
+    first = 1
+    for spec in specs:
+        width = spec['width']
+        column = table[spec['name']][start:stop]
+        mask = np.ma.getmaskarray(column) if hasattr(column, 'mask') else None
+        block[:, first:first+width] = format_column(np.asarray(column), width,
+                                                    mask, spec['null'])
+        first += width + 1
+    return block
+
+
+def format_column(values, width, mask=None, null='null'):
+    '''
+    Return 'values' as right-justified (rows x width) byte array
+    '''
+    kind = values.dtype.kind
+    if kind in 'biu':
+        out = format_integers(values, width)
+    else:
+        if kind == 'f':
+            out = values.astype('S{:d}'.format(width))
+        elif kind == 'S':
+            out = values
+        else:
+            out = as_ascii(values.astype(str) if kind != 'U' else values)
+        out = np.char.rjust(out, width).astype('S{:d}'.format(width))
+        out = out.view('u1').reshape(len(values), width)
+    if mask is not None and mask.any():
+        out[mask] = np.frombuffer(null.rjust(width).encode(), dtype='u1')
+    return out
+
+
+def as_ascii(values):
+    '''
+    Encode (unicode) 'values' to bytes; non-ASCII characters are replaced by '?'
+    '''
     try:
-        pb.close()
-    except:
-        pb.finish()
-
-    names = columns[:]
-    types = [ _dtypes[i] for i in columns_position ]
-    units = [ columns_unit[i] for i in columns_position ]
-    nulls = [ _nulls[i] for i in columns_position ]
-    out = { 'names':names,
-            'types':types,
-            'units':units,
-            'nulls':nulls,
-            'data':data    }
+        return values.astype('S')
+    except UnicodeEncodeError:
+        # IPAC tables are plain ASCII
+        return np.char.encode(values, 'ascii', 'replace')
+
 
+def format_integers(values, width):
+    '''
+    Return integer 'values' as right-justified (rows x width) byte array
+
+    Digits are extracted with vectorized divisions by 10, which is
+    a few times faster than numpy's integer-to-string conversion.
+    '''
+    nrows = len(values)
+    out = np.full((nrows, width), ord(' '), dtype='u1')
+    if not nrows:
+        return out
+    values = values.astype(np.int64) if values.dtype.kind == 'b' else values
+    negative = values < 0 if values.dtype.kind == 'i' else None
+    absvals = np.abs(values.astype(np.int64)) if negative is not None else values
+    absvals = absvals.astype(np.uint64)
+    ndigits = np.zeros(nrows, dtype=np.int64)
+    live = np.ones(nrows, dtype=bool)
+    for pos in range(width-1, -1, -1):
+        digit = (absvals % 10).astype('u1') + ord('0')
+        out[live, pos] = digit[live]
+        ndigits += live
+        absvals //= 10
+        live = absvals > 0
+        if not live.any():
+            break
+    if negative is not None and negative.any():
+        rows = np.flatnonzero(negative)
+        out[rows, width-1-ndigits[rows]] = ord('-')
     return out
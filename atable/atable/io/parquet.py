@@ -0,0 +1,352 @@
+#-*- coding=utf-8 -*-
+'''
+Parquet and Arrow (IPC) tables, through 'pyarrow'
+
+Columns metadata -- UCD, unit, description and null value -- is kept
+in the (Arrow) field metadata of each column, table's metadata goes
+in the schema metadata. Both survive a write/read round trip without
+any side-car (metatable) file.
+
+Tables are written in blocks of 'chunk_rows' rows: each block is
+converted and written at once (one Parquet row-group or one Arrow
+record-batch), memory in use is bounded by the size of one block.
+
+Reading goes through ~pyarrow.dataset: columns are projected (only
+the asked columns are decoded), row-selection predicates (~predicates)
+are pushed down to the reader -- row-groups whose statistics rule the
+predicate out are skipped -- and decoding is multi-threaded. Predicates
+that can not be translated (e.g, ~predicates.Function) are evaluated
+over the decoded columns.
+
+'pyarrow' is imported only when a file is read/written.
+'''
+import logging
+
+import json
+import operator
+
+from collections import OrderedDict
+
+import numpy as np
+
+# Number of rows written at once (one row-group/record-batch)
+_CHUNK_ROWS = 1000000
+
+# Column metadata kept in the Arrow field metadata
+_FIELD_META = ('ucd','unit','description','null')
+
+# Schema metadata key for the table's metadata (JSON)
+_TABLE_META = 'atable.meta'
+
+_FORMATS = { 'parquet':'parquet',
+             'arrow':'ipc' }
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("Parquet/Arrow I/O needs 'pyarrow': {}".format(e))
+    return pyarrow
+
+
+def write(filename, table, format='parquet', chunk_rows=_CHUNK_ROWS,
+          compression='snappy'):
+    '''
+    Write ~astropy.table.Table 'table' to Parquet/Arrow file 'filename'
+
+    Input:
+     - filename : string
+     - table : ~astropy.table.Table
+     - format : string
+            'parquet' or 'arrow' (Arrow IPC file format)
+     - chunk_rows : integer
+            Number of rows in each row-group/record-batch
+     - compression : string
+            (Parquet only) Compression codec
+    '''
+    assert format in _FORMATS, "Options for 'format' are {}".format(list(_FORMATS))
+    pa = _pyarrow()
+    schema = table_schema(table)
+    nrows = len(table)
+    chunk_rows = max(int(chunk_rows), 1)
+
+    def batches():
+        for start in range(0, max(nrows, 1), chunk_rows):
+            stop = min(start+chunk_rows, nrows)
+            arrays = [ column_array(table[name][start:stop]) for name in table.colnames ]
+            yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    if format == 'parquet':
+        import pyarrow.parquet as pq
+        with pq.ParquetWriter(filename, schema, compression=compression) as writer:
+            for batch in batches():
+                writer.write_table(pa.Table.from_batches([batch], schema=schema))
+    else:
+        with pa.OSFile(filename, 'wb') as sink:
+            with pa.ipc.new_file(sink, schema) as writer:
+                for batch in batches():
+                    writer.write_batch(batch)
+    logging.debug("{} table written to '{}': {:d} rows".format(format, filename, nrows))
+
+
+def table_schema(table):
+    '''
+    Return the Arrow schema of 'table', with columns and table metadata
+    '''
+    pa = _pyarrow()
+    fields = []
+    for name in table.colnames:
+        column = table[name]
+        _type = column_array(column[:0]).type
+        fields.append(pa.field(name, _type, nullable=True, metadata=column_meta(column)))
+    meta = { _TABLE_META: json.dumps(dict(table.meta or {}), default=str) }
+    return pa.schema(fields, metadata=meta)
+
+
+def column_meta(column):
+    '''
+    Return {key:string} of 'column' UCD, unit, description and null (JSON)
+    '''
+    meta = getattr(column, 'meta', None) or {}
+    unit = getattr(column, 'unit', None)
+    null = meta.get('null')
+    values = { 'ucd':meta.get('ucd'),
+               'unit':None if unit is None else unit.to_string(),
+               'description':getattr(column, 'description', None),
+               'null':None if null is None else json.dumps(null, default=str) }
+    return { k:str(v) for k,v in values.items() if v is not None and str(v) != '' }
+
+
+def column_array(column):
+    '''
+    Return Arrow array of 'column' values, masked values as nulls
+
+    Two-dimensional columns are written as fixed-size lists.
+    '''
+    pa = _pyarrow()
+    data = column.data
+    mask = getattr(data, 'mask', None)
+    data = np.asarray(data)
+    if not data.dtype.isnative:
+        data = data.astype(data.dtype.newbyteorder('='))
+    if mask is not None:
+        mask = np.asarray(mask, dtype=bool)
+        if not mask.any():
+            mask = None
+    if data.ndim == 2:
+        if mask is not None:
+            logging.warning("Mask of multidimensional column '{}' is not written.".
+                            format(column.name))
+        values = pa.array(np.ascontiguousarray(data).reshape(-1))
+        return pa.FixedSizeListArray.from_arrays(values, data.shape[1])
+    assert data.ndim == 1, "Columns of {:d} dimensions not supported".format(data.ndim)
+    return pa.array(data, mask=mask)
+
+
+def schema(filename, format='parquet'):
+    '''
+    Return the Arrow schema of 'filename' (no data is read)
+    '''
+    import pyarrow.dataset as ds
+    return ds.dataset(filename, format=_FORMATS[format]).schema
+
+
+def fields_meta(schema):
+    '''
+    Return {column : {ucd,unit,description,null}} from Arrow 'schema'
+    '''
+    out = OrderedDict()
+    for field in schema:
+        meta = { k.decode():v.decode() for k,v in (field.metadata or {}).items() }
+        out[field.name] = { k:meta.get(k) for k in _FIELD_META }
+        if out[field.name]['null'] is not None:
+            # null values are JSON-encoded, to keep their type
+            try:
+                out[field.name]['null'] = json.loads(out[field.name]['null'])
+            except ValueError:
+                pass
+    return out
+
+
+def read(filename, columns=None, ucds=None, filter_rows=None, format='parquet',
+         use_threads=True):
+    '''
+    Read Parquet/Arrow 'filename' columns to numpy arrays
+
+    Input:
+     - filename : string
+     - columns : list of strings
+            Columns to read; all if None
+     - ucds : list of strings
+            UCDs identifying columns to read (from the field metadata),
+            in addition to 'columns'
+     - filter_rows : ~predicates.Predicate or {column : select-function}
+            Rows selection; predicates are pushed down to the reader
+     - format : string
+            'parquet' or 'arrow'
+     - use_threads : bool
+            Decode columns in parallel
+
+    Output:
+     - dictionary with 'names' (list), 'data' and 'masks' ({name:array}),
+       'meta' ({name:{ucd,unit,description,null}}) and the table 'keywords'
+    '''
+    assert format in _FORMATS, "Options for 'format' are {}".format(list(_FORMATS))
+    import pyarrow.dataset as ds
+    from .predicates import from_filter
+
+    dataset = ds.dataset(filename, format=_FORMATS[format])
+    meta = fields_meta(dataset.schema)
+    columns_name = list(meta.keys())
+    if ucds:
+        # columns identified by 'ucds' are added to 'columns' (as for FITS)
+        from ..ucd import UCDMatrix
+        mtx = UCDMatrix([ meta[c]['ucd'] for c in columns_name ], columns_name)
+        ucdcols = mtx.colnames(ucds)
+        if ucdcols:
+            columns = list(columns) if columns else []
+            columns.extend(c for c in ucdcols if c not in columns)
+    if columns is None:
+        columns = columns_name[:]
+    for col in columns:
+        assert col in columns_name, "Column '{}' is not in the file".format(col)
+    logging.debug("Columns to read: {}".format(columns))
+
+    predicate = from_filter(filter_rows)
+    pushed,rest = split_predicate(predicate)
+    read_columns = list(columns)
+    if rest is not None:
+        read_columns.extend( c for c in rest.columns if c not in read_columns )
+    logging.debug("Filter pushed down: {!r}; applied after reading: {!r}".format(pushed, rest))
+
+    table = dataset.to_table(columns=read_columns, filter=pushed, use_threads=use_threads)
+
+    data = OrderedDict()
+    masks = OrderedDict()
+    for name in read_columns:
+        data[name],masks[name] = array_values(table.column(name))
+    if rest is not None:
+        # nulls as masked entries (see ~predicates)
+        selection = rest.mask(OrderedDict( (name,np.ma.MaskedArray(data[name], masks[name]))
+                                           for name in read_columns ))
+        for name in read_columns:
+            data[name] = data[name][selection]
+            masks[name] = masks[name][selection]
+    for name in read_columns[len(columns):]:
+        del data[name], masks[name]
+
+    keywords = (dataset.schema.metadata or {}).get(_TABLE_META.encode())
+    out = { 'names':columns[:],
+            'data':data,
+            'masks':masks,
+            'meta':OrderedDict((c,meta[c]) for c in columns),
+            'keywords':json.loads(keywords.decode()) if keywords else {} }
+    return out
+
+
+def array_values(array):
+    '''
+    Return (data, mask) numpy arrays of Arrow (chunked) 'array'
+
+    Nulls are filled (0, False or '') and flagged in 'mask'; strings
+    become unicode arrays, fixed-size lists two-dimensional arrays.
+    '''
+    pa = _pyarrow()
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks() if array.num_chunks else pa.array([], type=array.type)
+    if pa.types.is_dictionary(array.type):
+        array = array.dictionary_decode()
+    mask = array.is_null().to_numpy(zero_copy_only=False)
+    _type = array.type
+    if pa.types.is_fixed_size_list(_type):
+        values = array.flatten().to_numpy(zero_copy_only=False, writable=True)
+        data = values.reshape(len(array), _type.list_size)
+        return data, np.repeat(mask[:,None], _type.list_size, axis=1)
+    if array.null_count:
+        if pa.types.is_string(_type) or pa.types.is_large_string(_type):
+            array = array.fill_null('')
+        elif pa.types.is_boolean(_type):
+            array = array.fill_null(False)
+        elif pa.types.is_integer(_type) or pa.types.is_floating(_type):
+            array = array.fill_null(0)
+    data = array.to_numpy(zero_copy_only=False, writable=True)
+    if pa.types.is_string(_type) or pa.types.is_large_string(_type):
+        data = data.astype(str)
+    return data, mask
+
+
+_OPERATORS = { '==':operator.eq,
+               '!=':operator.ne,
+               '<' :operator.lt,
+               '<=':operator.le,
+               '>' :operator.gt,
+               '>=':operator.ge }
+
+def split_predicate(predicate):
+    '''
+    Split 'predicate' into (pushed, rest): an Arrow expression and a ~Predicate
+
+    Conjunctions are split term by term; any other predicate is either
+    fully translated or left to be evaluated over the read data.
+    '''
+    from .predicates import And
+    if predicate is None:
+        return None, None
+    if isinstance(predicate, And):
+        pushed,rest = [],[]
+        for pred in predicate._predicates:
+            _p,_r = split_predicate(pred)
+            if _p is not None:
+                pushed.append(_p)
+            if _r is not None:
+                rest.append(_r)
+        expr = None
+        for _p in pushed:
+            expr = _p if expr is None else expr & _p
+        rest = None if not rest else (rest[0] if len(rest) == 1 else And(*rest))
+        return expr, rest
+    expr = to_expression(predicate)
+    return (expr, None) if expr is not None else (None, predicate)
+
+
+def to_expression(predicate):
+    '''
+    Return the Arrow (dataset) expression of 'predicate', None if not possible
+
+    Nulls follow the rule of ~predicates (as NaN): they satisfy '!=' and
+    no other comparison, range or membership; expressions are never
+    null, so that negations select them.
+    '''
+    import pyarrow.dataset as ds
+    from . import predicates as prd
+    if isinstance(predicate, prd.Compare):
+        field = ds.field(predicate._column)
+        expr = _OPERATORS[predicate._operator](field, predicate._value)
+        if predicate._operator == '!=':
+            return expr | field.is_null()
+        return expr & field.is_valid()
+    if isinstance(predicate, prd.Range):
+        field = ds.field(predicate._column)
+        expr = field.is_valid()
+        if predicate._low is not None:
+            expr = expr & (field >= predicate._low)
+        if predicate._high is not None:
+            expr = expr & (field <= predicate._high)
+        return expr
+    if isinstance(predicate, prd.IsIn):
+        field = ds.field(predicate._column)
+        return field.isin(predicate._values.tolist()) & field.is_valid()
+    if isinstance(predicate, (prd.And, prd.Or)):
+        exprs = [ to_expression(p) for p in predicate._predicates ]
+        if any(e is None for e in exprs):
+            return None
+        combine = operator.and_ if isinstance(predicate, prd.And) else operator.or_
+        expr = exprs[0]
+        for e in exprs[1:]:
+            expr = combine(expr, e)
+        return expr
+    if isinstance(predicate, prd.Not):
+        expr = to_expression(predicate._predicate)
+        return None if expr is None else ~expr
+    return None
@@ -0,0 +1,388 @@
+# -*- coding:utf-8 -*-
+'''
+Row-selection predicates evaluated over column arrays
+
+A predicate is an expression over one or more table columns that,
+given a chunk of data (any structure indexable by column name, like
+a numpy recarray), returns a boolean mask selecting the rows of
+interest. Predicates are built from column references and combined
+with the bitwise operators '&', '|' and '~':
+
+    >>> from atable.io.predicates import col
+    >>> p = (col('mag') < 20) & col('ra').between(10,20)
+    >>> p = p | col('type').isin(['star','qso'])
+
+Null entries -- masked entries of masked arrays (e.g, FITS TNULL
+values, see 'with_nulls') -- behave as NaN does: they satisfy no
+comparison, range, membership or function but '!='; negations ('~')
+select them. Functions are given the data of null entries, not masked.
+This is the rule of every format read with 'filter_rows' (see also
+~parquet.to_expression).
+
+The dictionary form historically accepted by 'filter_rows' --
+'{column : select-function}' -- is translated by 'from_filter'; each
+function is first tried over the whole column array and, only if it
+does not return a mask, applied element by element.
+'''
+import logging
+
+import numpy as np
+
+
+def _as_column_type(values, value):
+    '''
+    Encode (str) 'value' when 'values' is a bytes array (raw FITS strings)
+    '''
+    if getattr(values, 'dtype', None) is not None and values.dtype.kind == 'S':
+        if isinstance(value, str):
+            return value.encode()
+        if isinstance(value, np.ndarray) and value.dtype.kind == 'U':
+            return np.char.encode(value)
+    return value
+
+
+def _split_nulls(values):
+    '''
+    Return ('values' data, mask of nulls or None)
+    '''
+    if np.ma.isMaskedArray(values) and np.ma.getmask(values) is not np.ma.nomask:
+        return np.ma.getdata(values), np.ma.getmaskarray(values)
+    return np.ma.getdata(values), None
+
+
+class Predicate(object):
+    '''
+    Base class for row-selection expressions
+    '''
+    def mask(self, data):
+        '''
+        Return the boolean mask of 'data' rows satisfying the predicate
+        '''
+        assert False, "This is a Base class, you should not be seeing this."
+
+    @property
+    def columns(self):
+        '''
+        Set of column names the predicate depends on
+        '''
+        assert False, "This is a Base class, you should not be seeing this."
+
+    def __call__(self, data):
+        return self.mask(data)
+
+    def __and__(self, other):
+        return And(self, other)
+
+    def __or__(self, other):
+        return Or(self, other)
+
+    def __invert__(self):
+        return Not(self)
+
+
+class Compare(Predicate):
+    '''
+    Comparison of a column against a scalar value
+    '''
+    _operators = {'==': np.equal,
+                  '!=': np.not_equal,
+                  '<' : np.less,
+                  '<=': np.less_equal,
+                  '>' : np.greater,
+                  '>=': np.greater_equal}
+
+    def __init__(self, column, operator, value):
+        assert operator in self._operators, \
+            "Options for 'operator' are {}".format(list(self._operators.keys()))
+        self._column = column
+        self._operator = operator
+        self._value = value
+
+    def __repr__(self):
+        return '({!s} {!s} {!r})'.format(self._column, self._operator, self._value)
+
+    @property
+    def columns(self):
+        return set([self._column])
+
+    def mask(self, data):
+        func = self._operators[self._operator]
+        values,nulls = _split_nulls(data[self._column])
+        value = _as_column_type(values, self._value)
+        mask = np.asarray(func(values, value), dtype=bool)
+        if nulls is not None:
+            mask = mask | nulls if self._operator == '!=' else mask & ~nulls
+        return mask
+
+
+class Range(Predicate):
+    '''
+    Column values within [low,high] (limits inclusive)
+    '''
+    def __init__(self, column, low, high):
+        self._column = column
+        self._low = low
+        self._high = high
+
+    def __repr__(self):
+        return '({!r} <= {!s} <= {!r})'.format(self._low, self._column, self._high)
+
+    @property
+    def columns(self):
+        return set([self._column])
+
+    def mask(self, data):
+        values,nulls = _split_nulls(data[self._column])
+        mask = np.ones(len(values), dtype=bool) if nulls is None else ~nulls
+        if self._low is not None:
+            mask &= values >= self._low
+        if self._high is not None:
+            mask &= values <= self._high
+        return mask
+
+
+class IsIn(Predicate):
+    '''
+    Column values within a set of 'values'
+    '''
+    def __init__(self, column, values):
+        self._column = column
+        self._values = np.asarray(list(values))
+
+    def __repr__(self):
+        return '({!s} in {!r})'.format(self._column, self._values.tolist())
+
+    @property
+    def columns(self):
+        return set([self._column])
+
+    def mask(self, data):
+        values,nulls = _split_nulls(data[self._column])
+        mask = np.isin(values, _as_column_type(values, self._values))
+        return mask if nulls is None else mask & ~nulls
+
+
+class Function(Predicate):
+    '''
+    User-given function applied to a column
+
+    The function is first called with the whole column array; if the
+    output is a boolean array of the same length it is used as the mask
+    (and the function is flagged 'vectorized' for the next chunks).
+    Otherwise the function is applied element by element.
+    '''
+    def __init__(self, column, function):
+        assert callable(function), "'function' should be a callable"
+        self._column = column
+        self._function = function
+        self._vectorized = None
+
+    def __repr__(self):
+        return '({!s}({!s}))'.format(getattr(self._function, '__name__', 'function'),
+                                     self._column)
+
+    @property
+    def columns(self):
+        return set([self._column])
+
+    @property
+    def vectorized(self):
+        return self._vectorized
+
+    def mask(self, data):
+        values,nulls = _split_nulls(data[self._column])
+        mask = None
+        if self._vectorized is not False:
+            mask = self._try_vectorized(values)
+            self._vectorized = mask is not None
+            if mask is None:
+                logging.debug("Function over '{}' is not vectorizable, "
+                              "applying it per element.".format(self._column))
+        if mask is None:
+            func = self._function
+            mask = np.fromiter((bool(func(v)) for v in values),
+                               dtype=bool, count=len(values))
+        return mask if nulls is None else mask & ~nulls
+
+    def _try_vectorized(self, values):
+        try:
+            mask = self._function(values)
+        except Exception:
+            return None
+        if not isinstance(mask, np.ndarray):
+            return None
+        if mask.dtype.kind != 'b' or mask.shape != (len(values),):
+            return None
+        return mask
+
+
+class And(Predicate):
+    '''
+    Logical conjunction of predicates
+    '''
+    def __init__(self, *predicates):
+        self._predicates = predicates
+
+    def __repr__(self):
+        return '({})'.format(' & '.join(repr(p) for p in self._predicates))
+
+    @property
+    def columns(self):
+        return set().union(*[p.columns for p in self._predicates])
+
+    def mask(self, data):
+        mask = None
+        for pred in self._predicates:
+            _m = pred.mask(data)
+            mask = _m if mask is None else mask & _m
+            if not mask.any():
+                break
+        return mask
+
+
+class Or(Predicate):
+    '''
+    Logical disjunction of predicates
+    '''
+    def __init__(self, *predicates):
+        self._predicates = predicates
+
+    def __repr__(self):
+        return '({})'.format(' | '.join(repr(p) for p in self._predicates))
+
+    @property
+    def columns(self):
+        return set().union(*[p.columns for p in self._predicates])
+
+    def mask(self, data):
+        mask = None
+        for pred in self._predicates:
+            _m = pred.mask(data)
+            mask = _m if mask is None else mask | _m
+            if mask.all():
+                break
+        return mask
+
+
+class Not(Predicate):
+    '''
+    Logical negation of a predicate
+    '''
+    def __init__(self, predicate):
+        self._predicate = predicate
+
+    def __repr__(self):
+        return '~{!r}'.format(self._predicate)
+
+    @property
+    def columns(self):
+        return self._predicate.columns
+
+    def mask(self, data):
+        return ~self._predicate.mask(data)
+
+
+class ColumnRef(object):
+    '''
+    Reference to a column, used to build predicates
+
+    Comparison operators return ~Compare predicates; 'between' and
+    'isin' return ~Range and ~IsIn, respectively; 'apply' wraps a
+    function as a ~Function predicate.
+    '''
+    def __init__(self, name):
+        self._name = name
+
+    def __repr__(self):
+        return 'col({!r})'.format(self._name)
+
+    def __str__(self):
+        return str(self._name)
+
+    @property
+    def name(self):
+        return self._name
+
+    def __eq__(self, value):
+        return Compare(self._name, '==', value)
+
+    def __ne__(self, value):
+        return Compare(self._name, '!=', value)
+
+    def __lt__(self, value):
+        return Compare(self._name, '<', value)
+
+    def __le__(self, value):
+        return Compare(self._name, '<=', value)
+
+    def __gt__(self, value):
+        return Compare(self._name, '>', value)
+
+    def __ge__(self, value):
+        return Compare(self._name, '>=', value)
+
+    __hash__ = object.__hash__
+
+    def between(self, low, high):
+        return Range(self._name, low, high)
+
+    def isin(self, values):
+        return IsIn(self._name, values)
+
+    def apply(self, function):
+        return Function(self._name, function)
+
+def col(name):
+    '''
+    Return a reference to column 'name' to build predicates with
+    '''
+    return ColumnRef(name)
+
+
+def from_filter(filter_rows):
+    '''
+    Return a ~Predicate from the 'filter_rows' argument
+
+    Input:
+     - filter_rows : ~Predicate or {column : select-function}
+            If a dictionary, each function is applied to the respective
+            column; the selection works as AND.
+    Output:
+     - ~Predicate or None (if 'filter_rows' is empty)
+    '''
+    if not filter_rows:
+        return None
+    if isinstance(filter_rows, Predicate):
+        return filter_rows
+    assert isinstance(filter_rows, dict), \
+        "'filter_rows' should be a Predicate or a {column:function} dictionary"
+    preds = []
+    for column, function in filter_rows.items():
+        if isinstance(function, Predicate):
+            preds.append(function)
+        else:
+            preds.append(Function(column, function))
+    if len(preds) == 1:
+        return preds[0]
+    return And(*preds)
+
+
+
+def with_nulls(data, nulls):
+    '''
+    Return 'data' columns with 'nulls' values masked
+
+    Input:
+     - data : ~numpy.recarray
+     - nulls : {column : null value}
+            e.g, the TNULL of FITS integer columns
+    Output:
+     - 'data' itself, if no 'nulls'; otherwise {column : array}, columns
+       in 'nulls' as ~numpy.ma.MaskedArray
+    '''
+    if not nulls:
+        return data
+    columns = dict( (name,data[name]) for name in data.dtype.names )
+    for name,null in nulls.items():
+        columns[name] = np.ma.masked_equal(columns[name], null, copy=False)
+    return columns
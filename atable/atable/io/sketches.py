@@ -0,0 +1,294 @@
+#-*- coding=utf-8 -*-
+'''
+Columns sketches (~utils.stats.ColumnSketch) stored with the tables
+
+Sketches -- count, nulls, min/max, moments, quantiles and distinct
+count of each column -- are computed once, when the table is written
+(~ATable.write, 'sketches=True'), and stored:
+ - in the metatable's meta (the YAML header of 'metatable.ecsv'),
+   key 'sketches';
+ - in FITS files, in the header of a data-less extension ('SKETCHES'),
+   after the table: keywords 'TSKETn' (one JSON string per column, 'n'
+   as in the table's 'TTYPEn');
+ - in the table's meta (key 'sketches') of other formats (ECSV,
+   Parquet/Arrow schema).
+
+Sketches are tied to the data they were computed from, so that a
+table or file modified since does not go with stale sketches:
+ - each sketch has the checksum (CRC32) of its column's values, a
+   sketch is used with a table only if its column has the same
+   checksum (see 'verify');
+ - the 'SKETCHES' extension has the table's number of rows and DATASUM
+   ('TABROWS' and 'TABSUM'), they have to match the table's header.
+   Tables copied through ~astropy.table.Table do not carry the
+   extension along; data rewritten with a new DATASUM (e.g, 'writeto(
+   checksum=True)') no longer matches. Data changed in place keeping
+   the old DATASUM is not noticed from the headers (only by the
+   columns checksums, once the table is read).
+
+Reading them back from a FITS file touches only the headers, not the
+data. Besides describing the columns (~ATable.describe) and binning
+their histograms (~utils.arrays.histogram), they tell when a file can
+not have rows satisfying a selection (see 'may_match').
+'''
+import logging
+
+import re
+import json
+import zlib
+
+from collections import OrderedDict
+
+import numpy as np
+
+# Key of the sketches in metatable/table meta
+META_KEY = 'sketches'
+
+# FITS extension with the sketches, and its keywords: column 'n' sketch,
+# the table's number of rows and DATASUM
+EXTNAME = 'SKETCHES'
+_KEYWORD = 'TSKET{:d}'
+_ROWS = 'TABROWS'
+_DATASUM = 'TABSUM'
+
+# Table meta (keywords) not to be copied to another file: stored
+# sketches and checksums describe the data they were written with
+_STALE_META = re.compile('^({}|TSKET[0-9]+|DATASUM|CHECKSUM)$'.format(META_KEY),
+                         re.IGNORECASE)
+
+
+def compute(table, columns=None, workers=None):
+    '''
+    Return {column : ~ColumnSketch} of 'table' columns (see ~stats.table_stats)
+    '''
+    from ..utils import stats
+    sketches = stats.table_stats(table, columns=columns, workers=workers,
+                                 stats_class=stats.ColumnSketch)
+    for name,sketch in sketches.items():
+        sketch.checksum = checksum(table[name])
+    return sketches
+
+
+def checksum(column):
+    '''
+    Return the CRC32 of 'column' values
+
+    Values are taken in little-endian byte order, strings as unicode
+    as wide as the longest one, masked entries and NaN as zeros (and
+    the mask is part of the checksum): the checksum does not depend on
+    the format the column was read from (e.g, FITS floats are read
+    with NaN masked).
+    '''
+    data = np.ma.getdata(column)
+    mask = np.ma.getmaskarray(column)
+    if data.dtype.kind in 'fc':
+        mask = mask | np.isnan(data)
+    if data.dtype.kind == 'O':
+        data = data.astype(str)
+    if data.dtype.kind in 'SU':
+        width = int(np.char.str_len(data).max()) if data.size else 0
+        data = data.astype('U{:d}'.format(max(width, 1)))
+    little = data.dtype.newbyteorder('<')
+    if little != data.dtype:
+        data = data.astype(little)
+    crc = 0
+    if mask.any():
+        data = np.where(mask, np.zeros(1, dtype=data.dtype), data)
+        crc = zlib.crc32(np.packbits(mask).tobytes())
+    return zlib.crc32(np.ascontiguousarray(data).view(np.uint8).ravel(), crc)
+
+
+def verify(sketches, table):
+    '''
+    Return the 'sketches' computed from 'table' columns data
+
+    Sketches without checksum, of columns not in 'table', or whose
+    columns' values have changed (see 'checksum') are left out.
+    '''
+    valid = OrderedDict()
+    for name,sketch in (sketches or {}).items():
+        if (name in table.colnames and sketch.length == len(table)
+                and sketch.checksum is not None
+                and sketch.checksum == checksum(table[name])):
+            valid[name] = sketch
+    stale = [ name for name in (sketches or {}) if name in table.colnames and name not in valid ]
+    if stale:
+        logging.info("Sketches of columns {} do not match the data, ignored.".format(stale))
+    return valid
+
+
+def strip_meta(meta):
+    '''
+    Return a copy of (table) 'meta' without sketches and data checksums
+
+    Those describe the data they were stored with, not the data
+    written with 'meta' to another file.
+    '''
+    return OrderedDict( (k,v) for k,v in (meta or {}).items()
+                        if not _STALE_META.match(str(k)) )
+
+
+def to_meta(sketches):
+    '''
+    Return {column : dictionary} of 'sketches', to be stored in a meta
+    '''
+    return OrderedDict( (name,sketch.to_dict()) for name,sketch in sketches.items() )
+
+
+def from_meta(meta):
+    '''
+    Return {column : ~ColumnSketch} from table or metatable 'meta' (key 'sketches')
+
+    None if there is none.
+    '''
+    from ..utils.stats import ColumnSketch
+    stored = meta.get(META_KEY) if meta else None
+    if not stored:
+        return None
+    return OrderedDict( (name,ColumnSketch.from_dict(sketch))
+                        for name,sketch in stored.items() )
+
+
+def to_hdu(sketches, table_hdu):
+    '''
+    Return the FITS extension ('SKETCHES') with the sketches of 'table_hdu'
+
+    The table's DATASUM is added to 'table_hdu' header, if not there.
+
+    Input:
+     - sketches : {column : ~ColumnSketch}
+     - table_hdu : ~astropy.io.fits.BinTableHDU
+    '''
+    from astropy.io import fits
+    if 'DATASUM' not in table_hdu.header:
+        table_hdu.add_datasum()
+    header = fits.Header()
+    header['EXTNAME'] = EXTNAME
+    header[_ROWS] = (table_hdu.header['NAXIS2'], "Number of rows of the table")
+    header[_DATASUM] = (str(table_hdu.header['DATASUM']), "DATASUM of the table")
+    for i,name in enumerate(table_hdu.columns.names):
+        if name in sketches:
+            header[_KEYWORD.format(i+1)] = json.dumps(sketches[name].to_dict(),
+                                                      separators=(',',':'))
+    return fits.ImageHDU(header=header)
+
+
+def _from_headers(table, header):
+    '''
+    Return {column : sketch dictionary} from FITS 'SKETCHES' extension 'header'
+
+    Empty if 'header' does not match the 'table' header (number of rows
+    and DATASUM).
+    '''
+    if (table.get('NAXIS2') != header.get(_ROWS) or table.get('DATASUM') is None or
+            str(table.get('DATASUM')).strip() != str(header.get(_DATASUM)).strip()):
+        return {}
+    stored = OrderedDict()
+    for i in range(1, table.get('TFIELDS', 0)+1):
+        value = header.get(_KEYWORD.format(i))
+        if value:
+            stored[str(table['TTYPE{:d}'.format(i)]).strip()] = json.loads(value)
+    return stored
+
+
+def read(filename, format=None):
+    '''
+    Return {column : ~ColumnSketch} stored in 'filename' (None if none)
+
+    Only the file's header (metadata) is read. Sketches of FITS files
+    are given only if they match the table's header (see '_from_headers');
+    for other formats (and for columns values), see 'verify'.
+
+    Input:
+     - filename : string
+     - format : string
+            'fits' (default), 'parquet', 'arrow' or 'ecsv' (also a metatable)
+    '''
+    format = 'fits' if format is None else format.replace('ascii.', '')
+    if format == 'fits':
+        from astropy.io import fits
+        with fits.open(filename) as hdul:
+            try:
+                header = hdul[EXTNAME].header
+            except KeyError:
+                return None
+            stored = _from_headers(hdul[1].header, header)
+        if not stored:
+            logging.warning("Sketches of '{}' do not match its table, ignored.".format(filename))
+        meta = {META_KEY: stored}
+    elif format in ('parquet','arrow'):
+        from . import parquet
+        schema = parquet.schema(filename, format=format)
+        meta = json.loads(((schema.metadata or {}).get(parquet._TABLE_META.encode())
+                           or b'{}').decode())
+    elif format == 'ecsv':
+        meta = _ecsv_meta(filename)
+    else:
+        assert False, "Options for 'format' are ['fits','parquet','arrow','ecsv']"
+    sketches = from_meta(meta)
+    logging.debug("Sketches read from '{}': {}".format(filename,
+                    None if sketches is None else list(sketches)))
+    return sketches
+
+
+def _ecsv_meta(filename):
+    # the YAML header (commented lines) is all we need
+    from astropy.table import meta
+    lines = []
+    with open(filename, 'r') as fp:
+        for line in fp:
+            if not line.startswith('#'):
+                break
+            lines.append(line[2:].rstrip('\n'))
+    # first line is the format ('%ECSV <version>')
+    header = meta.get_header_from_yaml(lines[1:])
+    return header.get('meta', {})
+
+
+def may_match(predicate, sketches):
+    '''
+    Return False if no row can satisfy 'predicate', from columns 'sketches'
+
+    Comparisons, ranges and memberships are checked against the
+    columns' (min,max); anything else (or missing sketches, or columns
+    with nulls) may match.
+
+    Input:
+     - predicate : ~predicates.Predicate or {column : select-function}
+     - sketches : {column : ~ColumnSketch}
+    '''
+    from . import predicates as prd
+    predicate = prd.from_filter(predicate)
+    if predicate is None or not sketches:
+        return True
+    if isinstance(predicate, prd.And):
+        return all( may_match(p, sketches) for p in predicate._predicates )
+    if isinstance(predicate, prd.Or):
+        return any( may_match(p, sketches) for p in predicate._predicates )
+    column = getattr(predicate, '_column', None)
+    sketch = sketches.get(column)
+    if sketch is None or not sketch.numeric:
+        return True
+    if sketch.nulls or not sketch.count:
+        # nulls (NaN, TNULL values) are not in (min,max), but predicates
+        # are evaluated over them too
+        return True
+    low,high = sketch.min,sketch.max
+    try:
+        if isinstance(predicate, prd.Compare):
+            value = float(predicate._value)
+            return { '==': low <= value <= high,
+                     '!=': not (low == high == value),
+                     '<' : low < value,
+                     '<=': low <= value,
+                     '>' : high > value,
+                     '>=': high >= value }[predicate._operator]
+        if isinstance(predicate, prd.Range):
+            return ((predicate._low is None or high >= predicate._low) and
+                    (predicate._high is None or low <= predicate._high))
+        if isinstance(predicate, prd.IsIn):
+            return any( low <= float(v) <= high for v in predicate._values )
+    except (TypeError, ValueError):
+        # not numbers
+        pass
+    return True
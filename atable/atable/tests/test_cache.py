@@ -0,0 +1,46 @@
+import numpy as np
+
+from astropy.table import Table, MaskedColumn
+
+from atable import ATable
+
+
+def _table():
+    t = Table()
+    t['ra'] = np.arange(5.)
+    t['ra'].unit = 'deg'
+    t['ra'].description = 'Right ascension'
+    t['ra'].meta['ucd'] = 'pos.eq.ra'
+    t['n'] = np.arange(5, dtype='i8')
+    t['n'].meta['null'] = -99
+    t['s'] = np.array(['a','b','c','d','e'])
+    t['m'] = MaskedColumn(np.arange(5.), mask=[0,1,0,0,0])
+    return t
+
+
+def _compare_metatables(filename, cache_dir, **kwargs):
+    cold = ATable.read(filename, cache_dir=cache_dir, **kwargs)
+    warm = ATable.read(filename, cache_dir=cache_dir, **kwargs)
+    assert list(cold.colnames) == list(warm.colnames)
+    cold,warm = cold.metatable, warm.metatable
+    assert list(cold.columns) == list(warm.columns)
+    for field in cold.columns:
+        assert repr(list(cold[field].values)) == repr(list(warm[field].values)), field
+
+
+def test_cold_warm_metatable_fits(tmp_path):
+    filename = str(tmp_path / 't.fits')
+    _table().write(filename)
+    _compare_metatables(filename, str(tmp_path / 'cache'))
+
+
+def test_cold_warm_metatable_ecsv(tmp_path):
+    filename = str(tmp_path / 't.ecsv')
+    _table().write(filename, format='ascii.ecsv')
+    _compare_metatables(filename, str(tmp_path / 'cache'), format='ascii.ecsv')
+
+
+def test_cold_warm_metatable_csv(tmp_path):
+    filename = str(tmp_path / 't.csv')
+    _table().write(filename, format='ascii.csv')
+    _compare_metatables(filename, str(tmp_path / 'cache'), format='ascii.csv')
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from astropy.table import MaskedColumn
+
+from atable import ATable
+
+
+def test_from_dataframe_dtypes():
+    df = pd.DataFrame({ 'f':[1.,np.nan,3.],
+                        'i':pd.array([1,None,3], dtype='Int64'),
+                        's':['a',None,'ccc'],
+                        'c':pd.Categorical(['a',None,'bb']),
+                        'k':pd.Categorical([10,20,None]) })
+    tab = ATable.from_dataframe(df)
+    assert list(tab['f'].mask) == [False,True,False]
+    assert tab['i'].dtype.kind == 'i' and list(tab['i'].mask) == [False,True,False]
+    assert list(tab['s'].filled('')) == ['a','','ccc']
+    assert tab['c'].dtype.kind == 'U' and list(tab['c'].mask) == [False,True,False]
+    assert list(tab['c'].filled('')) == ['a','','bb']
+    assert tab['k'].dtype.kind == 'i' and list(tab['k'].filled(0)) == [10,20,0]
+    assert list(tab['k'].mask) == [False,False,True]
+
+
+def test_dataframe_round_trip():
+    tab = ATable()
+    tab['x'] = MaskedColumn(np.array([1,2,3]), mask=[0,1,0])
+    tab['y'] = np.array([1.,2.,3.])
+    tab['s'] = np.array(['a','b','c'])
+    back = ATable.from_dataframe(tab.to_dataframe())
+    for name in tab.colnames:
+        assert list(back[name]) == list(tab[name])
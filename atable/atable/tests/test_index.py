@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+import pytest
+
+from atable import ATable
+from atable.io import index
+
+
+def _csv(filename, nrows, crlf=False, blank=False, last_newline=True, comment=True):
+    eol = '\r\n' if crlf else '\n'
+    lines = (['# comment'] if comment else []) + ['id,x']
+    for i in range(nrows):
+        lines.append('{:d},{:d}'.format(i, i*i))
+        if blank and i % 3 == 0:
+            lines.append('')
+    text = eol.join(lines) + (eol if last_newline else '')
+    with open(filename, 'w', newline='') as fp:
+        fp.write(text)
+    return filename
+
+
+@pytest.mark.parametrize('crlf', [False, True])
+@pytest.mark.parametrize('blank', [False, True])
+@pytest.mark.parametrize('last_newline', [False, True])
+def test_build(tmp_path, crlf, blank, last_newline):
+    filename = _csv(str(tmp_path / 't.csv'), 25, crlf, blank, last_newline)
+    idx = index.RowIndex.build(filename, format='csv', step=4)
+    assert idx.nrows == 25 and len(idx) == 25
+    assert idx.header_lines == 2
+    assert len(idx.offsets) == 7
+    lines = idx.read_lines(0, 25)
+    assert [ l.rstrip(b'\r') for l in lines ] == \
+           [ '{:d},{:d}'.format(i, i*i).encode() for i in range(25) ]
+    rows = idx.read_rows(np.array([0, 5, 6, 23, 24]))
+    assert [ int(l.split(b',')[0]) for l in rows ] == [0, 5, 6, 23, 24]
+
+
+def test_sidecar(tmp_path):
+    filename = _csv(str(tmp_path / 't.csv'), 10)
+    idx = index.get_index(filename, format='csv')
+    sidecar = index.index_filename(filename)
+    assert os.path.isfile(sidecar)
+    loaded = index.RowIndex.load(filename)
+    assert loaded.nrows == idx.nrows and loaded.is_valid()
+    assert list(loaded.offsets) == list(idx.offsets)
+    # file changed: the index is rebuilt
+    _csv(filename, 12)
+    os.utime(filename, ns=(0, 10**9))
+    assert not index.RowIndex.load(filename).is_valid()
+    assert index.nrows(filename, format='csv') == 12
+
+
+def test_read_csv_rows(tmp_path):
+    filename = _csv(str(tmp_path / 't.csv'), 30, blank=True, comment=False)
+    tab = ATable.read(filename, format='csv', rows=[29, 3, 3, 10])
+    assert list(tab['id']) == [3, 10, 29]
+    assert list(tab['x']) == [9, 100, 841]
+    tab = ATable.read(filename, format='csv', rows=slice(5, 8))
+    assert list(tab['id']) == [5, 6, 7]
+    tab = ATable.read(filename, format='csv', rows=0.1)
+    assert len(tab) == 3
+
+
+def test_read_ipac_rows(tmp_path):
+    filename = str(tmp_path / 't.tbl')
+    tab = ATable()
+    tab['id'] = np.arange(50)
+    tab.write(filename, format='ipac')
+    idx = index.get_index(filename, format='ipac', step=7)
+    assert idx.nrows == 50 and idx.header_lines == 4
+    tab = ATable.read(filename, format='ipac', rows=[49, 0, 21])
+    assert list(tab['id']) == [0, 21, 49]
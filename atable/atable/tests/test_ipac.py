@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from astropy.table import Table, MaskedColumn
+
+from atable import ATable
+from atable.io import ipac
+
+
+_IPAC = '''\\fixlen = T
+\\ a comment
+|   id|      ra|  name|   flux|
+|  int|  double|  char|   real|
+|     |     deg|      |    mJy|
+| null|    null|  null|    -99|
+     1    10.5   abc     1.25
+     2    11.5   de      -99
+  null    12.5  null     3.5
+
+     4    13.5   fgh     4.5
+'''
+
+
+@pytest.fixture
+def ipacfile(tmp_path):
+    filename = str(tmp_path / 't.tbl')
+    with open(filename, 'w') as fp:
+        fp.write(_IPAC)
+    return filename
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 2, 100])
+def test_read(ipacfile, chunk_rows):
+    res = ipac.read(ipacfile, chunk_rows=chunk_rows)
+    assert res['names'] == ['id','ra','name','flux']
+    assert res['types'] == [int, float, str, float]
+    assert res['units'] == ['','deg','','mJy']
+    assert res['nulls'] == ['null','null','null','-99']
+    data,masks = res['data'],res['masks']
+    assert list(data['ra']) == [10.5, 11.5, 12.5, 13.5]
+    assert list(masks['id']) == [False,False,True,False]
+    assert list(data['id'][~masks['id']]) == [1,2,4]
+    assert list(data['name']) == ['abc','de','','fgh']
+    assert list(masks['flux']) == [False,True,False,False]
+    assert res['keywords'] == ['\\fixlen = T\n']
+
+
+def test_read_columns_rows(ipacfile):
+    res = ipac.read(ipacfile, columns=['flux','id'], rows=[3,0])
+    assert res['names'] == ['flux','id']
+    assert list(res['data']['flux']) == [1.25, 4.5]
+    assert list(res['data']['id']) == [1, 4]
+    with pytest.raises(AssertionError):
+        ipac.read(ipacfile, rows=[4])
+    with pytest.raises(AssertionError):
+        ipac.read(ipacfile, columns=['dec'])
+
+
+def test_read_as_astropy(ipacfile):
+    tab = ATable.read(ipacfile, format='ipac')
+    ref = Table.read(ipacfile, format='ascii.ipac')
+    assert list(tab.colnames) == list(ref.colnames)
+    for name in ref.colnames:
+        mask = np.ma.getmaskarray(tab[name])
+        assert list(mask) == list(np.ma.getmaskarray(ref[name])), name
+        assert list(np.asarray(tab[name])[~mask]) == list(np.asarray(ref[name])[~mask]), name
+    assert str(tab['ra'].unit) == 'deg'
+
+
+def _table():
+    tab = ATable()
+    tab['id'] = np.array([1, -20, 300], dtype='i8')
+    tab['b'] = np.array([True, False, True])
+    tab['x'] = MaskedColumn(np.array([0.1, 1e-300, -2.5e10]), mask=[0,1,0])
+    tab['x'].unit = 'deg'
+    tab['x'].description = 'X value'
+    tab['s'] = np.array(['a', 'bcd', ''])
+    tab['n'] = MaskedColumn(np.array([7, 8, 9], dtype='i4'), mask=[1,0,0])
+    tab['n'].meta['null'] = -1
+    tab.meta['survey'] = 'test'
+    return tab
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 2, 100])
+def test_write_round_trip(tmp_path, chunk_rows):
+    filename = str(tmp_path / 't.tbl')
+    tab = _table()
+    ipac.write(filename, tab, chunk_rows=chunk_rows)
+    res = ipac.read(filename)
+    assert res['names'] == tab.colnames
+    assert list(res['data']['id']) == [1, -20, 300]
+    assert list(res['data']['b']) == [1, 0, 1]
+    assert res['data']['x'][0] == 0.1 and res['data']['x'][2] == -2.5e10
+    assert list(res['masks']['x']) == [False,True,False]
+    assert list(res['data']['s']) == ['a','bcd','']
+    assert list(res['masks']['n']) == [True,False,False]
+    assert res['nulls'][tab.colnames.index('n')] == '-1'
+    assert res['units'][tab.colnames.index('x')] == 'deg'
+    assert '\\survey = test\n' in res['keywords']
+    assert '\\ __ X value\n' in res['comments']
+
+
+def test_write_read_by_astropy(tmp_path):
+    filename = str(tmp_path / 't.tbl')
+    tab = _table()
+    tab.write(filename, format='ipac')
+    ref = Table.read(filename, format='ascii.ipac')
+    assert list(ref.colnames) == list(tab.colnames)
+    assert list(ref['id']) == [1, -20, 300]
+    assert list(ref['x'].mask) == [False,True,False]
+    assert list(ref['n'].mask) == [True,False,False]
+    assert str(ref['x'].unit) == 'deg'
+
+
+def test_format_integers():
+    values = np.array([0, 7, -7, 123456, -99999, np.iinfo('i8').max])
+    out = ipac.format_integers(values, 20)
+    lines = [ bytes(row).decode() for row in out ]
+    assert lines == [ str(v).rjust(20) for v in values ]
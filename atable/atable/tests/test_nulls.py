@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from atable import ATable
+from atable.utils import nulls
+
+
+def test_null_mask_numeric():
+    assert list(nulls.null_mask(np.array([1., np.nan, -99.]), null=-99)) == [0,1,1]
+    assert list(nulls.null_mask(np.array([1, -99, 3]), null=-99)) == [0,1,0]
+    assert list(nulls.null_mask(np.array([1, -99, 3]), null='-99')) == [0,1,0]
+    # sentinels that do not fit the column type are ignored
+    assert list(nulls.null_mask(np.array([1, 2], dtype='i1'), null=1000)) == [0,0]
+    assert list(nulls.null_mask(np.array([1, 2]), null=1.5)) == [0,0]
+    assert list(nulls.null_mask(np.array([1, 2]), null='  ')) == [0,0]
+    dates = np.array(['2020-01-01', 'NaT'], dtype='M8[D]')
+    assert list(nulls.null_mask(dates)) == [0,1]
+
+
+def test_null_mask_strings():
+    values = np.array(['a', 'nan', 'NA', '', 'none'])
+    assert list(nulls.null_mask(values)) == [0,1,1,0,0]
+    assert list(nulls.null_mask(values, null='none')) == [0,1,1,0,1]
+    assert list(nulls.null_mask(values.astype('S'), null='none')) == [0,1,1,0,1]
+    assert list(nulls.null_mask(values, strings=('',))) == [0,0,0,1,0]
+
+
+def test_null_mask_objects():
+    values = np.array(['a', None, np.nan, 'nan', 3, 'x'], dtype=object)
+    assert list(nulls.null_mask(values)) == [0,1,1,1,0,0]
+    assert list(nulls.null_mask(values, null='x')) == [0,1,1,1,0,1]
+    series = pd.Series(['a', None, 'NA'])
+    assert list(nulls.null_mask(series)) == [0,1,1]
+    assert list(nulls.null_mask(pd.array([1, None, 3], dtype='Int64'))) == [0,1,0]
+
+
+def test_masked_strings():
+    values = np.array(['a', None, 'nan', 1.5, 'a'], dtype=object)
+    out,mask = nulls.masked_strings(values, fill='-')
+    assert list(out) == ['a', '-', '-', '1.5', 'a']
+    assert list(mask) == [0,1,1,0,0]
+    out,mask = nulls.masked_strings(np.array([[1., np.nan], [3., 4.]]))
+    assert out.shape == (2,2) and list(mask.ravel()) == [0,1,0,0]
+    assert out[0,1] == ''
+
+
+def test_masked_strings_unhashable():
+    values = np.empty(3, dtype=object)
+    values[:] = [[1], 'b', np.ma.masked]
+    out,mask = nulls.masked_strings(values)
+    assert list(out) == ['[1]', 'b', '']
+    assert list(mask) == [0,0,1]
+
+
+def test_mask_nulls(tmp_path):
+    filename = str(tmp_path / 't.csv')
+    with open(filename, 'w') as fp:
+        fp.write('x,s,n\n1.5,a,1\nnan,NA,-99\n2.5,,3\n')
+    tab = ATable.read(filename, format='csv')
+    assert list(np.ma.getmaskarray(tab['x'])) == [0,1,0]
+    assert list(np.ma.getmaskarray(tab['s'])) == [0,1,1]
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from astropy.table import MaskedColumn
+
+from atable import ATable
+from atable.io import parquet
+from atable.io.predicates import col
+
+
+def _table():
+    tab = ATable()
+    tab['ra'] = np.arange(5.)
+    tab['ra'].unit = 'deg'
+    tab['ra'].description = 'Right ascension'
+    tab['ra'].meta['ucd'] = 'pos.eq.ra'
+    tab['dec'] = -np.arange(5.)
+    tab['dec'].meta['ucd'] = 'pos.eq.dec'
+    tab['x'] = MaskedColumn(np.array([1,5,0,5,7], dtype='i8'), mask=[0,0,1,0,0])
+    tab['x'].meta['null'] = -99
+    tab['s'] = np.array(['a','bb','','d','e'])
+    tab['v'] = np.arange(10.).reshape(5,2)
+    tab.meta['survey'] = 'test'
+    return tab
+
+
+@pytest.fixture(params=['parquet','arrow'])
+def filename(request, tmp_path):
+    filename = str(tmp_path / ('t.' + request.param))
+    _table().write(filename, format=request.param, chunk_rows=2)
+    return filename, request.param
+
+
+def test_round_trip(filename):
+    filename,format = filename
+    tab = ATable.read(filename, format=format)
+    ref = _table()
+    assert list(tab.colnames) == list(ref.colnames)
+    assert str(tab['ra'].unit) == 'deg'
+    assert tab['ra'].description == 'Right ascension'
+    assert tab['dec'].meta['ucd'] == 'pos.eq.dec'
+    assert tab['x'].meta['null'] == -99
+    assert list(tab['x'].mask) == [False,False,True,False,False]
+    assert list(tab['s']) == list(ref['s'])
+    assert tab['v'].shape == (5,2) and np.all(tab['v'] == ref['v'])
+    assert tab.meta['survey'] == 'test'
+
+
+def test_columns_ucds(filename):
+    filename,format = filename
+    tab = ATable.read(filename, format=format, columns=['x'], ucds=['pos.eq.dec'])
+    assert list(tab.colnames) == ['x','dec']
+    tab = ATable.read(filename, format=format, ucds=['pos.eq'])
+    assert list(tab.colnames) == ['ra','dec']
+
+
+def test_filter(filename):
+    filename,format = filename
+    tab = ATable.read(filename, format=format, filter_rows=(col('ra') > 1) & (col('s') != 'd'))
+    assert list(tab['ra']) == [2.,4.]
+    tab = ATable.read(filename, format=format, columns=['ra'],
+                      filter_rows=col('dec').apply(lambda v: v < -2))
+    assert list(tab.colnames) == ['ra']
+    assert list(tab['ra']) == [3.,4.]
+
+
+def test_split_predicate():
+    function = col('x').apply(lambda v: v > 0)
+    pushed,rest = parquet.split_predicate((col('x') > 1) & function)
+    assert pushed is not None and rest is function
+    pushed,rest = parquet.split_predicate((col('x') > 1) | function)
+    assert pushed is None and rest is not None
+
+
+_NULL_PREDICATES = [ col('x') != 5, ~(col('x') == 5), col('x') < 5, col('x') >= 0,
+                     col('x').between(0,3), col('x').isin([0,1]), ~col('x').isin([1]),
+                     (col('x') != 5) | (col('ra') > 3), ~((col('x') == 5) & (col('ra') < 4)),
+                     col('x').apply(lambda v: v < 5) ]
+
+@pytest.mark.parametrize('predicate', _NULL_PREDICATES, ids=repr)
+def test_null_rule(tmp_path, predicate):
+    # nulls select the same rows whatever the format (see ~predicates)
+    tab = _table()
+    del tab['v']
+    files = {}
+    for format,ext in (('parquet','parquet'),('arrow','arrow'),('fits','fits')):
+        files[format] = str(tmp_path / ('t.' + ext))
+        tab.write(files[format], format=format)
+    expected = predicate.mask({'x':tab['x'], 'ra':tab['ra']}).sum()
+    assert len(ATable.read(files['parquet'], format='parquet', filter_rows=predicate)) == expected
+    assert len(ATable.read(files['arrow'], format='arrow', filter_rows=predicate)) == expected
+    assert len(ATable.read(files['fits'], filter_rows=predicate)) == expected
+    assert len(ATable.read(files['fits'], filter_rows=predicate, memmap=True)) == expected
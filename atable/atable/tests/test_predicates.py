@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+from astropy.table import Table
+
+from atable import ATable
+from atable.io import _fitsio, predicates
+from atable.io.predicates import col
+
+
+def _data():
+    data = np.zeros(6, dtype=[('mag','f8'), ('ra','f8'), ('type','S4')])
+    data['mag'] = [18., 19., 20., 21., np.nan, 22.]
+    data['ra'] = [5., 10., 15., 20., 25., 30.]
+    data['type'] = [b'star', b'qso', b'star', b'gal', b'star', b'qso']
+    return data
+
+
+def test_compare():
+    data = _data()
+    assert list((col('mag') < 20).mask(data)) == [1,1,0,0,0,0]
+    assert list((col('mag') >= 21).mask(data)) == [0,0,0,1,0,1]
+    assert list((col('mag') == 20).mask(data)) == [0,0,1,0,0,0]
+    assert list((col('mag') != 20).mask(data)) == [1,1,0,1,1,1]
+    assert list((col('type') == 'star').mask(data)) == [1,0,1,0,1,0]
+
+
+def test_range_isin():
+    data = _data()
+    assert list(col('ra').between(10,20).mask(data)) == [0,1,1,1,0,0]
+    assert list(col('ra').between(None,10).mask(data)) == [1,1,0,0,0,0]
+    assert list(col('type').isin(['qso','gal']).mask(data)) == [0,1,0,1,0,1]
+
+
+def test_combine():
+    data = _data()
+    pred = (col('mag') < 21) & col('ra').between(10,20)
+    assert list(pred.mask(data)) == [0,1,1,0,0,0]
+    pred = pred | (col('type') == 'gal')
+    assert list(pred.mask(data)) == [0,1,1,1,0,0]
+    assert list((~pred).mask(data)) == [1,0,0,0,1,1]
+    assert pred.columns == set(['mag','ra','type'])
+
+
+def test_function():
+    data = _data()
+    vectorized = col('ra').apply(lambda v: v > 12)
+    assert list(vectorized.mask(data)) == [0,0,1,1,1,1]
+    assert vectorized.vectorized is True
+    scalar = col('type').apply(lambda v: v.decode().startswith('s'))
+    assert list(scalar.mask(data)) == [1,0,1,0,1,0]
+    assert scalar.vectorized is False
+
+
+def test_from_filter():
+    data = _data()
+    assert predicates.from_filter(None) is None
+    assert predicates.from_filter({}) is None
+    pred = col('mag') < 20
+    assert predicates.from_filter(pred) is pred
+    pred = predicates.from_filter({'ra':lambda v: v > 12, 'mag':col('mag') < 22})
+    assert isinstance(pred, predicates.And)
+    assert list(pred.mask(data)) == [0,0,1,1,0,0]
+    with pytest.raises(AssertionError):
+        predicates.from_filter([col('mag') < 20])
+
+
+def test_with_nulls():
+    data = np.zeros(3, dtype=[('n','>i4'), ('x','f8')])
+    data['n'] = [1, -99, 3]
+    masked = predicates.with_nulls(data, {'n':-99})
+    assert list(np.ma.getmaskarray(masked['n'])) == [False,True,False]
+    assert list((col('n') < 5).mask(masked)) == [1,0,1]
+    assert list((col('n') != 1).mask(masked)) == [0,1,1]
+    assert predicates.with_nulls(data, {}) is data
+
+
+@pytest.fixture
+def fitsfile(tmp_path):
+    filename = str(tmp_path / 't.fits')
+    t = Table()
+    t['id'] = np.arange(1000)
+    t['x'] = np.arange(1000) % 7
+    t['y'] = np.arange(1000) * 0.5
+    t.write(filename)
+    return filename
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 64, 1000, 5000])
+def test_read_filtered_chunks(fitsfile, chunk_rows):
+    handler = _fitsio.get_handler(fitsfile)
+    pred = (col('x') == 3) & (col('y') < 300)
+    projection = _fitsio.Projection(handler, ['id'], pred)
+    data = _fitsio.read_filtered_from_handler(handler, pred, projection,
+                                              chunk_rows=chunk_rows)
+    ids = np.arange(1000)
+    assert data.dtype.names == ('id',)
+    assert list(data['id']) == list(ids[(ids % 7 == 3) & (ids < 600)])
+    assert projection.read == ['id','x','y'] and projection.drop == ['x','y']
+    assert projection.bytes_read == 1000 * projection.row_bytes
+
+
+def test_read_filtered_rows(fitsfile):
+    handler = _fitsio.get_handler(fitsfile)
+    pred = col('x') == 0
+    cases = [ ([slice(100,200), slice(500,520)], list(range(100,200)) + list(range(500,520))),
+              ([3, 7, 14, 700, 15], [3, 7, 14, 15, 700]) ]
+    for rows,scanned in cases:
+        projection = _fitsio.Projection(handler, None, pred)
+        data = _fitsio.read_filtered_from_handler(handler, pred, projection, rows=rows)
+        assert list(data['id']) == [ i for i in scanned if i % 7 == 0 ]
+
+
+def test_read_filtered_none(fitsfile):
+    tab = ATable.read(fitsfile, filter_rows=col('x') > 10)
+    assert len(tab) == 0
+    assert list(tab.colnames) == ['id','x','y']
+
+
+def test_read_filter_rows(fitsfile):
+    expected = [ i for i in range(1000) if i % 7 == 2 and i > 900 ]
+    for filter_rows in ((col('x') == 2) & (col('id') > 900),
+                        {'x':lambda v: v == 2, 'id':lambda v: v > 900}):
+        for memmap in (False, True):
+            tab = ATable.read(fitsfile, columns=['id'], filter_rows=filter_rows,
+                              memmap=memmap)
+            assert list(tab['id']) == expected
@@ -0,0 +1,41 @@
+import numpy as np
+
+from astropy.table import Table
+
+from atable import ATable
+from atable.io.predicates import col
+
+
+def _tile(filename, start, order=('ra','dec','mag')):
+    t = Table()
+    values = { 'ra':np.arange(start, start+5.),
+               'dec':-np.arange(start, start+5.),
+               'mag':np.arange(5, dtype='i4') + start }
+    for name in order:
+        t[name] = values[name]
+    t.write(filename)
+    return filename
+
+
+def test_read_many_concatenates(tmp_path):
+    files = [ _tile(str(tmp_path / 't{:d}.fits'.format(i)), 10*i) for i in range(3) ]
+    tab = ATable.read_many(files, workers=1)
+    assert len(tab) == 15
+    assert list(tab['ra']) == [ 10.*i + j for i in range(3) for j in range(5) ]
+
+
+def test_read_many_column_order(tmp_path):
+    files = [ _tile(str(tmp_path / 't.fits'), 0),
+              _tile(str(tmp_path / 'u.fits'), 10, order=('dec','mag','ra')) ]
+    for names in (None, ['dec','ra']):
+        tab = ATable.read_many(files[::-1], columns=names, workers=1)
+        assert list(tab.colnames) == (names or ['dec','mag','ra'])
+        assert np.all(tab['dec'] == -tab['ra'])
+        assert list(tab['ra']) == [10.,11.,12.,13.,14.,0.,1.,2.,3.,4.]
+
+
+def test_read_many_filter(tmp_path):
+    files = [ _tile(str(tmp_path / 't{:d}.fits'.format(i)), 10*i) for i in range(3) ]
+    tab = ATable.read_many(files, filter_rows=col('ra') > 12, workers=1)
+    assert list(tab['ra']) == [13.,14.,20.,21.,22.,23.,24.]
+    assert list(tab['mag']) == [13,14,20,21,22,23,24]
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from astropy.table import Table
+
+from atable import ATable
+from atable.utils import data
+
+
+_SIZES = [ (1000,0.1,100), (50000,0.1,5000), (25000,0.5,12500),
+           (25000,21000,21000), (25000,0.999,24975), (7,0.5,3), (10,25,10) ]
+
+
+def _nrows(rows):
+    if data.is_slices(rows):
+        return sum( s.stop - s.start for s in rows )
+    return len(rows)
+
+
+@pytest.mark.parametrize('nrows,fraction,size', _SIZES)
+@pytest.mark.parametrize('method', ['uniform','block'])
+def test_sample_size(method, nrows, fraction, size):
+    rows = data.sample(nrows, fraction, method=method, seed=1)
+    assert _nrows(rows) == size
+    if data.is_slices(rows):
+        rows = np.concatenate([ np.arange(s.start, s.stop) for s in rows ])
+    assert len(np.unique(rows)) == size
+    assert rows.min() >= 0 and rows.max() < nrows
+
+
+@pytest.mark.parametrize('nrows,fraction,size', _SIZES)
+def test_sample_size_bernoulli(nrows, fraction, size):
+    rows = data.sample(nrows, fraction, method='bernoulli', seed=1)
+    assert abs(len(rows) - size) <= 5 * np.sqrt(size) + 1
+    assert np.all(np.diff(rows) > 0)
+
+
+def test_sample_seed():
+    for method in ('uniform','bernoulli','block'):
+        first = data.sample(50000, 0.1, method=method, seed=3)
+        again = data.sample(50000, 0.1, method=method, seed=3)
+        assert repr(first) == repr(again)
+
+
+def test_sample_array():
+    arrei = np.arange(1000)
+    sample = data.sample(arrei, 0.1, seed=1)
+    assert len(sample) == 100
+    assert len(np.unique(sample)) == 100
+
+
+def test_reservoir_sample():
+    chunks = ( np.arange(start, start+300) for start in range(0, 3000, 300) )
+    sample = data.reservoir_sample(chunks, 100, seed=1)
+    assert len(sample) == 100
+    assert len(np.unique(sample)) == 100
+    short = data.reservoir_sample([np.arange(30), np.arange(30,50)], 100, seed=1)
+    assert list(short) == list(range(50))
+
+
+@pytest.mark.parametrize('method', ['uniform','block'])
+@pytest.mark.parametrize('memmap', [False,True])
+def test_read_sampled(tmp_path, method, memmap):
+    filename = str(tmp_path / 't.fits')
+    t = Table()
+    t['x'] = np.arange(1000)
+    t.write(filename)
+    tab = ATable.read(filename, rows=0.1, sampling=method, seed=1, memmap=memmap)
+    assert len(tab) == 100
+    assert len(np.unique(tab['x'])) == 100
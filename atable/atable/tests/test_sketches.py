@@ -0,0 +1,68 @@
+import numpy as np
+
+from astropy.table import MaskedColumn
+
+from atable import ATable
+from atable.io import sketches
+from atable.io.predicates import col
+
+
+def _write(filename, **columns):
+    tab = ATable()
+    for name,values in columns.items():
+        tab[name] = values
+    tab.write(filename, sketches=True, overwrite=True)
+    return filename
+
+
+def _count(filenames, predicate):
+    direct = sum( len(ATable.read(f, filter_rows=predicate)) for f in filenames )
+    many = len(ATable.read_many(filenames, filter_rows=predicate, workers=1))
+    return direct, many
+
+
+def test_may_match_ranges(tmp_path):
+    filename = _write(str(tmp_path / 'a.fits'), x=np.array([1.,2.,3.]))
+    stored = sketches.read(filename)
+    assert not sketches.may_match(col('x') > 3, stored)
+    assert not sketches.may_match(col('x').between(4,5), stored)
+    assert not sketches.may_match(col('x').isin([0,7]), stored)
+    assert sketches.may_match(col('x') >= 3, stored)
+    assert sketches.may_match((col('x') > 5) | (col('x') < 2), stored)
+    assert not sketches.may_match((col('x') > 2) & (col('x') > 5), stored)
+
+
+def test_read_many_nan(tmp_path):
+    files = [ _write(str(tmp_path / 'a.fits'), x=np.array([5.,5.,np.nan])),
+              _write(str(tmp_path / 'b.fits'), x=np.array([1.,5.,7.])) ]
+    for predicate in (col('x') != 5, ~(col('x') == 5), col('x') > 6):
+        direct,many = _count(files, predicate)
+        assert direct == many, predicate
+    assert _count(files, col('x') != 5) == (3,3)
+
+
+def test_read_many_tnull(tmp_path):
+    x = MaskedColumn(np.array([5,5,-99], dtype='i4'), mask=[0,0,1], fill_value=-99)
+    files = [ _write(str(tmp_path / 'a.fits'), x=x),
+              _write(str(tmp_path / 'b.fits'), x=np.array([1,5,7], dtype='i4')) ]
+    for predicate in (col('x') != 5, col('x') < 0, col('x').isin([-99])):
+        direct,many = _count(files, predicate)
+        assert direct == many, predicate
+
+
+def test_sketches_nan_round_trip(tmp_path):
+    filename = _write(str(tmp_path / 'a.fits'), x=np.array([1.,np.nan,3.]),
+                      y=np.arange(3))
+    tab = ATable.read(filename)
+    assert list(tab.sketches) == ['x','y']
+    assert tab.sketches['x'].nulls == 1
+    tab.describe()
+
+
+def test_sketches_file_removed(tmp_path):
+    import os
+    filename = _write(str(tmp_path / 'a.fits'), x=np.array([1.,2.,3.]))
+    tab = ATable.read(filename)
+    os.remove(filename)
+    assert tab.sketches is None
+    assert tab.describe() is not None
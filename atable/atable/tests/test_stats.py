@@ -0,0 +1,133 @@
+import numpy as np
+import pytest
+
+from astropy.table import MaskedColumn
+
+from atable import ATable
+from atable.utils import stats
+
+
+def _values(n=10000, seed=1):
+    return np.random.default_rng(seed).normal(10., 3., n)
+
+
+def test_stream_stats():
+    values = _values()
+    values[::100] = np.nan
+    mask = np.zeros(values.size, dtype=bool)
+    mask[1::50] = True
+    sts = stats.StreamStats().update(values, mask).result()
+    valid = values[~mask & ~np.isnan(values)]
+    assert sts['length'] == values.size
+    assert sts['count'] == valid.size
+    assert sts['nulls'] == values.size - valid.size
+    assert sts['min'] == valid.min() and sts['max'] == valid.max()
+    assert np.isclose(sts['mean'], valid.mean())
+    assert np.isclose(sts['std'], valid.std())
+    assert abs(sts['50%'] - np.median(valid)) < 0.1
+
+
+def test_stream_stats_non_numeric():
+    values = np.ma.MaskedArray(['a','b','c'], mask=[0,1,0])
+    sts = stats.StreamStats().update(values).result()
+    assert list(sts.items()) == [('length',3), ('count',2), ('nulls',1)]
+    sts = stats.StreamStats().update(np.array([], dtype=float)).result()
+    assert sts['count'] == 0 and np.isnan(sts['mean'])
+
+
+def test_stream_stats_merge():
+    values = _values()
+    whole = stats.StreamStats().update(values)
+    half = stats.StreamStats().update(values[:3000])
+    half.merge(stats.StreamStats().update(values[3000:]))
+    for key,value in whole.result().items():
+        assert np.isclose(half.result()[key], value, rtol=1e-2), key
+
+
+@pytest.mark.parametrize('n', [10, 1000, 100000])
+def test_quantile_sketch(n):
+    values = _values(n)
+    sketch = stats.QuantileSketch(seed=3)
+    for part in np.array_split(values, 7):
+        sketch.update(part)
+    q = np.linspace(0, 1, 21)
+    estimated = sketch.quantiles(q)
+    if n <= stats._SKETCH_K:
+        # nothing compacted: exact
+        assert np.allclose(estimated, np.percentile(values, q*100))
+        assert list(sketch.cdf(values)) == list(np.argsort(np.argsort(values)) / n)
+    else:
+        ranks = np.searchsorted(np.sort(values), estimated) / n
+        assert np.abs(ranks - q).max() < 0.02
+        assert np.allclose(sketch.cdf(estimated), ranks, atol=0.02)
+    assert estimated[0] == values.min() and estimated[-1] == values.max()
+
+
+def test_quantile_sketch_merge():
+    values = _values(50000)
+    sketch = stats.QuantileSketch(seed=1).update(values[:20000])
+    sketch.merge(stats.QuantileSketch(seed=2).update(values[20000:]))
+    median = sketch.quantiles([0.5])[0]
+    assert abs((values <= median).mean() - 0.5) < 0.02
+
+
+def test_distinct_sketch():
+    values = np.random.default_rng(0).integers(0, 20000, 100000)
+    expected = np.unique(values).size
+    sketch = stats.DistinctSketch().update(values[:50000])
+    sketch.merge(stats.DistinctSketch().update(values[50000:]))
+    assert abs(sketch.estimate() / expected - 1) < 0.05
+    assert stats.DistinctSketch().update(np.array(['a','b','a'])).estimate() == pytest.approx(2, abs=0.1)
+
+
+def test_column_sketch():
+    values = _values()
+    sketch = stats.ColumnSketch()
+    sketch.update(values)
+    sketch.checksum = 123
+    counts,edges = sketch.histogram(bins=20)
+    expected,_ = np.histogram(values, bins=edges)
+    assert counts.sum() == pytest.approx(values.size)
+    assert np.abs(counts - expected).max() < 0.02 * values.size
+    back = stats.ColumnSketch.from_dict(sketch.to_dict())
+    assert back.checksum == 123
+    for key,value in sketch.result().items():
+        assert back.result()[key] == pytest.approx(value, rel=1e-2), key
+    assert np.allclose(back.histogram(bins=edges)[0], counts, atol=0.01 * values.size)
+    # the grid is kept through another round trip
+    again = stats.ColumnSketch.from_dict(back.to_dict())
+    assert again.to_dict() == back.to_dict()
+
+
+def _table():
+    tab = ATable()
+    tab['x'] = _values(5000)
+    tab['n'] = MaskedColumn(np.arange(5000), mask=np.arange(5000) % 10 == 0)
+    tab['s'] = np.array(['a','b'] * 2500)
+    return tab
+
+
+def test_table_stats():
+    tab = _table()
+    serial = stats.table_stats(tab, workers=1)
+    threads = stats.table_stats(tab, workers=3)
+    assert list(serial) == list(threads) == tab.colnames
+    for name in tab.colnames:
+        assert serial[name].result() == threads[name].result()
+    assert serial['n'].nulls == 500
+    chunks = [ tab[i:i+1200] for i in range(0, len(tab), 1200) ]
+    merged = stats.chunks_stats(chunks, columns=['x','n'])
+    assert list(merged) == ['x','n']
+    for name in merged:
+        for key,value in serial[name].result().items():
+            assert merged[name].result()[key] == pytest.approx(value, rel=1e-2), key
+    assert stats.chunks_stats([]) == {}
+
+
+def test_describe():
+    tab = _table()
+    desc = tab.describe()
+    assert list(desc.columns) == tab.colnames
+    assert desc['n']['nulls'] == 500 and desc['n']['count'] == 4500
+    assert desc['x']['mean'] == pytest.approx(tab['x'].mean())
+    assert desc['s']['count'] == 5000
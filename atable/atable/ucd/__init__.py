@@ -1,7 +1,13 @@
 # -*- coding:utf-8 -*-
 
 from ._ucd import UCDAtom, UCDWord, UCD
+from ._matrix import UCDMatrix
+from ._validator import validate_ucd, validate_ucds, is_valid_ucd, validate_metatable
 
-from .ivoa import structure
-Roots = structure.init_roots()
-del structure
+from .ivoa.vocabulary import get_vocabulary
+
+def __getattr__(name):
+    # 'Roots' is built at first access (see ~ivoa.vocabulary)
+    if name == 'Roots':
+        return get_vocabulary().roots
+    raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
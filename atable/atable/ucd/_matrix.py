@@ -0,0 +1,98 @@
+# -*- coding:utf-8 -*-
+'''
+Boolean (columns x UCD-prefixes) matrix for matching columns by UCD
+
+Each table column is a row of the matrix; each matrix column is a
+UCD prefix -- whole atoms, like 'pos', 'pos.eq', 'pos.eq.ra' -- found
+in the table. Element [i,j] is True if some word of the i-th column's
+UCD starts with the j-th prefix. Matching many UCDs is then a numpy
+reduction ('any'/'all') over the selected matrix columns.
+'''
+import logging
+
+import numpy as np
+
+from ._ucd import UCD, UCDWord
+
+
+class UCDMatrix(object):
+    '''
+    Precomputed UCD-prefix matrix of a set of columns
+
+    Input:
+     - ucds : list of ~UCD (or strings)
+            UCD of each column
+     - names : list of strings
+            Column names (default, positions)
+    '''
+    def __init__(self, ucds, names=None):
+        self._ucds = [ UCD(u) for u in ucds ]
+        self._names = list(range(len(self._ucds))) if names is None else list(names)
+        assert len(self._names) == len(self._ucds)
+        self._prefixes = {}
+        rows, cols = [], []
+        for i,ucd in enumerate(self._ucds):
+            for word in ucd:
+                for prefix in word.prefixes:
+                    j = self._prefixes.setdefault(prefix, len(self._prefixes))
+                    rows.append(i)
+                    cols.append(j)
+        self._matrix = np.zeros((len(self._ucds), len(self._prefixes)), dtype=bool)
+        self._matrix[rows, cols] = True
+        logging.debug("UCD matrix: {:d} columns x {:d} prefixes".format(*self._matrix.shape))
+
+    def __len__(self):
+        return len(self._names)
+
+    @property
+    def matrix(self):
+        return self._matrix
+
+    @property
+    def names(self):
+        return self._names
+
+    @property
+    def prefixes(self):
+        return list(self._prefixes.keys())
+
+    def column(self, ucd):
+        '''
+        Return the boolean vector of columns related to 'ucd'
+
+        'ucd' is a word or prefix (e.g, 'pos.eq'); a multi-word UCD
+        is related to columns having all of its words. Strings other
+        than whole-atoms prefixes are searched as substrings of the
+        columns' UCD words.
+        '''
+        if isinstance(ucd, UCD) and len(ucd) != 1:
+            return self.match(ucd.words, match='all') if len(ucd) else \
+                    np.zeros(len(self), dtype=bool)
+        key = str(ucd).strip()
+        j = self._prefixes.get(key)
+        if j is not None:
+            return self._matrix[:, j]
+        if not isinstance(ucd, (UCD, UCDWord)) and ';' in key:
+            return self.column(UCD(key))
+        return np.array([ any(key in str(w) for w in u) for u in self._ucds ], dtype=bool)
+
+    def match(self, ucds, match='any'):
+        '''
+        Return boolean vector of columns matching 'any' or 'all' of 'ucds'
+        '''
+        assert match in ('any','all'), "Options for 'match' are ['all','any']"
+        if isinstance(ucds, (str, UCD, UCDWord)):
+            ucds = [ucds]
+        if not len(ucds):
+            return np.zeros(len(self), dtype=bool)
+        selection = np.column_stack([ self.column(u) for u in ucds ])
+        if match == 'any':
+            return selection.any(axis=1)
+        return selection.all(axis=1)
+
+    def colnames(self, ucds, match='any'):
+        '''
+        Return names of columns matching 'any' or 'all' of 'ucds'
+        '''
+        indx = np.flatnonzero(self.match(ucds, match))
+        return [ self._names[i] for i in indx ]
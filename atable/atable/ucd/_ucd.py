@@ -1,9 +1,20 @@
 # -*- coding:utf-8 -*-
+'''
+UCD representation: atoms, words and (composite) UCDs
+
+All objects are immutable and compact (no instance '__dict__'):
+a ~UCDWord is a tuple of interned atom strings ('pos.eq.ra' is
+('pos','eq','ra')), a ~UCD is a tuple of (interned) words. String
+forms and hashes are computed once, at creation.
+'''
+import sys
 
 from collections import OrderedDict
 
+# Maximum number of (distinct) UCD strings kept interned
+_INTERN_SIZE = 4096
+
 def _is_string(word):
-    import sys
     if sys.version_info.major == 3:
         # Python 3
         return isinstance(word,str)
@@ -12,29 +23,47 @@ def _is_string(word):
         return isinstance(word,(str,unicode))
 
 class UCDBase(object):
+    __slots__ = ()
+
     def __eq__(self,other):
         return self.__repr__() == repr(other)
 
+    def __ne__(self,other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(repr(self))
+
     def copy(self):
-        return eval(self.__repr__())
+        # immutable objects
+        return self
 
 class UCDAtom(UCDBase):
     '''
+    Node of the UCD vocabulary tree, like the root atoms (see ~Roots)
+
+    Children are kept in a dictionary, '{atom-string : UCDAtom}'.
     '''
+    __slots__ = ('_atom','_family','_description','_parent','_children')
+
     def __init__(self,atom,family=None,description=None,parent=None,children=None):
-        self._atom = atom
+        self._atom = sys.intern(atom) if _is_string(atom) else atom
         self._family = family
         self._description = description
         self._parent = parent
 
         assert not children
-        self._children = []
+        self._children = OrderedDict()
 
     def __eq__(self,other):
         return str(self) == str(other)
 
-    def __nonzero__(self):
+    def __hash__(self):
+        return hash(str(self))
+
+    def __bool__(self):
         return not self._atom is None
+    __nonzero__ = __bool__
 
     def __str__(self):
         return str(self._atom)
@@ -45,22 +74,19 @@ class UCDAtom(UCDBase):
                 family = self._family,
                 description = self._description,
                 parent = self._parent,
-                children = self._children
+                children = self.children
         )
         return 'UCDAtom({args})'.format(args=_args)
 
     def has_child(self,atom):
-        return atom in self.children
+        return str(atom) in self._children
 
     def add_child(self,atom):
         assert isinstance(atom,UCDAtom)
-        if not atom in self._children:
-            self._children.append(atom)
+        self._children.setdefault(str(atom), atom)
 
     def get_child(self,atom):
-        assert isinstance(atom,UCDAtom)
-        i_child = self.children.index(atom)
-        return self.children[i_child]
+        return self._children[str(atom)]
 
     @property
     def is_root(self):
@@ -76,7 +102,7 @@ class UCDAtom(UCDBase):
 
     @property
     def children(self):
-        return self._children
+        return list(self._children.values())
 
     @property
     def description(self):
@@ -88,44 +114,61 @@ class UCDAtom(UCDBase):
 
 class UCDWord(UCDBase):
     '''
+    A UCD word, like 'pos.eq.ra', as the tuple of its (interned) atoms
+
+    Every prefix of the word ('pos', 'pos.eq', 'pos.eq.ra') is kept in
+    a set: 'has_prefix' is a set lookup.
     '''
+    __slots__ = ('_atoms','_namespace','_description','_string','_prefixes','_hash')
+
     def __init__(self, word, namespace='ivoa', description=None):
         assert _is_string(word)
         #TODO: we need an assert for the namespace. It would go through a list of available ones in the lib
-        self._word = self.process_word(word)
-        self._namespace = namespace
+        self._atoms = self.process_word(word)
+        self._namespace = sys.intern(namespace)
         self._description = description
+        _word = '.'.join(self._atoms)
+        self._string = _word if namespace == 'ivoa' else ':'.join([namespace,_word])
+        self._prefixes = frozenset( '.'.join(self._atoms[:i+1])
+                                    for i in range(len(self._atoms)) )
+        self._hash = hash((self._namespace,self._atoms))
+
+    def __reduce__(self):
+        return (UCDWord, ('.'.join(self._atoms), self._namespace, self._description))
+
+    def __eq__(self,other):
+        if isinstance(other,UCDWord):
+            return self._atoms == other._atoms and self._namespace == other._namespace
+        return str(self) == str(other)
+
+    def __hash__(self):
+        return self._hash
 
     def __len__(self):
-        return len(self._word)
+        return len(self._atoms)
 
     def __iter__(self):
-        for a in self._word:
-            yield a
+        return iter(self._atoms)
 
     def __str__(self):
-        _ns,_word = self.to_string().split(':')
-        if _ns == 'ivoa':
-            return _word
-        return ':'.join([ _ns,_word ])
+        return self._string
 
     def __repr__(self):
-        _ns,_word = self.to_string().split(':')
         _args = '{word!r},{namespace!r},{description!r}'.format(
-                word = _word,
-                namespace = _ns,
+                word = '.'.join(self._atoms),
+                namespace = self._namespace,
                 description = self._description
         )
         return 'UCDWord({args})'.format(args=_args)
 
     def to_string(self):
-        _word = '.'.join([ str(atom) for atom in self._word ])
-        _ns = self._namespace
-        return ':'.join([ _ns,_word ])
-
-    def process_word(self,word):
-        out = list()
+        return ':'.join([ self._namespace,'.'.join(self._atoms) ])
 
+    @staticmethod
+    def process_word(word):
+        '''
+        Return the tuple of (interned) atoms of 'word'
+        '''
         def clean_word(word,separator='.'):
             '''
             A UCD word can have '.' in it, and probably a delimiting ';'
@@ -138,82 +181,109 @@ class UCDWord(UCDBase):
             word = word.strip()
             return word
         assert word == clean_word(word), "more then one ucd-word given ('{}'), I can handle only one".format(word)
+        return tuple( sys.intern(atom) for atom in word.split('.') )
 
-        #REVIEW: with this local import I skip a circular reference between Roots and UCDAtom. Not really proud of it... õ.O
-        # from booq.ucd import Roots
-        atoms = word.split('.')
-
-        atom_root = atoms[0]
-        # assert Roots.has_key(atom_root)
-        # REVIEW: decide whether root has to be copied (so forming a completely new tree)
-        # atom = Roots[atom_root].copy()
-        # out.append(atom)
-        # parent = atom
-        parent = None
-        for atom in atoms:
-            atom = UCDAtom(atom, parent=parent)
-            out.append( atom )
-            parent = atom
-        for i_parent,i_child in zip(range(len(out)),range(1,len(out))):
-            atom = out[i_parent]
-            child = out[i_child]
-            atom.add_child(child)
-        return out
+    @property
+    def atoms(self):
+        return self._atoms
+
+    @property
+    def prefixes(self):
+        return self._prefixes
 
     @property
     def root(self):
-        return self._word[0]
+        '''
+        Root atom (~UCDAtom from ~Roots, if a known root)
+        '''
+        from . import Roots
+        _root = self._atoms[0]
+        return Roots.get(_root) or UCDAtom(_root)
     family = root
 
     @property
     def scope(self):
         return self.root.scope
 
+    def has_prefix(self,prefix):
+        '''
+        Return True if word starts with (whole atoms) 'prefix', e.g. 'pos.eq'
+        '''
+        return str(prefix) in self._prefixes
+
     def isin(self,scope):
         if _is_string(scope):
-            _isin = scope in str(self)
+            _isin = scope in self._prefixes or scope in self._string
         else:
             _isin = any([ self.isin(str(scp)) for scp in scope ])
         return _isin
 
 class UCD(UCDBase):
     '''
+    Unified Content Descriptor: a sequence of ~UCDWord
+
+    UCD objects are immutable and interned: 'UCD(string)' returns the
+    same object for the same string -- parsing (and vocabulary checks)
+    happen only the first time. Interned objects are kept in a bounded,
+    least-recently-used cache (see 'cache_info' and 'cache_clear').
     '''
-    def __init__(self,ucd=None):
+    __slots__ = ('_ucd','_string','_hash')
+
+    def __new__(cls,ucd=None):
         '''
         Input:
          - ucd : str,unicode
                 A (UCD) composite-word
         '''
         if isinstance(ucd,UCD):
-            self._ucd = ucd.copy()
-        else:
-            # assert _is_string(ucd) or ucd is None, "{}".format(type(ucd))
-            self._ucd = self.def_ucd(ucd)
+            return ucd
+        try:
+            ucd = ucd.strip()
+        except:
+            # not a string...
+            ucd = None
+        return _intern_ucd(cls,ucd or None)
+
+    def __init__(self,ucd=None):
+        # everything was done by '__new__'
+        pass
+
+    @classmethod
+    def _from_string(cls,ucd):
+        self = super(UCD,cls).__new__(cls)
+        self._ucd = tuple(cls.def_ucd(ucd))
+        self._string = ';'.join([ str(w) for w in self._ucd ])
+        self._hash = hash(self._string)
+        return self
+
+    def __reduce__(self):
+        return (UCD, (self._string,))
+
+    def __hash__(self):
+        return self._hash
 
     def __eq__(self,other):
+        if isinstance(other,UCD):
+            return self is other or self._string == other._string
         if _is_string(other):
             other = UCD(other)
         return self.__repr__() == repr(other)
 
-    def __ne__(self,other):
-        return not self == other
-
-    def __nonzero__(self):
-        return self.__len__()
+    def __bool__(self):
+        return bool(self._ucd)
+    __nonzero__ = __bool__
 
     def __len__(self):
         return len(self._ucd)
 
     def __iter__(self):
-        for w in self._ucd:
-            yield w
+        return iter(self._ucd)
 
     def __str__(self):
-        return ';'.join([ str(w) for w in self ])
+        return self._string
 
     def __repr__(self):
-        _args = '{ucd!r}'.format(ucd=str(self))
+        _args = '{ucd!r}'.format(ucd=self._string)
         return 'UCD({args})'.format(args=_args)
 
     def to_string(self):
@@ -222,7 +292,6 @@ class UCD(UCDBase):
     @staticmethod
     def def_ucd(word):
         #TODO: implement 'unknown' UCD
-        # out = OrderedDict()
         out = list()
         try:
             word = word.strip()
@@ -234,19 +303,31 @@ class UCD(UCDBase):
         from astropy.io.votable import ucd
         _nw = ucd.parse_ucd(word,check_controlled_vocabulary=True,has_colon=True)
         for ns,w in _nw:
-            _ucd = UCDWord(w,ns)
-            # out[_ucd] = None
-            out.append(_ucd)
+            out.append(_intern_word(w,ns))
         return out
 
+    @staticmethod
+    def cache_info():
+        '''
+        Return the interning cache statistics
+        '''
+        return _intern_ucd.cache_info()
+
+    @staticmethod
+    def cache_clear():
+        '''
+        Empty the interning cache
+        '''
+        _intern_ucd.cache_clear()
+        _intern_word.cache_clear()
+
     @property
     def words(self):
-        return [ w for w in self ]
+        return list(self._ucd)
 
     @property
     def primary(self):
-        _it = iter(self)
-        return _it.next()
+        return self._ucd[0]
 
     @property
     def family(self):
@@ -256,6 +337,12 @@ class UCD(UCDBase):
     def scope(self):
         return [ w.scope for w in self ]
 
+    def has_prefix(self,prefix):
+        '''
+        Return True if any word starts with (whole atoms) 'prefix'
+        '''
+        return any( w.has_prefix(prefix) for w in self._ucd )
+
     def isin(self,scope):
         '''
         Check whether ucd is related to/within 'scope'
@@ -267,3 +354,13 @@ class UCD(UCDBase):
         _isin = sum([ w.isin(scope) for w in self ])
         return _isin == len(scope)
 
+
+
+from functools import lru_cache
+@lru_cache(maxsize=_INTERN_SIZE)
+def _intern_ucd(cls,ucd):
+    return cls._from_string(ucd)
+
+@lru_cache(maxsize=_INTERN_SIZE)
+def _intern_word(word,namespace='ivoa'):
+    return UCDWord(word,namespace)
@@ -0,0 +1,195 @@
+# -*- coding:utf-8 -*-
+'''
+UCD syntax validation, after the IVOA words' syntax codes
+
+Each word of the vocabulary has a syntax code (see ~ivoa.words_list):
+ - 'P' words can only be primary (first) words;
+ - 'S' words can only be secondary (not first) words;
+ - 'Q' words can be anywhere;
+ - 'E' words (photometric quantities) can be followed by one 'em' word;
+ - 'C' words (colour indices) can be followed by two 'em' words;
+ - 'V' words (vectors) can be followed by frame words and one axis
+   word (the vector component, e.g. 'pos.pm;pos.eq.ra').
+
+Words are checked against the vocabulary (words of namespaces other than
+'ivoa' are not checked) and for their position in the UCD. Diagnostics
+are kept by UCD string, validating the same UCD again costs a lookup.
+'''
+import logging
+
+from ._ucd import _INTERN_SIZE
+
+ERROR = 'error'
+WARNING = 'warning'
+
+# Maximum number of 'em' words after an 'E' and a 'C' word
+_EM_FOLLOWERS = {'E':1, 'C':2}
+
+# Maximum number of axis words after a 'V' word
+_AXIS_FOLLOWERS = {'V':1}
+
+# Axis (vector component) words, by prefix, and reference frame words
+_AXES = ('pos.az.','pos.bodyrc.','pos.cartesian.','pos.earth.','pos.ecliptic.',
+         'pos.eq.','pos.galactic.','pos.supergalactic.')
+_FRAMES = frozenset(['pos.az','pos.barycenter','pos.bodyrc','pos.cartesian','pos.cmb',
+                     'pos.earth','pos.ecliptic','pos.eq','pos.frame','pos.galactic',
+                     'pos.galactocentric','pos.geocentric','pos.heliocentric','pos.lg',
+                     'pos.lsr','pos.supergalactic'])
+
+
+_CODES = None
+
+def _codes():
+    '''
+    Return {word : syntax code} of the vocabulary (lower-case words)
+    '''
+    global _CODES
+    if _CODES is None:
+        from .ivoa.vocabulary import get_vocabulary
+        _CODES = { w.lower():v.code for w,v in get_vocabulary().words.items() }
+    return _CODES
+
+
+def validate_ucd(ucd):
+    '''
+    Return diagnostics of 'ucd', a tuple of (level, message)
+
+    Input:
+     - ucd : ~UCD or string
+
+    Output:
+     - tuple of (level, message), 'level' is 'error' or 'warning';
+        empty if 'ucd' is a valid UCD
+    '''
+    if ucd is None or ucd != ucd:
+        # None or NaN
+        ucd = ''
+    return _validate(str(ucd).strip())
+
+
+def is_valid_ucd(ucd):
+    '''
+    Return True if 'ucd' has no 'error' diagnostics
+    '''
+    return not any( level == ERROR for level,_ in validate_ucd(ucd) )
+
+
+from functools import lru_cache
+@lru_cache(maxsize=_INTERN_SIZE)
+def _validate(ucd):
+    if not ucd:
+        return ((WARNING, "empty UCD"),)
+    codes = _codes()
+    diagnostics = []
+    seen = set()
+    previous = None     # code of the last (non-'em', non-axis/frame) ivoa word
+    em_count = 0
+    axis_count = 0
+    for position,word in enumerate(ucd.split(';')):
+        word = word.strip()
+        if not word:
+            diagnostics.append((ERROR, "empty word at position {:d}".format(position)))
+            continue
+        namespace,_,name = word.rpartition(':')
+        if namespace and namespace.lower() != 'ivoa':
+            previous = None
+            continue
+        key = name.lower()
+        if key in seen:
+            diagnostics.append((WARNING, "repeated word '{}'".format(name)))
+        seen.add(key)
+        code = codes.get(key)
+        if code is None:
+            diagnostics.append((ERROR, "unknown word '{}'".format(name)))
+            previous = None
+            continue
+        if position == 0 and code == 'S':
+            diagnostics.append((ERROR, "secondary-only word '{}' used as primary".format(name)))
+        if position > 0 and code == 'P':
+            diagnostics.append((ERROR, "primary-only word '{}' used as secondary".format(name)))
+        if key == 'em' or key.startswith('em.'):
+            em_count += 1
+            maximum = _EM_FOLLOWERS.get(previous)
+            if maximum is not None and em_count == maximum + 1:
+                diagnostics.append((WARNING, "more than {:d} 'em' word(s) after '{}' word".format(
+                                                maximum, previous)))
+            continue
+        if previous in _AXIS_FOLLOWERS:
+            if key.startswith(_AXES):
+                axis_count += 1
+                maximum = _AXIS_FOLLOWERS[previous]
+                if axis_count == maximum + 1:
+                    diagnostics.append((WARNING, "more than {:d} axis word(s) after '{}' word".format(
+                                                    maximum, previous)))
+                continue
+            if key in _FRAMES:
+                continue
+        previous = code
+        em_count = 0
+        axis_count = 0
+    return tuple(diagnostics)
+
+
+def validate_ucds(ucds):
+    '''
+    Return diagnostics of each of 'ucds'
+
+    Distinct UCDs are validated once.
+
+    Output:
+     - list of diagnostics (tuple of (level, message)), one per UCD
+    '''
+    import numpy as np
+    from pandas import factorize
+    ucds = np.asarray(ucds, dtype=object).ravel()
+    if not ucds.size:
+        return []
+    codes,uniques = factorize(ucds)
+    # last entry is for missing values (code -1)
+    lookup = [ validate_ucd(u) for u in uniques ] + [ _validate('') ]
+    return [ lookup[c] for c in codes ]
+
+
+def validate_metatable(metatable, empty=True):
+    '''
+    Return per-column diagnostics of ~AMetaTable 'metatable' UCDs
+
+    Input:
+     - metatable : ~AMetaTable
+     - empty : bool
+            If False, columns without UCD are not reported as warnings
+
+    Output:
+     - ~pandas.DataFrame indexed by column name, with columns
+        'ucd', 'valid', 'errors' and 'warnings' (messages joined by '; ')
+    '''
+    import pandas
+    ucds = metatable['ucd'].values
+    rows = []
+    for ucd,diag in zip(ucds, validate_ucds(ucds)):
+        ucd = '' if ucd is None or ucd != ucd else str(ucd)
+        if not empty and not ucd:
+            diag = ()
+        errors = [ msg for level,msg in diag if level == ERROR ]
+        warnings = [ msg for level,msg in diag if level == WARNING ]
+        rows.append((ucd, not errors, '; '.join(errors), '; '.join(warnings)))
+    out = pandas.DataFrame(rows, index=metatable.index,
+                           columns=['ucd','valid','errors','warnings'])
+    nerr = len(out) - int(out['valid'].sum())
+    if nerr:
+        logging.debug("{:d} column(s) with invalid UCD".format(nerr))
+    return out
+
+
+def cache_info():
+    '''
+    Return the validation cache statistics
+    '''
+    return _validate.cache_info()
+
+
+def cache_clear():
+    '''
+    Empty the validation cache
+    '''
+    _validate.cache_clear()
@@ -95,7 +95,7 @@ class _UCDRoots(OrderedDict):
     '''
     def __str__(self):
         s = ''
-        for k,v in self.iteritems():
+        for k,v in self.items():
             fmt = '\n{0}\n{1}\n\tfamily      : {2}\n\tdescription : {3}\n'
             k_under = ''.join(['-']*len(k))
             s += fmt.format(k, k_under, v.family, v.description)
@@ -1283,7 +1283,6 @@ def get_words_map():
         if not line.strip():
             continue
         t = tuple([ s.strip() for s in line.split() ])
-        print(t)
         assert len(t) == 2
         lines.append( t )
     map_of_words = { k:v for k,v in lines }
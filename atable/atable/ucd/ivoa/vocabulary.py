@@ -0,0 +1,158 @@
+# -*- coding:utf-8 -*-
+'''
+IVOA UCD vocabulary, loaded at first use
+
+The vocabulary -- root atoms (~structure), words with their syntax
+code (~words_list) and the UCD1 to UCD1+ map (~ucd1_to_1p) -- lives in
+modules of (large) text blobs. They are imported and parsed only when
+some part of the vocabulary is first asked for, so that importing the
+package does not pay for it; each part is then kept in memory.
+
+Words are indexed by name, by syntax code and by (atom-wise) parent.
+'''
+import logging
+
+from collections import OrderedDict
+
+# Syntax codes of UCD words (see ~words_list)
+CODES = OrderedDict([
+    ('P', 'primary only'),
+    ('S', 'secondary only'),
+    ('Q', 'primary or secondary'),
+    ('E', 'photometric quantity, may be followed by an em word'),
+    ('C', 'colour index, may be followed by two em words'),
+    ('V', 'vector, may be followed by an axis or frame word'),
+])
+
+
+class VocabularyWord(object):
+    '''
+    Entry of the vocabulary: 'word', syntax 'code' and 'description'
+    '''
+    __slots__ = ('word','code','description')
+
+    def __init__(self, word, code, description):
+        self.word = word
+        self.code = code
+        self.description = description
+
+    def __repr__(self):
+        return 'VocabularyWord({!r},{!r},{!r})'.format(self.word, self.code, self.description)
+
+
+class Vocabulary(object):
+    '''
+    Lazily loaded IVOA UCD vocabulary
+
+    Each of 'roots', 'words' and 'ucd1_map' is built the first time
+    it is accessed.
+    '''
+    def __init__(self):
+        self._roots = None
+        self._words = None
+        self._by_code = None
+        self._children = None
+        self._ucd1_map = None
+
+    @property
+    def roots(self):
+        '''
+        Root atoms, {atom : ~UCDAtom}
+        '''
+        if self._roots is None:
+            from . import structure
+            self._roots = structure.init_roots()
+            logging.debug("UCD roots loaded: {:d} atoms".format(len(self._roots)))
+        return self._roots
+
+    @property
+    def words(self):
+        '''
+        Words of the vocabulary, {word : ~VocabularyWord}
+        '''
+        if self._words is None:
+            self._load_words()
+        return self._words
+
+    @property
+    def ucd1_map(self):
+        '''
+        UCD1 to UCD1+ map, {UCD1 : UCD1+}
+        '''
+        if self._ucd1_map is None:
+            from . import ucd1_to_1p
+            self._ucd1_map = ucd1_to_1p.get_words_map()
+            logging.debug("UCD1 map loaded: {:d} entries".format(len(self._ucd1_map)))
+        return self._ucd1_map
+
+    def _load_words(self):
+        from .words_list import get_words_list
+        words = OrderedDict()
+        by_code = { code:[] for code in CODES }
+        children = {}
+        for code,word,description in get_words_list():
+            assert code in CODES, "Unknown syntax code '{}' for '{}'".format(code,word)
+            words[word] = VocabularyWord(word, code, description)
+            by_code[code].append(word)
+            parent,_,_ = word.rpartition('.')
+            children.setdefault(parent, []).append(word)
+        self._words = words
+        self._by_code = by_code
+        self._children = children
+        logging.debug("UCD words loaded: {:d} words".format(len(words)))
+
+    def __len__(self):
+        return len(self.words)
+
+    def __iter__(self):
+        return iter(self.words)
+
+    def __contains__(self, word):
+        return str(word) in self.words
+
+    def __getitem__(self, word):
+        return self.words[str(word)]
+
+    def get(self, word, default=None):
+        return self.words.get(str(word), default)
+
+    def code(self, word):
+        '''
+        Return syntax code of 'word' (None if not in vocabulary)
+        '''
+        entry = self.get(word)
+        return None if entry is None else entry.code
+
+    def description(self, word):
+        '''
+        Return description of 'word' (None if not in vocabulary)
+        '''
+        entry = self.get(word)
+        return None if entry is None else entry.description
+
+    def words_by_code(self, code):
+        '''
+        Return list of words with syntax 'code' (one of ~CODES)
+        '''
+        assert code in CODES, "Options for 'code' are {}".format(list(CODES))
+        self.words
+        return list(self._by_code[code])
+
+    def children(self, word=''):
+        '''
+        Return list of words one atom below 'word' (default, the roots)
+        '''
+        self.words
+        return list(self._children.get(str(word), []))
+
+
+_VOCABULARY = None
+
+def get_vocabulary():
+    '''
+    Return the (module-wide) ~Vocabulary
+    '''
+    global _VOCABULARY
+    if _VOCABULARY is None:
+        _VOCABULARY = Vocabulary()
+    return _VOCABULARY
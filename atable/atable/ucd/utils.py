@@ -3,14 +3,16 @@
 This module holds some utilities for handling UCDs.
 
 The tools in here are basically interface (or alike) for
-the ones offered by Vizier at 'http://cds.u-strasbg.fr/UCD/tools.htx'.
+the ones offered by Vizier at 'http://cds.u-strasbg.fr/UCD/tools.htx',
+working offline over the IVOA vocabulary (~ivoa.vocabulary).
 '''
 
 def ucd_from_description(description,get='best'):
     '''
     Get a UCD suggestions from 'description'
 
-    GAVO service for UCDs ('http://dc.zah.uni-heidelberg.de/ucds/ui/ui/form') is used
+    Suggestions come from the (local) ~UCDSuggester, the descriptions
+    of the IVOA vocabulary words are matched against 'description'.
 
     Input:
      - description : string
@@ -21,32 +23,279 @@ def ucd_from_description(description,get='best'):
     Output:
      - If 'get=best' return a tuple with (suggested ucd,{'probability','description'});
         Otherwise, if 'get=all' return a {sugested ucds,{'probability','description'}}
+        'probability' is the similarity score (0 to 1) of the suggestion.
     '''
-
-    _form_url = 'http://dc.zah.uni-heidelberg.de/ucds/ui/ui/form'
-    _rest_url = '?__nevow_form__=genForm&_FORMAT=txt&submit=Go&description='
-    _search_url = _form_url+_rest_url
-
-    import requests
-    r = requests.post("{}'{}'".format(_search_url,description))
+    assert get in ('best','all'), "Options for 'get' are ['best','all']"
     from collections import OrderedDict
+    suggester = get_suggester()
     _ucd = OrderedDict()
-    for l in r.iter_lines():
-        l = l.split()
-        _ucd[l[1]] = {'probability':l[0], 'description':' '.join(l[2:])}
-        # if get == 'best':
-        #     break # Yes, runs only once; first line is the highest scored ucd.
+    for word,score in suggester.suggest([description])[0]:
+        _ucd[word] = {'probability':score, 'description':suggester.description(word)}
     if get == 'best':
-        _ucd = _ucd.popitem(last=False)
+        _ucd = _ucd.popitem(last=False) if _ucd else None
     return _ucd
 
+
+_SUGGESTER = None
+
+def get_suggester():
+    '''
+    Return the (module-wide) ~UCDSuggester, built at first call
+    '''
+    global _SUGGESTER
+    if _SUGGESTER is None:
+        _SUGGESTER = UCDSuggester()
+    return _SUGGESTER
+
+
+_STOPWORDS = frozenset('''a an and are as at be by e etc for from g i ie in
+    into is it its of on or per the to which with'''.split())
+
+def _tokenize(text):
+    '''
+    Return the list of (normalized) terms of 'text'
+
+    CamelCase and dotted words are split ('pos.eq.ra', 'colorExcess'),
+    terms are lower-cased and plural 's' removed; stop-words are dropped.
+    '''
+    import re
+    text = re.sub('([a-z])([A-Z])', r'\1 \2', str(text))
+    terms = []
+    for term in re.findall('[a-z0-9]+', text.lower()):
+        if term in _STOPWORDS:
+            continue
+        if len(term) > 3 and term.endswith('s') and not term.endswith('ss'):
+            term = term[:-1]
+        terms.append(term)
+    return terms
+
+
+class UCDSuggester(object):
+    '''
+    Suggest UCD words for (column) descriptions
+
+    Vocabulary words are indexed by the TF-IDF vectors of their
+    description (and of their own atoms, 'phot.mag' gives 'phot','mag').
+    Descriptions are scored against all words at once, in blocks, by
+    the cosine similarity of their vectors.
+
+    Input:
+     - words : list of (word, description)
+            Default is the IVOA vocabulary (~ivoa.vocabulary)
+    '''
+    # Number of descriptions scored at once
+    _BLOCK_SIZE = 2048
+
+    def __init__(self, words=None):
+        import numpy as np
+        if words is None:
+            from .ivoa.vocabulary import get_vocabulary
+            words = [ (w.word,w.description) for w in get_vocabulary().words.values() ]
+        self._words = [ w for w,_ in words ]
+        self._descriptions = dict(words)
+        documents = [ _tokenize(w) + _tokenize(d) for w,d in words ]
+        self._terms = {}
+        for doc in documents:
+            for term in doc:
+                self._terms.setdefault(term, len(self._terms))
+        counts = self._counts(documents)
+        df = np.count_nonzero(counts, axis=0)
+        self._idf = (np.log((1.0 + len(documents)) / (1.0 + df)) + 1).astype(np.float32)
+        self._matrix = self._normalize(counts * self._idf)
+
+    def __len__(self):
+        return len(self._words)
+
+    @property
+    def words(self):
+        return list(self._words)
+
+    def description(self, word):
+        return self._descriptions.get(str(word))
+
+    def _counts(self, documents):
+        import numpy as np
+        counts = np.zeros((len(documents), len(self._terms)), dtype=np.float32)
+        for i,doc in enumerate(documents):
+            for term in doc:
+                j = self._terms.get(term)
+                if j is not None:
+                    counts[i,j] += 1
+        return counts
+
+    @staticmethod
+    def _normalize(matrix):
+        import numpy as np
+        norm = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norm > 0, norm, 1)
+
+    def scores(self, descriptions):
+        '''
+        Return the (descriptions x words) matrix of similarity scores
+        '''
+        documents = [ _tokenize(d) for d in descriptions ]
+        return self._normalize(self._counts(documents) * self._idf).dot(self._matrix.T)
+
+    def suggest(self, descriptions, n=5, min_score=0.0):
+        '''
+        Return ranked suggestions for each of 'descriptions'
+
+        Input:
+         - descriptions : list of strings
+         - n : integer
+                Maximum number of suggestions for each description
+         - min_score : float
+                Minimum similarity (0 to 1) of suggestions
+
+        Output:
+         - list (one item per description) of lists of (word, score),
+            best suggestion first
+        '''
+        import numpy as np
+        if isinstance(descriptions, str):
+            descriptions = [descriptions]
+        descriptions = list(descriptions)
+        n = min(n, len(self._words))
+        out = []
+        for start in range(0, len(descriptions), self._BLOCK_SIZE):
+            scores = self.scores(descriptions[start:start+self._BLOCK_SIZE])
+            top = np.argpartition(-scores, n-1, axis=1)[:, :n]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind='stable')
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            for indx,score in zip(top, top_scores):
+                keep = score > min_score
+                out.append([ (self._words[i],float(s)) for i,s in zip(indx[keep],score[keep]) ])
+        return out
+
+    def best(self, descriptions, min_score=0.0):
+        '''
+        Return the best suggestion (word) for each of 'descriptions', None if none
+        '''
+        return [ s[0][0] if s else None for s in self.suggest(descriptions, n=1, min_score=min_score) ]
+
+
 def translate_ucd1_to_1p(ucd1):
     '''
     Translate UCD version 1 to 1+
 
     Vizier UCD tools are used (http://cds.u-strasbg.fr/doc/UCD/).
     '''
-    from .ivoa import ucd1_to_1p
-    reload(ucd1_to_1p)
-    map_of_words = ucd1_to_1p.get_words_map()
-    return map_of_words[ucd1]
+    return get_translator()[ucd1]
+
+
+_TRANSLATOR = None
+
+def get_translator():
+    '''
+    Return the (module-wide) ~UCD1Translator, built at first call
+    '''
+    global _TRANSLATOR
+    if _TRANSLATOR is None:
+        _TRANSLATOR = UCD1Translator()
+    return _TRANSLATOR
+
+
+class UCD1Translator(object):
+    '''
+    Translate UCD1 to UCD1+ words
+
+    The map of words (~ivoa.ucd1_to_1p) is parsed once, at instantiation.
+    Arrays of UCD1 are translated through their distinct values: each
+    distinct UCD1 is looked up once and the output is gathered from the
+    resulting lookup array.
+
+    Input:
+     - words_map : dictionary
+            {UCD1 : UCD1+}; default is the ~ivoa.vocabulary UCD1 map
+    '''
+    def __init__(self, words_map=None):
+        if words_map is None:
+            from .ivoa.vocabulary import get_vocabulary
+            words_map = get_vocabulary().ucd1_map
+        self._map = dict(words_map)
+
+    def __len__(self):
+        return len(self._map)
+
+    def __contains__(self, ucd1):
+        return self.translate(ucd1) is not None
+
+    def __getitem__(self, ucd1):
+        ucd1p = self.translate(ucd1)
+        if ucd1p is None:
+            raise KeyError(ucd1)
+        return ucd1p
+
+    def translate(self, ucd1, default=None):
+        '''
+        Return UCD1+ for 'ucd1', 'default' if not a (known) UCD1
+        '''
+        ucd1p = self._map.get(ucd1)
+        if ucd1p is None:
+            ucd1p = self._map.get(str(ucd1).strip().upper(), default)
+        return ucd1p
+    __call__ = translate
+
+    def translate_array(self, ucd1s, default=None):
+        '''
+        Return array of UCD1+ for (array of strings) 'ucd1s'
+
+        Unknown UCD1 are translated to 'default'; if None, they are kept.
+        '''
+        import numpy as np
+        from pandas import factorize
+        ucd1s = np.asarray(ucd1s, dtype=object)
+        if not ucd1s.size:
+            return ucd1s.copy()
+        codes,uniques = factorize(ucd1s.ravel())
+        # last entry of 'lookup' is for missing values (code -1)
+        lookup = np.empty(len(uniques)+1, dtype=object)
+        lookup[:-1] = [ self.translate(u, u if default is None else default)
+                        for u in uniques ]
+        lookup[-1] = default
+        out = lookup[codes]
+        if default is None:
+            missing = codes < 0
+            out[missing] = ucd1s.ravel()[missing]
+        return out.reshape(ucd1s.shape)
+
+    def translate_metatable(self, metatable, table=None):
+        '''
+        Upgrade UCD1 of ~AMetaTable 'metatable' columns to UCD1+
+
+        UCD1 strings are not valid UCDs, in the metatable ('ucd' column)
+        they are already empty UCDs: the strings are taken from the
+        columns' meta ('ucd') of 'table' -- the table 'metatable'
+        describes --, if given; from the 'ucd' column otherwise.
+        UCDs that are not (known) UCD1, and translations that do not
+        parse as UCD1+, are left untouched. The metatable is modified
+        in place, and returned.
+
+        Input:
+         - metatable : ~AMetaTable
+         - table : ~astropy.table.Table
+        '''
+        import logging
+        from ._ucd import UCD
+        ucds = metatable['ucd'].values
+        if table is not None:
+            raw = [ table[name].meta.get('ucd') if name in table.colnames else None
+                    for name in metatable.index ]
+        else:
+            raw = ucds
+        words = [ '' if u is None or u != u else str(u) for u in raw ]
+        translated = self.translate_array(words, default='')
+        changed = [ i for i,t in enumerate(translated) if t ]
+        if changed:
+            from pandas import Series
+            column = list(ucds)
+            for i in changed:
+                try:
+                    column[i] = UCD(translated[i])
+                except ValueError as e:
+                    logging.warning("UCD1 {!r} translation {!r} not used: {}".format(
+                                        words[i], translated[i], e))
+            metatable['ucd'] = Series(column, index=metatable.index, dtype=object)
+        return metatable
@@ -36,7 +36,7 @@ def to_str(arrei,null=''):
     '''
     '''
     if is_object(arrei):
-        return object2str(arrei,null='')
+        return object2str(arrei,null=null)
     else:
         return arrei.astype(str)
 to_string = to_str
@@ -45,15 +45,12 @@ def object2str(arrei,null=''):
     '''
     Try to cast "object" type array to "string" type
 
-    Null values will be represented as '' (empty string)
+    Null values (None, NaN and ~nulls.NULL_STRINGS) will be represented
+    as 'null' ('' (empty string) by default)
     '''
     assert is_object(arrei)
-    a = arrei.astype(str)
-    ind_nan = a == 'nan'
-    ind_nan |= a == 'NaN'
-    ind_nan |= a == 'na'
-    ind_nan |= a == 'NA'
-    a[ind_nan] = null
+    from .nulls import masked_strings
+    a,_ = masked_strings(arrei,fill=null)
     return a
 
 def split(arrei, N):
@@ -121,35 +118,42 @@ def binning(vector,nbins,xmin=None,xmax=None,spacing='linear'):
     bins = spacing_function[spacing](xmin,xmax,nbins+1)
     return bins
 
-def histogram(vector,bins=None):
+def histogram(vector,bins=None,sketch=None):
     """
     Return the histogram of vector given the bins
 
     Input:
      - vector : array-like
+                If 'None', the histogram comes from 'sketch'
      - bins   : integer
                 If 'None', auto define the best number of bins
+     - sketch : ~utils.stats.ColumnSketch
+                Summary of 'vector' (e.g, from ~ATable.sketches); bins are
+                defined from it, without going through the data
     """
     import numpy as np
+    assert vector is not None or sketch is not None, "Give 'vector' or 'sketch'"
+    if sketch is not None:
+        _std,_size = sketch.std,sketch.count
+        _min,_max = sketch.min,sketch.max
+    else:
+        _dat = np.asarray(vector).ravel()
+        _std,_size = np.std(_dat),_dat.size
+        _min,_max = _dat.min(),_dat.max()
+        del _dat
     if bins is None:
-        def binswidth(dados):
-            import math
-            import numpy
-            width = 3.49 * numpy.std(dados) * math.pow(dados.size,-1/3.);
-            return width;
-        _dat = np.asarray(vector);
-        _w = binswidth(_dat.ravel());
-        _min = _dat.ravel().min();
-        _max = _dat.ravel().max();
-        bins = (_max-_min)/_w;
-        bins = min(100,max(10,bins));
+        _w = 3.49 * _std * _size**(-1/3.)
+        bins = (_max-_min)/_w if _w > 0 else 10
+        bins = min(100,max(10,bins))
         bins = int(bins)
-        del _dat,_w,_min,_max;
+        del _w
 
-    from booq.utils import is_number
+    from .is_misc import is_number
     if is_number(bins):
-        bins = binning(vector,bins)
+        bins = binning(vector,bins,xmin=_min,xmax=_max)
 
-    h,b = np.histogram(vector,bins=bins,normed=False)
+    if vector is None:
+        return sketch.histogram(bins)
+    h,b = np.histogram(vector,bins=bins)
     assert np.array_equal(b,bins)
     return h,b
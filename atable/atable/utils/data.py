@@ -1,32 +1,178 @@
 # -*- coding:utf-8 -*-
 import logging
 
-from .is_misc import is_number
+from .is_misc import is_number, is_array
 
-def sample_rows(nrows, fraction=0.1):
+# Default size of a contiguous block of rows in 'block' sampling
+_BLOCK_ROWS = 10000
+
+def sample_size(nrows, fraction=0.1):
     '''
-    Return a boolean array uniformly sampled to a certain 'fraction'
+    Return the number of rows to sample from 'nrows'
 
-    'fraction' accounts for the number of 'True' elements in an array of size
-    'nrows * fraction' if 'fraction < 1'. Otherwise, if 'fraction >= 1', the
-    size of the output array is 'fraction' itself.
+    'fraction' is a fraction of 'nrows' if 'fraction < 1', or the
+    absolute number of rows otherwise (limited by 'nrows').
     '''
-    import random
-    from numpy import asarray
     assert 0<fraction, "ValueError: 'fraction' should be greater than 0"
     if fraction > nrows:
         logging.warning("'fraction > nrows'! Will use the 'nrows' as output size")
 
     nsamp = int(fraction) if fraction >= 1 else int(fraction * nrows)
     nsamp = min(nrows,nsamp) # when fraction > nrows, needs to be fixed
-    nsamp = int(nsamp)
-    idx = set()
-    while len(idx)<nsamp:
-        n = random.randint(0, nrows-1)
-        idx.add(n)
-    return asarray(list(idx),dtype=int)
-
-def sample_array(data_array, fraction=0.1):
+    return int(nsamp)
+
+def sample_rows(nrows, fraction=0.1, seed=None):
+    '''
+    Return a (sorted) array of row indexes uniformly sampled from 'nrows'
+
+    'fraction' accounts for the number of indexes in the output array,
+    'nrows * fraction' if 'fraction < 1'. Otherwise, if 'fraction >= 1', the
+    size of the output array is 'fraction' itself.
+
+    'seed' is given to ~numpy.random.default_rng (a ~numpy.random.Generator
+    is also accepted).
+
+    Indexes are drawn in bulk (with replacement) and repeated ones drawn
+    again; memory in use is proportional to the sample, not to 'nrows'.
+    When more than half of the rows are requested, the rows left out
+    are sampled instead.
+    '''
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    nsamp = sample_size(nrows, fraction)
+    if nsamp > nrows // 2:
+        nout = nrows - nsamp
+        out = _draw_unique(rng, nrows, nout)
+        return np.setdiff1d(np.arange(nrows), out, assume_unique=True)
+    return _draw_unique(rng, nrows, nsamp)
+
+def _draw_unique(rng, nrows, nsamp):
+    import numpy as np
+    idx = _sorted_unique(rng.integers(0, nrows, size=nsamp))
+    while len(idx) < nsamp:
+        more = rng.integers(0, nrows, size=nsamp-len(idx))
+        idx = _sorted_unique(np.concatenate([idx, more]))
+    return idx
+
+def _sorted_unique(arrei):
+    import numpy as np
+    arrei.sort()
+    keep = np.empty(len(arrei), dtype=bool)
+    keep[:1] = True
+    np.not_equal(arrei[1:], arrei[:-1], out=keep[1:])
+    return arrei[keep]
+
+def bernoulli_rows(nrows, fraction=0.1, chunk_rows=100000, seed=None):
+    '''
+    Return a (sorted) array of row indexes, each row selected with probability 'fraction'
+
+    Rows are visited in chunks of 'chunk_rows', so that the memory in use
+    is bounded by the chunk size (plus the output). The size of the output
+    is 'nrows * fraction' only on average.
+
+    If 'fraction >= 1', it is taken as the expected number of rows.
+    '''
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    prob = float(sample_size(nrows, fraction)) / nrows if nrows else 0
+    idx = []
+    for start in range(0, nrows, chunk_rows):
+        size = min(chunk_rows, nrows-start)
+        idx.append(np.flatnonzero(rng.random(size) < prob) + start)
+    if not idx:
+        return np.array([], dtype=int)
+    return np.concatenate(idx)
+
+def block_rows(nrows, fraction=0.1, block_rows=_BLOCK_ROWS, seed=None):
+    '''
+    Return a (sorted) list of 'slice's, contiguous blocks of rows sampled from 'nrows'
+
+    The table is divided in blocks of 'block_rows' rows (or of the
+    sample size, if smaller); as many blocks as necessary to cover
+    'nrows * fraction' rows are uniformly chosen, and the last one is
+    trimmed so that exactly 'nrows * fraction' rows are given.
+    Rows within a block are correlated, but reading contiguous ranges
+    is much cheaper than reading scattered rows.
+    '''
+    import numpy as np
+    nsamp = sample_size(nrows, fraction)
+    if not nsamp:
+        return []
+    block_rows = max(1, min(int(block_rows), nsamp))
+    nfull = nrows // block_rows
+    nsel = int(np.ceil(float(nsamp) / block_rows))
+    if nsel <= nfull:
+        blocks = sample_rows(nfull, nsel, seed=seed)
+    else:
+        # (almost) the whole table, the last short block included
+        blocks = np.arange(int(np.ceil(float(nrows) / block_rows)))
+    slices = []
+    left = nsamp
+    for b in blocks:
+        start = int(b) * block_rows
+        stop = min(start+block_rows, nrows, start+left)
+        if stop <= start:
+            break
+        slices.append(slice(start, stop))
+        left -= stop - start
+    return slices
+
+def is_slices(rows):
+    '''
+    Check whether 'rows' is a list of 'slice's (contiguous ranges of rows)
+    '''
+    return isinstance(rows, (list,tuple)) and \
+            all(isinstance(r, slice) for r in rows)
+
+def reservoir_sample(chunks, size, seed=None):
+    '''
+    Return 'size' rows uniformly sampled from a stream of arrays
+
+    'chunks' is an iterable of arrays (e.g, the data blocks of a table
+    being read in pieces) whose total length does not need to be known
+    in advance. The reservoir is updated one chunk at a time.
+
+    Input:
+     - chunks : iterable of ~numpy.ndarray
+     - size : integer
+            Number of rows in the sample
+     - seed : integer or ~numpy.random.Generator
+    Output:
+     - ~numpy.ndarray with (at most) 'size' rows
+    '''
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    reservoir = None
+    seen = 0
+    for chunk in chunks:
+        nrows = len(chunk)
+        if reservoir is None:
+            reservoir = chunk[:size].copy()
+            seen = len(reservoir)
+            chunk = chunk[seen:]
+            nrows = len(chunk)
+        elif len(reservoir) < size:
+            nfill = min(size-len(reservoir), nrows)
+            reservoir = np.concatenate([reservoir, chunk[:nfill]])
+            seen += nfill
+            chunk = chunk[nfill:]
+            nrows = len(chunk)
+        if not nrows:
+            continue
+        # Row 't' (global index) replaces a random slot with probability size/(t+1)
+        t = np.arange(seen, seen+nrows)
+        slots = rng.integers(0, t+1)
+        keep = slots < size
+        slots = slots[keep]
+        rows = np.flatnonzero(keep)
+        # later rows win over earlier rows replacing the same slot
+        _, last = np.unique(slots[::-1], return_index=True)
+        last = len(slots) - 1 - last
+        reservoir[slots[last]] = chunk[rows[last]]
+        seen += nrows
+    return reservoir
+
+def sample_array(data_array, fraction=0.1, seed=None):
     """
     Return a sample from 'data_array' rows
 
@@ -50,13 +196,17 @@ def sample_array(data_array, fraction=0.1):
             Rows are randomly chosen from a normal distribution, all same columns
     """
     nrows = len(data_array)
-    idx = sample_rows(nrows,fraction)
+    idx = sample_rows(nrows,fraction,seed=seed)
     sample_data = data_array[idx]
 
     return sample_data
 
 
-def sample(data, fraction=0.1):
+_SAMPLING = {'uniform'   : sample_rows,
+             'bernoulli' : bernoulli_rows,
+             'block'     : block_rows}
+
+def sample(data, fraction=0.1, method='uniform', seed=None):
     '''
     Return an array randomly sampled of size('data') * 'fraction'
 
@@ -70,10 +220,17 @@ def sample(data, fraction=0.1):
      - fraction: float or integer
             If 'fraction >= 1', it is used directy as the size of output sample;
             if 'fraction < 1', the size of sample will be 'len(data) * fraction'
+     - method : string
+            If 'data' is a number, the sampling method: 'uniform' (exact size),
+            'bernoulli' (each row with probability 'fraction') or 'block'
+            (contiguous ranges of rows, returned as a list of 'slice's)
+     - seed : integer or ~numpy.random.Generator
 
     '''
     if is_number(data):
-        return sample_rows(data, fraction)
+        assert method in _SAMPLING, \
+            "Options for 'method' are {}".format(list(_SAMPLING.keys()))
+        return _SAMPLING[method](data, fraction, seed=seed)
     else:
-        assert utils.is_array(data), "'data' does not look like an array"
-        return sample_array(data, fraction)
+        assert is_array(data), "'data' does not look like an array"
+        return sample_array(data, fraction, seed=seed)
@@ -0,0 +1,160 @@
+# -*- coding:utf-8 -*-
+'''
+Null (missing) values detection, vectorized
+
+Masks are computed in one pass over each column, by kind of data:
+ - numeric columns: NaN and the column's 'null' sentinel value (e.g,
+   the metatable 'null' field), if it can be cast to the column's type;
+ - string (fixed-width) columns: the sentinel strings (~NULL_STRINGS)
+   and 'null';
+ - object columns: None/NaN, the sentinel strings and 'null'. Values
+   are hashed once (~pandas.factorize), the test -- and the conversion
+   to strings -- is done over the distinct values only.
+'''
+import logging
+
+import numpy as np
+
+# Strings taken as null in string/object columns
+NULL_STRINGS = ('nan','NaN','na','NA')
+
+
+def null_mask(values, null=None, strings=NULL_STRINGS):
+    '''
+    Return boolean mask of the null entries of 'values'
+
+    Input:
+     - values : array-like
+     - null : scalar
+            Sentinel value (e.g, metatable 'null'); ignored if None/'',
+            or if it can not be cast to the type of 'values'
+     - strings : list of strings
+            Values taken as null in string and object arrays
+
+    Output:
+     - boolean numpy array, shape of 'values'
+    '''
+    if _is_pandas_array(values):
+        if values.dtype.kind == 'O':
+            # strings, categories, mixed objects
+            _,mask = masked_strings(values, null=null, strings=strings)
+            return mask
+        from pandas import isna
+        return np.asarray(isna(values), dtype=bool)
+    values = np.asarray(values)
+    if values.dtype.kind == 'O':
+        _,mask = masked_strings(values, null=null, strings=strings)
+        return mask
+    kind = values.dtype.kind
+    if isinstance(null, (str, bytes)) and null.strip() == null[:0]:
+        null = None
+    null = _sentinel(null, values.dtype)
+    if kind in 'fc':
+        mask = np.isnan(values)
+        if null is not None and null == null:
+            mask |= values == null
+        return mask
+    if kind in 'Mm':
+        return np.isnat(values)
+    if kind in 'SU':
+        sentinels = [ _sentinel(s, values.dtype) for s in strings ]
+        sentinels = [ s for s in sentinels+[null] if s is not None ]
+        if not sentinels:
+            return np.zeros(values.shape, dtype=bool)
+        return np.isin(values, sentinels)
+    if null is not None:
+        return values == null
+    return np.zeros(values.shape, dtype=bool)
+
+
+def masked_strings(values, null=None, strings=NULL_STRINGS, fill=''):
+    '''
+    Return ('values' as strings, null mask); null entries set to 'fill'
+
+    Object (and pandas) arrays are factorized: distinct values are
+    converted and tested once, then broadcast back to every entry.
+
+    Input:
+     - values : array-like
+     - null : scalar
+            Sentinel value (see ~null_mask)
+     - strings : list of strings
+            Values taken as null
+     - fill : string
+            Value of the null entries in the output
+
+    Output:
+     - (unicode numpy array, boolean numpy array)
+    '''
+    if not _is_pandas_array(values):
+        values = np.asarray(values)
+        if values.dtype.kind != 'O':
+            mask = null_mask(values, null=null, strings=strings)
+            out = values.astype(str)
+            if mask.any():
+                out[mask] = fill
+            return out, mask
+    from pandas import factorize
+    shape = getattr(values, 'shape', (len(values),))
+    if len(shape) > 1:
+        values = values.ravel()
+    try:
+        codes,uniques = factorize(values)
+    except TypeError:
+        # unhashable entries: masked (~numpy.ma.masked) are missing values,
+        # others are taken by their string
+        hashable = np.empty(len(values), dtype=object)
+        for i,v in enumerate(values):
+            hashable[i] = None if v is np.ma.masked else (v if _is_hashable(v) else str(v))
+        codes,uniques = factorize(hashable)
+    uniques = np.asarray(uniques, dtype=object).astype(str)
+    sentinels = set(strings)
+    if null is not None and str(null).strip() != '':
+        sentinels.add(str(null))
+    isnull = np.array([ u in sentinels for u in uniques ], dtype=bool)
+    # last entry is for missing values (code -1)
+    uniques = np.append(np.where(isnull, fill, uniques), fill)
+    isnull = np.append(isnull, True)
+    logging.debug("Strings factorized: {:d} distinct values".format(len(uniques)-1))
+    return uniques[codes].reshape(shape), isnull[codes].reshape(shape)
+
+
+def _is_hashable(value):
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+def _is_pandas_array(values):
+    # pandas objects (Series, extension arrays) carry non-numpy dtypes
+    dtype = getattr(values, 'dtype', None)
+    return dtype is not None and not isinstance(dtype, np.dtype)
+
+
+def _sentinel(null, dtype):
+    '''
+    Return 'null' cast to 'dtype', None if not possible (or not given)
+    '''
+    if null is None:
+        return None
+    kind = dtype.kind
+    try:
+        if kind == 'S':
+            null = null if isinstance(null, bytes) else str(null).encode()
+            return null if len(null) <= dtype.itemsize else None
+        if kind == 'U':
+            null = null.decode() if isinstance(null, bytes) else str(null)
+            return null if len(null) <= dtype.itemsize // 4 else None
+        if kind in 'fc':
+            return dtype.type(null)
+        if kind in 'iu':
+            if isinstance(null, float) and not null.is_integer():
+                return None
+            value = int(null)
+            info = np.iinfo(dtype)
+            return value if info.min <= value <= info.max else None
+    except (ValueError, TypeError, UnicodeError):
+        pass
+    return None
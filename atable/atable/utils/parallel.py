@@ -21,3 +21,25 @@ def setup(nprocs=2):
         logging.error("Not able to setup parallel environment: {}".format(e))
         dview = None
     return dview
+
+
+def pool_map(function, args_list, workers=None):
+    """
+    Apply 'function' to each tuple in 'args_list' in a local process pool
+
+    Results are yielded as '(index, result)' pairs, as soon as each one
+    is ready ('index' is the position of the arguments in 'args_list').
+    If 'workers' is 1 (or there is only one item), run in this process.
+
+    Only ~concurrent.futures is used, no external cluster is needed.
+    """
+    if workers == 1 or len(args_list) <= 1:
+        for i,args in enumerate(args_list):
+            yield i, function(*args)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = { executor.submit(function, *args):i for i,args in enumerate(args_list) }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
@@ -1,9 +1,628 @@
 # -*- coding:utf-8 -*-
+'''
+Columns statistics, computed in one (streaming) pass
+
+~StreamStats keeps count, nulls, min, max, mean and variance of a
+column -- updated block by block (Welford/Chan) -- and its quantiles
+through a ~QuantileSketch (KLL compactors). Both are mergeable: stats
+of parts of a column (chunks of a file, tiles of a survey) merge into
+the stats of the whole.
+'''
 import logging
 
+from collections import OrderedDict
+
+import numpy as np
+
+# Number of values processed at once (moments of a block are computed
+# while it is in cache)
+_BLOCK_ROWS = 65536
+
+# Capacity of each level of the quantile sketch; quantiles are exact
+# while at most this number of values were seen
+_SKETCH_K = 1024
+
+# Precision of the distinct-values sketch (2**p registers)
+_HLL_P = 11
+
+# Ranks of the quantiles kept by stored sketches: evenly spaced (64
+# intervals), and denser at the tails
+_GRID_RANKS = np.unique(np.concatenate((np.linspace(0, 1, 65),
+                                        [1e-4, 1e-3, 5e-3, 1-5e-3, 1-1e-3, 1-1e-4])))
+
+
+class QuantileSketch(object):
+    '''
+    Mergeable quantile sketch (KLL-like compactors)
+
+    Values at level 'h' weigh 2**h. When a level holds more than 'k'
+    values it is compacted: values are sorted and every other one (from
+    a random offset) is promoted to the next level. Blocks larger than
+    'k' are sorted once and promoted straight to the level where they
+    fit. Memory is about 'k*log2(n/k)' values; rank error is of order
+    'log2(n/k)/k'.
+
+    Input:
+     - k : integer
+            Capacity of each level
+     - seed : integer
+            Seed of the compaction offsets
+    '''
+    def __init__(self, k=_SKETCH_K, seed=0):
+        self._k = max(int(k), 2)
+        self._levels = []
+        self._rng = np.random.default_rng(seed)
+        self.count = 0
+        # extremes are kept apart, compactions may drop them
+        self._min = np.inf
+        self._max = -np.inf
+
+    def __len__(self):
+        return sum( len(level) for level in self._levels )
+
+    def update(self, values):
+        '''
+        Add (non-null) 'values' to the sketch
+        '''
+        values = np.asarray(values, dtype=float).ravel()
+        if not values.size:
+            return self
+        self.count += values.size
+        if values.size <= self._k:
+            self._add(0, values)
+            self._extremes(values.min(), values.max())
+        else:
+            # same as 'h' successive compactions of the (sorted) block
+            h = int(np.ceil(np.log2(values.size / self._k)))
+            step = 1 << h
+            values = np.sort(values)
+            self._add(h, values[self._rng.integers(step)::step])
+            self._extremes(values[0], values[-1])
+        self._compact()
+        return self
+
+    def merge(self, other):
+        '''
+        Merge ~QuantileSketch 'other' into this one
+        '''
+        for h,level in enumerate(other._levels):
+            if len(level):
+                self._add(h, level)
+        self.count += other.count
+        self._extremes(other._min, other._max)
+        self._compact()
+        return self
+
+    def load_grid(self, ranks, values, count):
+        '''
+        Load the quantiles 'values' at 'ranks' (from 0 to 1) of 'count' values
+
+        The sketch is rebuilt -- at one level -- from (at most 'k')
+        values spread over the quantiles, each weighing the same power
+        of two.
+        '''
+        self._levels = []
+        self._min,self._max = np.inf,-np.inf
+        self.count = int(count)
+        if not self.count or not len(values):
+            return self
+        h = max(0, int(np.ceil(np.log2(self.count / float(self._k)))))
+        size = max(1, int(round(self.count / 2.0**h)))
+        self._add(h, np.interp((np.arange(size) + 0.5) / size, ranks, values))
+        self._extremes(values[0], values[-1])
+        return self
+
+    def _extremes(self, _min, _max):
+        self._min = min(self._min, float(_min))
+        self._max = max(self._max, float(_max))
+
+    def _add(self, level, values):
+        while len(self._levels) <= level:
+            self._levels.append(np.empty(0))
+        self._levels[level] = np.concatenate((self._levels[level], values))
+
+    def _compact(self):
+        h = 0
+        while h < len(self._levels):
+            level = self._levels[h]
+            if len(level) > self._k:
+                level = np.sort(level)
+                even = len(level) - len(level) % 2
+                offset = self._rng.integers(2)
+                self._levels[h] = level[even:]
+                self._add(h+1, level[offset:even:2])
+            h += 1
+
+    def quantiles(self, q):
+        '''
+        Return the (approximate) quantiles 'q' (in [0,1]), NaN if empty
+
+        Quantiles are exact (linearly interpolated) while nothing was
+        compacted.
+        '''
+        q = np.asarray(q, dtype=float)
+        if not self.count:
+            return np.full(q.shape, np.nan)
+        if self._is_exact():
+            return np.percentile(self._levels[0], q*100)
+        values,ranks = self._ranks()
+        return np.interp(q, ranks, values)
+
+    def cdf(self, x):
+        '''
+        Return the (approximate) fraction of values lower than 'x'
+        '''
+        x = np.asarray(x, dtype=float)
+        if not self.count:
+            return np.full(x.shape, np.nan)
+        if self._is_exact():
+            values = np.sort(self._levels[0])
+            return np.searchsorted(values, x, side='left') / float(len(values))
+        values,ranks = self._ranks()
+        return np.interp(x, values, ranks, left=0, right=1)
+
+    def _is_exact(self):
+        return all( not len(level) for level in self._levels[1:] )
+
+    def _ranks(self):
+        # sorted values and their (normalized) ranks, each value at the
+        # middle of its weight; extremes at ranks 0 and 1
+        values = np.concatenate(self._levels)
+        weights = np.concatenate([ np.full(len(level), 2.0**h)
+                                   for h,level in enumerate(self._levels) ])
+        order = np.argsort(values, kind='stable')
+        values,weights = values[order],weights[order]
+        ranks = (np.cumsum(weights) - weights/2) / weights.sum()
+        values = np.concatenate(([self._min], values, [self._max]))
+        ranks = np.concatenate(([0.0], ranks, [1.0]))
+        return values, ranks
+
+
+class StreamStats(object):
+    '''
+    Mergeable one-pass statistics of a column
+
+    Masked entries and NaN are counted as nulls; count, min, max, mean,
+    variance and quantiles are of the non-null values. Non-numeric
+    columns get only 'length', 'count' and 'nulls'.
+
+    Input:
+     - k : integer
+            Capacity of the quantile sketch levels (see ~QuantileSketch)
+     - seed : integer
+            Seed of the quantile sketch
+    '''
+    def __init__(self, k=_SKETCH_K, seed=0):
+        self.length = 0
+        self.count = 0
+        self.nulls = 0
+        self.min = None
+        self.max = None
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.numeric = True
+        self.sketch = QuantileSketch(k, seed)
+
+    def quantiles(self, q):
+        '''
+        Return (approximate) quantiles 'q' (in [0,1]) of the column
+        '''
+        return self.sketch.quantiles(q)
+
+    @property
+    def variance(self):
+        return self._m2 / self.count if self.count else np.nan
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    def update(self, values, mask=None):
+        '''
+        Add 'values' (array, column or masked array) to the statistics
+
+        Input:
+         - values : array-like
+         - mask : boolean array
+                Null entries (default, the mask of 'values', if any)
+        '''
+        if mask is None and np.ma.isMaskedArray(values):
+            mask = np.ma.getmaskarray(values)
+        data = np.asarray(values)
+        self.length += len(data)
+        data = data.ravel()
+        mask = None if mask is None else np.asarray(mask, dtype=bool).ravel()
+        if data.dtype.kind not in 'biuf':
+            self.numeric = False
+            nulls = 0 if mask is None else int(mask.sum())
+            self.nulls += nulls
+            self.count += data.size - nulls
+            self._update_distinct(data if mask is None else data[~mask])
+            return self
+        for start in range(0, data.size, _BLOCK_ROWS):
+            block = data[start:start+_BLOCK_ROWS]
+            valid = None if mask is None else ~mask[start:start+_BLOCK_ROWS]
+            if block.dtype.kind == 'f':
+                isnum = ~np.isnan(block)
+                valid = isnum if valid is None else valid & isnum
+            if valid is not None and not valid.all():
+                self.nulls += int(block.size - valid.sum())
+                block = block[valid]
+            self._update_block(block)
+        return self
+
+    def _update_block(self, block):
+        n = block.size
+        if not n:
+            return
+        if block.dtype.kind == 'b':
+            block = block.astype(np.uint8)
+        self._update_distinct(block)
+        _min,_max = block.min(),block.max()
+        self.min = _min if self.min is None else min(self.min, _min)
+        self.max = _max if self.max is None else max(self.max, _max)
+        block = block.astype(float, copy=False)
+        mean = block.mean()
+        m2 = np.square(block - mean).sum()
+        self._merge_moments(n, mean, m2)
+        self.sketch.update(block)
+
+    def _update_distinct(self, values):
+        # distinct values are not counted here (see ~ColumnSketch)
+        pass
+
+    def _merge_moments(self, n, mean, m2):
+        # Chan et al. parallel update of (count, mean, M2)
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self._m2 += m2 + delta*delta * self.count * n / total
+        self.count = total
+
+    def merge(self, other):
+        '''
+        Merge ~StreamStats 'other' (of another part of the column) into this one
+        '''
+        self.length += other.length
+        self.nulls += other.nulls
+        self.numeric = self.numeric and other.numeric
+        for attr,func in (('min',min), ('max',max)):
+            value = getattr(other, attr)
+            if value is not None:
+                mine = getattr(self, attr)
+                setattr(self, attr, value if mine is None else func(mine, value))
+        if other.count:
+            self._merge_moments(other.count, other.mean, other._m2)
+        self.sketch.merge(other.sketch)
+        return self
+
+    def result(self):
+        '''
+        Return the statistics in a dictionary
+
+        Keys are 'length', 'count', 'nulls', 'min', 'max', 'mean',
+        'std' and the quantiles '25%', '50%', '75%'.
+        '''
+        sts = OrderedDict()
+        sts['length'] = self.length
+        sts['count'] = self.count
+        sts['nulls'] = self.nulls
+        if not self.numeric:
+            return sts
+        empty = not self.count
+        sts['min'] = np.nan if empty else self.min
+        sts['max'] = np.nan if empty else self.max
+        sts['mean'] = np.nan if empty else self.mean
+        sts['std'] = self.std
+        for q,value in zip((25,50,75), self.quantiles([0.25,0.5,0.75])):
+            sts['{:d}%'.format(q)] = value
+        return sts
+
+
+class DistinctSketch(object):
+    '''
+    HyperLogLog sketch of the number of distinct values
+
+    Values are hashed (64 bits); the first 'p' bits choose one of 2**p
+    registers, which keeps the longest run of leading zeros seen in the
+    remaining bits. Relative error is about 1.04/sqrt(2**p); merging is
+    the element-wise maximum of the registers.
+
+    Input:
+     - p : integer
+            Precision, number of bits of the register index (4 to 16)
+    '''
+    def __init__(self, p=_HLL_P):
+        assert 4 <= p <= 16, "Precision 'p' must be in [4,16]"
+        self.p = int(p)
+        self.registers = np.zeros(1 << self.p, dtype=np.uint8)
+
+    def update(self, values):
+        '''
+        Add (non-null) 'values' to the sketch
+        '''
+        hashes = hash_values(values)
+        if not hashes.size:
+            return self
+        nbits = 64 - self.p
+        index = (hashes >> np.uint64(nbits)).astype(np.intp)
+        rest = hashes & np.uint64((1 << nbits) - 1)
+        # position of the first 1-bit in the 'nbits' bits after the index
+        rank = (nbits + 1 - np.frexp(rest.astype(float))[1]).astype(np.uint8)
+        if self.registers.any():
+            # only values above their register change it
+            update = rank > self.registers[index]
+            index,rank = index[update],rank[update]
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other):
+        '''
+        Merge ~DistinctSketch 'other' (same precision) into this one
+        '''
+        assert other.p == self.p, "Sketches of different precision"
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        '''
+        Return the estimated number of distinct values
+        '''
+        m = float(len(self.registers))
+        alpha = 0.7213 / (1 + 1.079/m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(int)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5*m and zeros:
+            # small range correction (linear counting)
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+def hash_values(values):
+    '''
+    Return 64-bit hashes (uint64 array) of 'values'
+
+    Numbers and fixed-width strings are hashed from their bytes, words
+    of 8 bytes at a time; objects go through ~pandas.util.hash_array.
+    '''
+    values = np.asarray(values).ravel()
+    kind = values.dtype.kind
+    if kind == 'f':
+        # -0.0 and 0.0 are the same value
+        words = (values.astype(np.float64) + 0.0).view(np.uint64)
+        return _mix(words)
+    if kind in 'iub':
+        return _mix(values.astype(np.int64).view(np.uint64))
+    if kind in 'SU':
+        width = values.dtype.itemsize
+        nwords = max(1, -(-width // 8))
+        raw = np.zeros((values.size, nwords*8), dtype=np.uint8)
+        if width and values.size:
+            raw[:, :width] = np.ascontiguousarray(values).view(np.uint8).reshape(values.size, width)
+        words = raw.view(np.uint64)
+        hashes = np.full(values.size, np.uint64(width))
+        for j in range(nwords):
+            hashes = _mix(hashes ^ words[:, j])
+        return hashes
+    from pandas.util import hash_array
+    return hash_array(values.astype(object))
+
+
+def _mix(z):
+    # 'splitmix64' finalizer; uint64 arithmetic wraps around
+    z = z ^ (z >> np.uint64(30))
+    z = z * np.uint64(0xbf58476d1ce4e5b9)
+    z = z ^ (z >> np.uint64(27))
+    z = z * np.uint64(0x94d049bb133111eb)
+    return z ^ (z >> np.uint64(31))
+
+
+class ColumnSketch(StreamStats):
+    '''
+    Summary of a column: ~StreamStats and number of distinct values
+
+    Sketches are made to be stored (see 'to_dict'/'from_dict') with
+    the table -- e.g, when writing it -- and used later instead of the
+    data: 'result' gives ~StreamStats statistics plus 'distinct',
+    'quantiles' and 'histogram' come from the quantile sketch.
+
+    When stored, the quantile sketch is reduced to a grid of quantiles
+    (~_GRID_RANKS); a sketch read back can still be merged (and
+    updated), at the precision of that grid.
+
+    Input:
+     - k : integer
+            Capacity of the quantile sketch levels
+     - seed : integer
+            Seed of the quantile sketch
+     - p : integer
+            Precision of the distinct count (see ~DistinctSketch)
+    '''
+    def __init__(self, k=_SKETCH_K, seed=0, p=_HLL_P):
+        super(ColumnSketch, self).__init__(k=k, seed=seed)
+        self.distinct = DistinctSketch(p)
+        # (ranks, quantiles) grid, while the sketch is as read (see 'from_dict')
+        self._grid = None
+        # checksum of the column values the sketch was computed from
+        # (see ~io.sketches.checksum), if known
+        self.checksum = None
+
+    def update(self, values, mask=None):
+        self._grid = None
+        self.checksum = None
+        return super(ColumnSketch, self).update(values, mask=mask)
+    update.__doc__ = StreamStats.update.__doc__
+
+    def _update_distinct(self, values):
+        self.distinct.update(values)
+
+    def merge(self, other):
+        '''
+        Merge ~ColumnSketch 'other' (of another part of the column) into this one
+        '''
+        self._grid = None
+        self.checksum = None
+        super(ColumnSketch, self).merge(other)
+        self.distinct.merge(other.distinct)
+        return self
+
+    def quantiles(self, q):
+        if self._grid is not None:
+            return np.interp(q, *self._grid)
+        return self.sketch.quantiles(q)
+    quantiles.__doc__ = StreamStats.quantiles.__doc__
+
+    def histogram(self, bins=10, range=None):
+        '''
+        Return (counts, edges) histogram of the column, from the sketch
+
+        Input:
+         - bins : integer or array
+                Number of bins (between 'range') or bins edges
+         - range : (float, float)
+                Lower and upper edges; default, column's (min,max)
+        '''
+        assert self.numeric, "Histogram of a non-numeric column"
+        if np.ndim(bins) == 0:
+            if range is None:
+                range = (self.min, self.max) if self.count else (0, 1)
+            edges = np.linspace(range[0], range[1], int(bins)+1)
+        else:
+            edges = np.asarray(bins, dtype=float)
+        if not self.count:
+            return np.zeros(len(edges)-1), edges
+        if self._grid is not None:
+            ranks,values = self._grid
+            cdf = np.interp(edges, values, ranks, left=0, right=1)
+        else:
+            cdf = self.sketch.cdf(edges)
+        # bins are half-open, [low,high), but the last one: [low,high]
+        cdf[edges <= self.min] = 0
+        cdf[edges >= self.max] = 1
+        return np.diff(cdf) * self.count, edges
+
+    def result(self):
+        sts = super(ColumnSketch, self).result()
+        sts['distinct'] = self.distinct.estimate() if self.count else 0
+        return sts
+    result.__doc__ = StreamStats.result.__doc__
+
+    def to_dict(self):
+        '''
+        Return the sketch as a (JSON serializable) dictionary
+        '''
+        import base64, zlib
+        def scalar(value):
+            return value.item() if hasattr(value, 'item') else value
+        out = OrderedDict()
+        out['length'] = int(self.length)
+        out['count'] = int(self.count)
+        out['nulls'] = int(self.nulls)
+        out['numeric'] = bool(self.numeric)
+        if self.numeric and self.count:
+            out['min'] = scalar(self.min)
+            out['max'] = scalar(self.max)
+            out['mean'] = float(self.mean)
+            out['m2'] = float(self._m2)
+            ranks = _GRID_RANKS if self._grid is None else self._grid[0]
+            out['ranks'] = ranks.tolist()
+            out['quantiles'] = self.quantiles(ranks).tolist()
+        out['hll'] = base64.b64encode(zlib.compress(self.distinct.registers.tobytes())).decode()
+        if self.checksum is not None:
+            out['checksum'] = int(self.checksum)
+        return out
+
+    @classmethod
+    def from_dict(cls, sketch, **kwargs):
+        '''
+        Return ~ColumnSketch from dictionary 'sketch' (see 'to_dict')
+        '''
+        import base64, zlib
+        registers = np.frombuffer(zlib.decompress(base64.b64decode(sketch['hll'])), dtype=np.uint8)
+        kwargs.setdefault('p', int(np.log2(len(registers))))
+        self = cls(**kwargs)
+        self.distinct.registers = registers.copy()
+        self.length = int(sketch['length'])
+        self.count = int(sketch['count'])
+        self.nulls = int(sketch['nulls'])
+        self.numeric = bool(sketch['numeric'])
+        self.checksum = sketch.get('checksum')
+        if 'quantiles' in sketch:
+            self.min = sketch['min']
+            self.max = sketch['max']
+            self.mean = float(sketch['mean'])
+            self._m2 = float(sketch['m2'])
+            ranks = np.asarray(sketch['ranks'], dtype=float)
+            values = np.asarray(sketch['quantiles'], dtype=float)
+            self.sketch.load_grid(ranks, values, self.count)
+            self._grid = (ranks, values)
+        return self
+
+
+def table_stats(table, columns=None, workers=None, stats_class=None, **kwargs):
+    '''
+    Return {column : ~StreamStats} of 'table' columns
+
+    Columns are processed in a pool of threads (numpy releases the GIL
+    while reducing and sorting the blocks).
+
+    Input:
+     - table : ~astropy.table.Table
+     - columns : list of strings
+            Columns to process; all if None
+     - workers : integer
+            Number of threads; if 1, columns are processed in this thread
+     - stats_class : class
+            ~StreamStats (default) or ~ColumnSketch
+     - kwargs : arguments to 'stats_class'
+    '''
+    columns = table.colnames if columns is None else list(columns)
+    stats_class = StreamStats if stats_class is None else stats_class
+
+    def column_stats(name):
+        return stats_class(**kwargs).update(table[name])
+
+    if workers == 1 or len(columns) <= 1:
+        results = [ column_stats(name) for name in columns ]
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(column_stats, columns))
+    return OrderedDict(zip(columns, results))
+
+
+def chunks_stats(chunks, columns=None, workers=None, stats_class=None, **kwargs):
+    '''
+    Return {column : ~StreamStats} of a sequence of tables (chunks)
+
+    Stats of each chunk are merged as they come, e.g:
+    'chunks_stats(ATable.iter_chunks(filename))' describes a file
+    without loading it whole.
+    '''
+    stats = None
+    for chunk in chunks:
+        partial = table_stats(chunk, columns=columns, workers=workers,
+                              stats_class=stats_class, **kwargs)
+        stats = partial if stats is None else merge_stats(stats, partial)
+    return OrderedDict() if stats is None else stats
+
+
+def merge_stats(stats, other):
+    '''
+    Merge {column : ~StreamStats} 'other' into 'stats' (returned)
+    '''
+    for name,sts in other.items():
+        if name in stats:
+            stats[name].merge(sts)
+        else:
+            stats[name] = sts
+    return stats
+
+
 def basic(arrei):
     '''
     Outputs in a dictionary:
+    - length, count, nulls
     - min
     - max
     - mean
@@ -13,30 +632,4 @@ def basic(arrei):
     if not len(arrei):
         logging.error("There is no data to comute stats; given array is empty.")
         return None
-
-    from collections import OrderedDict
-    sts = OrderedDict()
-
-    sts['length'] = len(arrei)
-
-    if all([ hasattr(arrei,attr) for attr in ['min','max','mean','std'] ]):
-        sts['min'] = arrei.min()
-        sts['max'] = arrei.max()
-        sts['mean'] = arrei.mean()
-        sts['std'] = arrei.std()
-    else:
-        from numpy import amin, amax, mean, std
-        sts['min'] = amin(arrei)
-        sts['max'] = amax(arrei)
-        sts['mean'] = mean(arrei)
-        sts['std'] = std(arrei)
-
-    from numpy import percentile
-    _q1 = percentile(arrei, 25)
-    _q2 = percentile(arrei, 50)
-    _q3 = percentile(arrei, 75)
-    sts['25%'] = _q1
-    sts['50%'] = _q2
-    sts['75%'] = _q3
-
-    return sts
+    return StreamStats().update(arrei).result()
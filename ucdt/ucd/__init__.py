@@ -11,48 +11,87 @@ def tests():
 
 class UCDTree(UCDAtom):
     '''
+    Prefix tree (trie) of UCD words, keyed by their atoms
+
+    Each word of an inserted UCD is a path from the tree root, one node
+    per atom ('pos.eq.ra': pos -> eq -> ra); the data given with the UCD
+    (e.g, a column name) is attached to the last node of each word.
+    Children are indexed by atom, so finding a word costs O(depth),
+    regardless of the number of UCDs inserted.
+
+    Example:
+    >>> t = UCDTree().load(['pos.eq.ra;meta.main', 'pos.eq.dec'], ['ra','dec'])
+    >>> t.lookup('pos.eq.ra')
+    ['ra']
+    >>> t.search_data('pos.eq')
+    ['ra', 'dec']
     '''
     def __init__(self):
         super(UCDTree, self).__init__(None)
         self.ucds = []
-        # self.root = []
-        # self._init_roots()
-
-    # def _init_roots(self):
-    #     for k, v in Roots.items():
-    #         self.add_child(v)
 
     def __str__(self):
         return self.print_tree()
 
+    def __len__(self):
+        return len(self.ucds)
+
     def load(self, ucds, data=None):
+        '''
+        Insert each of 'ucds', paired with the respective 'data' item
+        '''
         if not ucds:
             return self
         if data is None:
             data = [None] * len(ucds)
+        assert len(ucds) == len(data), "'ucds' and 'data' should have the same length"
         for u, d in zip(ucds, data):
             self.insert(u, d)
-        return load
+        return self
 
     def insert(self, ucd, data=None):
         '''
         Insert the pair 'ucd','data'
         '''
-        ucd = UCD(ucd, data)
-        self.ucds.append(ucd)
+        ucd = UCD(ucd)
+        self._add_ucd(ucd, data)
+        self.ucds.append((ucd, data))
         return self
 
+    def find(self, word):
+        '''
+        Return the node of (exact) 'word', None if not in the tree
+        '''
+        return self._find_word(_as_word(word))
+
+    def lookup(self, word):
+        '''
+        Return the data attached to (exact) 'word'
+        '''
+        node = self.find(word)
+        return [] if node is None else list(node.data)
+
     def search(self, ucd):
         '''
-        Search for a 'ucd'
+        Search for a 'ucd' (word) prefix
 
-        The idea is to retrieve items with 'ucd' in common
+        Retrieve the nodes holding data at or under 'ucd', e.g.
+        'pos.eq' retrieves 'pos.eq', 'pos.eq.ra', 'pos.eq.dec',...
         '''
-        if not isinstance(ucd, UCDWord):
-            ucd = UCDWord(ucd)
-        subtree = self._find_word(ucd)
+        subtree = self._find_word(_as_word(ucd))
+        if subtree is None:
+            return []
         return retrieve_all(subtree)
 
+    def search_data(self, ucd):
+        '''
+        Return the data (unique) attached to 'ucd' (word) prefix
+        '''
+        items = []
+        for node in self.search(ucd):
+            items.extend(d for d in node.data if d not in items)
+        return items
+
     def all(self):
         items = []
         for atom in self.children:
@@ -64,32 +103,38 @@ class UCDTree(UCDAtom):
         return '\n'.join(items)
 
     def _add_ucd(self, ucd, data):
-        ucd.add(data)
-        self.
         for word in ucd:
             self._add_word(word, data)
 
     def _add_word(self, word, data):
         assert isinstance(word, UCDWord)
         subtree = self
-        for i, atom in enumerate(word):
-            # if i == 0:
-            #     assert atom.is_root and self.has_child(atom)
-            if not subtree.has_child(atom):
-                subtree.add_child(atom)
-            subtree = subtree.get_child(atom)
+        for atom in word:
+            child = subtree.get_child(atom)
+            if child is None:
+                child = subtree.add_child(UCDAtom(str(atom), parent=subtree))
+            subtree = child
         subtree.data.append(data)
 
     def _find_word(self, word):
         assert isinstance(word, UCDWord)
         subtree = self
-        for i, atom in enumerate(word):
-            if not subtree.has_child(atom):
-                return None
+        for atom in word:
             subtree = subtree.get_child(atom)
+            if subtree is None:
+                return None
         return subtree
 
 
+def _as_word(word):
+    if isinstance(word, UCDWord):
+        return word
+    if isinstance(word, UCD):
+        assert len(word) == 1, "Expected a single-word UCD, got '{!s}'".format(word)
+        return word.primary
+    return UCDWord(str(word).strip())
+
+
 def print_leaf(leaf, level):
     lvl = ''.join([' |']*level)
     fmt = '{level}-{leaf}'
@@ -105,9 +150,10 @@ def print_branch(branch, level):
 
 
 def retrieve_all(atom):
-    if not atom.children:
-        return [atom]
-    items = []
+    '''
+    Return the nodes holding data in the subtree of 'atom' (included)
+    '''
+    items = [atom] if atom.data else []
     for child in atom.children:
         items.extend(retrieve_all(child))
     return items
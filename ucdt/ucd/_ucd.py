@@ -24,15 +24,17 @@ class UCDAtom(UCDBase):
     '''
     def __init__(self, atom, family=None, description=None,
                  parent=None, children=None):
-        assert atom
+        # only the root of a tree (~UCDTree) has no atom
+        assert atom or atom is None
         self._atom = atom
         self._family = family
         self._description = description
-        # self._parent = parent
+        self._parent = parent
         self.data = []
 
         assert not children
-        self._children = []
+        # children are indexed by their atom (string)
+        self._children = OrderedDict()
 
     def __eq__(self, other):
         return self._atom == other._atom
@@ -57,17 +59,14 @@ class UCDAtom(UCDBase):
     #     return 'UCDAtom({args})'.format(args=_args)
 
     def has_child(self, atom):
-        return atom in self.children
+        return str(atom) in self._children
 
     def add_child(self, atom):
         assert isinstance(atom, UCDAtom)
-        if atom not in self._children:
-            self._children.append(atom)
+        return self._children.setdefault(str(atom), atom)
 
     def get_child(self, atom):
-        assert isinstance(atom, UCDAtom)
-        i_child = self.children.index(atom)
-        return self.children[i_child]
+        return self._children.get(str(atom))
 
     @property
     def is_root(self):
@@ -83,7 +82,7 @@ class UCDAtom(UCDBase):
 
     @property
     def children(self):
-        return self._children
+        return list(self._children.values())
 
     @property
     def description(self):
@@ -207,7 +206,7 @@ class UCD(UCDBase):
                 A (UCD) composite-word
         '''
         if isinstance(ucd, UCD):
-            self._ucd = ucd.copy()
+            self._ucd = list(ucd._ucd)
         else:
             # assert _is_string(ucd) or ucd is None, "{}".format(type(ucd))
             self._ucd = self._def_ucd(ucd)
@@ -269,7 +268,7 @@ class UCD(UCDBase):
     @property
     def primary(self):
         _it = iter(self)
-        return _it.next()
+        return next(_it)
 
     @property
     def family(self):
@@ -41,3 +41,40 @@ def test_search():
     assert len(r) == 1
     assert len(r[0].data) == len(cols)
     assert all(d in cols for u in r for d in u.data)
+
+
+def test_load():
+    ucds = ['meta.id;meta.main', 'pos.eq.ra;meta.main', 'pos.eq.dec;meta.main']
+    cols = ['col1', 'col2', 'col3']
+
+    t = ucd.UCDTree().load(ucds, cols)
+
+    assert len(t) == 3
+    assert len(t.all()) == 4
+
+
+def test_lookup():
+    t = ucd.UCDTree()
+    t.load(['pos.eq.ra;meta.main', 'pos.eq.dec', 'pos.eq'], ['ra', 'dec', 'eq'])
+
+    assert t.lookup('pos.eq.ra') == ['ra']
+    assert t.lookup(ucd.UCDWord('pos.eq')) == ['eq']
+    assert t.lookup('pos.galactic.lon') == []
+    assert t.find('pos.eq.dec').data == ['dec']
+    assert t.find('pos.galactic') is None
+
+
+def test_search_prefix():
+    t = ucd.UCDTree()
+    t.insert('pos.eq.ra;meta.main', 'ra')
+    t.insert('pos.eq.dec;meta.main', 'dec')
+    t.insert('pos.galactic.lon', 'lon')
+    t.insert('phot.mag', 'mag')
+
+    assert sorted(t.search_data('pos.eq')) == ['dec', 'ra']
+    assert sorted(t.search_data('pos')) == ['dec', 'lon', 'ra']
+    assert t.search_data('meta') == ['ra', 'dec']
+    assert t.search_data('pos.eq.ra') == ['ra']
+    assert t.search('src') == []
+    # prefixes are whole atoms
+    assert t.search('pos.e') == []